@@ -1,11 +1,16 @@
 from django.contrib import admin
+from django.db.models import Count, Exists, OuterRef
+from django.http import StreamingHttpResponse
 from django.utils.html import format_html
 from django.utils.safestring import mark_safe
+from django.utils import timezone
 from .models import (
     College, Course, Syllabus, FacultyMember, HeadOfCampus, 
     News, Notice, AdmissionApplication, AcademicQualification, AdmissionDocument, 
-    Facility, Calendar, Resource, Gallery, Alumni, SplashImage, StudentTestimonial, Contact
+    Facility, Calendar, Resource, Gallery, Alumni, SplashImage, StudentTestimonial, Contact,
+    OutboundEmail
 )
+from .exports import EXPORT_FORMATS, documents_zip_stream
 
 # Customize admin site header and title
 admin.site.site_header = "School Administration Panel"
@@ -20,19 +25,24 @@ class CourseAdmin(admin.ModelAdmin):
     list_filter = ('level',)
     search_fields = ('name', 'course_code')
     ordering = ('level', 'name')
+
+    def get_queryset(self, request):
+        # One EXISTS per row in the same query instead of a syllabus lookup per row
+        return super().get_queryset(request).annotate(
+            syllabus_exists=Exists(Syllabus.objects.filter(course=OuterRef('pk')))
+        )
     
     def has_syllabus(self, obj):
-        try:
-            return bool(obj.syllabus)
-        except:
-            return False
+        return obj.syllabus_exists
     has_syllabus.boolean = True
     has_syllabus.short_description = 'Syllabus Available'
+    has_syllabus.admin_order_field = 'syllabus_exists'
 
 # Syllabus Admin
 @admin.register(Syllabus)
 class SyllabusAdmin(admin.ModelAdmin):
     list_display = ('course', 'file_link')
+    list_select_related = ('course',)
     search_fields = ('course__name',)
     
     def file_link(self, obj):
@@ -70,6 +80,7 @@ class FacultyMemberAdmin(admin.ModelAdmin):
 @admin.register(News)
 class NewsAdmin(admin.ModelAdmin):
     list_display = ('title', 'author', 'published_date', 'is_published', 'image_preview')
+    list_select_related = ('author',)
     list_filter = ('is_published', 'published_date', 'author')
     search_fields = ('title', 'content')
     date_hierarchy = 'published_date'
@@ -117,7 +128,7 @@ class AdmissionApplicationAdmin(admin.ModelAdmin):
     readonly_fields = ('submitted_at', 'profile_photo_preview', 'application_summary', 'documents_summary')
     list_editable = ('is_processed',)
     # Custom actions
-    actions = ['mark_as_processed', 'mark_as_unprocessed']
+    actions = ['mark_as_processed', 'mark_as_unprocessed', 'export_as_csv', 'export_as_xlsx', 'download_documents']
 
     fieldsets = (
         ('Admission Application Details', {
@@ -135,6 +146,10 @@ class AdmissionApplicationAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_queryset(self, request):
+        # Document counts for the whole page in the changelist query itself
+        return super().get_queryset(request).annotate(documents_total=Count('documents'))
+
     def profile_photo_preview(self, obj):
         if obj.profile_photo:
             return format_html(
@@ -179,12 +194,12 @@ class AdmissionApplicationAdmin(admin.ModelAdmin):
     application_summary.short_description = 'Application Overview'
 
     def documents_summary(self, obj):
-        documents = obj.documents.all()
-        if not documents.exists():
+        documents = list(obj.documents.all())
+        if not documents:
             return format_html('<div style="color: #dc3545;">⚠️ No documents uploaded</div>')
 
         docs_html = '<div style="background: #f8f9fa; padding: 15px; border-radius: 8px; border-left: 4px solid #28a745;">'
-        docs_html += '<h4 style="margin-top: 0; color: #28a745;">📁 Uploaded Documents ({} files)</h4>'.format(documents.count())
+        docs_html += '<h4 style="margin-top: 0; color: #28a745;">📁 Uploaded Documents ({} files)</h4>'.format(len(documents))
         docs_html += '<div style="display: grid; gap: 10px;">'
 
         for doc in documents:
@@ -206,11 +221,12 @@ class AdmissionApplicationAdmin(admin.ModelAdmin):
     documents_summary.short_description = 'Documents Uploaded'
 
     def documents_count(self, obj):
-        count = obj.documents.count()
+        count = obj.documents_total
         if count > 0:
             return format_html('<span style="color: #28a745;">📁 {} files</span>', count)
         return format_html('<span style="color: #dc3545;">no files</span>')
     documents_count.short_description = 'Documents'
+    documents_count.admin_order_field = 'documents_total'
 
     def mark_as_processed(self, request, queryset):
         updated = queryset.update(is_processed=True)
@@ -222,6 +238,28 @@ class AdmissionApplicationAdmin(admin.ModelAdmin):
         self.message_user(request, f'{updated} applications marked as unprocessed.')
     mark_as_unprocessed.short_description = "Mark selected applications as unprocessed"
 
+    def export_applications(self, queryset, export_format):
+        stream, content_type = EXPORT_FORMATS[export_format]
+        response = StreamingHttpResponse(stream(queryset), content_type=content_type)
+        filename = f"admission-applications-{timezone.localdate():%Y%m%d}.{export_format}"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    def export_as_csv(self, request, queryset):
+        return self.export_applications(queryset, 'csv')
+    export_as_csv.short_description = "Export selected applications as CSV"
+
+    def export_as_xlsx(self, request, queryset):
+        return self.export_applications(queryset, 'xlsx')
+    export_as_xlsx.short_description = "Export selected applications as XLSX"
+
+    def download_documents(self, request, queryset):
+        response = StreamingHttpResponse(documents_zip_stream(queryset), content_type='application/zip')
+        filename = f"admission-documents-{timezone.localdate():%Y%m%d}.zip"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+    download_documents.short_description = "Download documents of selected applications (ZIP)"
+
     def get_readonly_fields(self, request, obj=None):
         if obj:  # editing an existing object
             return self.readonly_fields + ('full_name', 'date_of_birth_ad', 'date_of_birth_bs', 'nationality', 'gender',
@@ -388,4 +426,19 @@ class ContactAdmin(admin.ModelAdmin):
     def mark_as_not_replied(self, request, queryset):
         updated = queryset.update(is_replied=False)
         self.message_user(request, f'{updated} messages marked as not replied.')
-    mark_as_not_replied.short_description = "Mark selected messages as not replied"
\ No newline at end of file
+    mark_as_not_replied.short_description = "Mark selected messages as not replied"
+
+# Outbound Email Admin
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'recipients', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status', 'created_at')
+    search_fields = ('subject', 'recipients')
+    ordering = ('-created_at',)
+    readonly_fields = ('subject', 'body', 'from_email', 'recipients', 'attempts', 'locked_at', 'last_error', 'created_at', 'sent_at')
+    actions = ['retry_now']
+
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status='sent').update(status='pending', attempts=0, next_attempt_at=timezone.now(), locked_at=None)
+        self.message_user(request, f'{updated} emails queued for another delivery attempt.')
+    retry_now.short_description = "Retry selected emails now"
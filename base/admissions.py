@@ -0,0 +1,66 @@
+from django.db import transaction
+
+from .models import AcademicQualification, AdmissionDocument
+from .uploads import StoredUploadedFile
+
+
+def _kept_forms(formset):
+    """Filled-in forms of a formset that were not marked for deletion"""
+    return [
+        form for form in formset
+        if form.cleaned_data and not form.cleaned_data.get('DELETE', False)
+    ]
+
+
+def _store_file(field_file, stored):
+    # Write an uploaded file to storage once, the same way FileField.pre_save
+    # would, so the INSERT later finds it already committed.
+    if not field_file or field_file._committed:
+        return
+    upload = field_file.file
+    if isinstance(upload, StoredUploadedFile):
+        # Already streamed to its final location by AdmissionUploadHandler
+        field_file.name = upload.stored_name
+        field_file._committed = True
+    else:
+        field_file.save(field_file.name, upload, save=False)
+    stored.append(field_file)
+
+
+def save_admission_submission(form, academic_formset, document_formset):
+    """
+    Persist a validated admission form and its formsets atomically.
+
+    Uploaded files are written to storage before the transaction starts, so
+    the SQLite write lock is only held for the INSERTs: the application row
+    plus one bulk_create per child table. If the database write fails, the
+    files written for this submission are removed again.
+    """
+    application = form.save(commit=False)
+    qualifications = [academic_form.save(commit=False) for academic_form in _kept_forms(academic_formset)]
+    documents = [document_form.save(commit=False) for document_form in _kept_forms(document_formset)]
+
+    stored = []
+    try:
+        _store_file(application.profile_photo, stored)
+        for document in documents:
+            upload = document.document_file.file
+            if isinstance(upload, StoredUploadedFile):
+                document.file_size = upload.size
+                document.sha256 = upload.sha256
+            _store_file(document.document_file, stored)
+
+        with transaction.atomic():
+            application.save()
+            for qualification in qualifications:
+                qualification.application = application
+            for document in documents:
+                document.application = application
+            AcademicQualification.objects.bulk_create(qualifications)
+            AdmissionDocument.objects.bulk_create(documents)
+    except Exception:
+        for field_file in stored:
+            field_file.storage.delete(field_file.name)
+        raise
+
+    return application
@@ -0,0 +1,127 @@
+import json
+
+from django.core.files.storage import default_storage
+from django.http import HttpResponse
+
+from .caching import content_freshness
+from .models import News, Notice, Gallery, FacultyMember, Course
+from .pagination import KeysetPaginator
+
+try:
+    import orjson
+except ImportError:  # optional, faster encoder; the json module is used without it
+    orjson = None
+
+
+# Rows per page of the JSON API, and the most a client may ask for with ?limit=
+API_PAGE_SIZE = 20
+API_MAX_PAGE_SIZE = 100
+
+
+def _isoformat(value):
+    return value.isoformat() if value else None
+
+
+def _media_url(name):
+    return default_storage.url(name) if name else None
+
+
+class ContentResource:
+    """
+    One content type served by the JSON API.
+
+    fields maps each field a client may select with ?fields= to a converter
+    for its raw .values() value (None to send it as is); default_fields are
+    sent when no ?fields= is given. Rows are paged with keyset cursors on
+    ordering, which must be unique and backed by an index.
+    """
+
+    def __init__(self, queryset, ordering, fields, default_fields, date_field=None):
+        self.queryset = queryset
+        self.ordering = ordering
+        self.fields = fields
+        self.default_fields = default_fields
+        self.freshness = content_freshness((queryset, date_field))
+
+    def select_fields(self, requested):
+        """The fields named in a ?fields= value, or the defaults; None if any is unknown"""
+        if not requested:
+            return self.default_fields
+        names = [name.strip() for name in requested.split(',') if name.strip()]
+        if not names or any(name not in self.fields for name in names):
+            return None
+        return list(dict.fromkeys(names))
+
+    def serialize(self, row, fields):
+        """The selected fields of one .values() row, converted for JSON"""
+        return {name: self.fields[name](row[name]) if self.fields[name] else row[name] for name in fields}
+
+    def page(self, fields, cursor, limit):
+        """Serialized rows of one page, with the cursors of its neighbours"""
+        keys = [name.lstrip('-') for name in self.ordering]
+        rows = self.queryset.values(*dict.fromkeys(fields + keys))
+        page = KeysetPaginator(rows, limit, self.ordering).get_page(cursor)
+        return [self.serialize(row, fields) for row in page], page.next_cursor, page.previous_cursor
+
+    def rows_by_id(self, ids, fields=None):
+        """{id: serialized row} of the given ids that this resource still serves"""
+        fields = fields or self.default_fields
+        rows = self.queryset.filter(pk__in=ids).values(*dict.fromkeys(fields + ['id']))
+        return {row['id']: self.serialize(row, fields) for row in rows}
+
+
+API_RESOURCES = {
+    'news': ContentResource(
+        News.objects.filter(is_published=True),
+        ('-published_date', '-id'),
+        {'id': None, 'title': None, 'content': None, 'published_date': _isoformat, 'image': _media_url},
+        ['id', 'title', 'published_date', 'image'],
+        date_field='published_date',
+    ),
+    'notices': ContentResource(
+        Notice.objects.filter(is_published=True),
+        ('-published_date', '-id'),
+        {'id': None, 'title': None, 'content': None, 'published_date': _isoformat, 'file': _media_url},
+        ['id', 'title', 'published_date'],
+        date_field='published_date',
+    ),
+    'gallery': ContentResource(
+        Gallery.objects.filter(image__isnull=False),
+        ('-uploaded_at', '-id'),
+        {'id': None, 'title': None, 'image': _media_url, 'uploaded_at': _isoformat},
+        ['id', 'title', 'image'],
+        date_field='uploaded_at',
+    ),
+    'faculty': ContentResource(
+        FacultyMember.objects.all(),
+        ('designation', 'full_name', 'id'),
+        {
+            'id': None, 'full_name': None, 'designation': None, 'image': _media_url,
+            'bio': None, 'contact_email': None, 'phone_number': None,
+        },
+        ['id', 'full_name', 'designation', 'image'],
+    ),
+    'courses': ContentResource(
+        Course.objects.all(),
+        ('level', 'name', 'id'),
+        {
+            'id': None, 'level': None, 'name': None, 'course_code': None,
+            'description': None, 'image': _media_url,
+        },
+        ['id', 'level', 'name', 'course_code'],
+    ),
+}
+
+
+def resource_freshness(request, resource):
+    """conditional_page freshness of an API resource's rows"""
+    return API_RESOURCES[resource].freshness(request)
+
+
+def json_response(data, status=200):
+    """JSON response encoded with orjson when it is installed"""
+    if orjson is not None:
+        content = orjson.dumps(data)
+    else:
+        content = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode()
+    return HttpResponse(content, status=status, content_type='application/json')
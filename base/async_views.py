@@ -0,0 +1,132 @@
+"""
+Async variants of the read-only public pages, routed instead of the views
+in views.py when ASYNC_PUBLIC_VIEWS is set (school/asgi.py sets it).
+
+They share freshness functions, templates and page cache entries with the
+sync views. Rows are fetched with the async ORM API before rendering;
+templates are rendered in a worker thread, since tags such as
+responsive_image still read the cache and database.
+
+Independent queries are awaited one after the other rather than gathered:
+Django runs every async ORM call of a request on the same thread and
+connection, so asyncio.gather would only queue them the same way.
+"""
+from asgiref.sync import sync_to_async
+from django.http import Http404
+from django.shortcuts import aget_object_or_404, render
+from django.views.decorators.http import require_http_methods
+
+from . import views
+from .caching import acached_count, conditional_page
+from .models import News, Notice, Gallery, Syllabus, Resource, Calendar
+from .pagination import KeysetPaginator
+from .routers import note_replica_miss
+
+
+async def _list(queryset):
+    return [obj async for obj in queryset]
+
+
+async def render_page(request, template_name, context):
+    """render() in a worker thread"""
+    return await sync_to_async(render)(request, template_name, context)
+
+
+async def aget_published_or_404(model, pk):
+    """views.get_published_or_404 for async views"""
+    try:
+        return await aget_object_or_404(model, pk=pk, is_published=True)
+    except Http404:
+        note_replica_miss()
+        raise
+
+
+@require_http_methods(['GET', 'HEAD'])
+@conditional_page(views.home_freshness)
+async def home(request):
+    # The context is lazy: sections are only queried by the template, when
+    # their cached fragment is missing
+    context = await sync_to_async(views.home_context)()
+    return await render_page(request, 'home.html', context)
+
+
+@conditional_page(views.gallery_freshness)
+async def gallery(request):
+    galleries = Gallery.objects.filter(image__isnull=False).order_by('-uploaded_at')
+    paginator = KeysetPaginator(galleries, 12, ('-uploaded_at', '-id'))
+
+    context = {
+        'galleries': await paginator.aget_page(request.GET.get('cursor')),
+        'total_images': await acached_count(galleries),
+    }
+    return await render_page(request, 'gallery.html', context)
+
+
+@conditional_page(views.notice_freshness)
+async def notice(request):
+    notice_list = Notice.objects.filter(is_published=True).order_by('-published_date')
+    paginator = KeysetPaginator(notice_list, 10, ('-published_date', '-id'))
+
+    context = {
+        'notices': await paginator.aget_page(request.GET.get('cursor')),
+        'total_notices': await acached_count(notice_list),
+    }
+    return await render_page(request, 'notice.html', context)
+
+
+@conditional_page(views.news_freshness)
+async def news(request):
+    news_list = News.objects.filter(is_published=True).order_by('-published_date')
+    paginator = KeysetPaginator(news_list, 6, ('-published_date', '-id'))
+
+    context = {
+        'news': await paginator.aget_page(request.GET.get('cursor')),
+        'latest_notices': await _list(Notice.objects.filter(is_published=True)[:5]),
+        'total_news': await acached_count(news_list),
+    }
+    return await render_page(request, 'news.html', context)
+
+
+@conditional_page(views.news_freshness)
+async def news_detail(request, pk):
+    context = {
+        'news': await aget_published_or_404(News, pk),
+        'recent_news': await _list(
+            News.objects.filter(is_published=True).exclude(pk=pk).order_by('-published_date')[:4]
+        ),
+        'latest_notices': await _list(Notice.objects.filter(is_published=True)[:5]),
+    }
+    return await render_page(request, 'news_detail.html', context)
+
+
+@conditional_page(views.notice_detail_freshness)
+async def notice_detail(request, pk):
+    context = {
+        'notice': await aget_published_or_404(Notice, pk),
+        'recent_notices': await _list(
+            Notice.objects.filter(is_published=True).exclude(pk=pk).order_by('-published_date')[:5]
+        ),
+        'latest_news': await _list(News.objects.filter(is_published=True)[:5]),
+    }
+    return await render_page(request, 'notice_detail.html', context)
+
+
+@conditional_page(views.syllabus_freshness)
+async def syllabus(request):
+    syllabuses = Syllabus.objects.select_related('course').order_by('course__name')
+    context = {
+        'bachelor_syllabuses': await _list(syllabuses.filter(course__level='B')),
+        'master_syllabuses': await _list(syllabuses.filter(course__level='M')),
+    }
+    return await render_page(request, 'syllabus.html', context)
+
+
+@conditional_page(views.resources_freshness)
+async def resources(request):
+    calendars = Calendar.objects.order_by('-uploaded_at')
+    context = {
+        'resources': await _list(Resource.objects.order_by('-uploaded_at')),
+        'latest_calendar': await calendars.afirst(),
+        'all_calendars': await _list(calendars),
+    }
+    return await render_page(request, 'resources.html', context)
@@ -0,0 +1,371 @@
+import asyncio
+import hashlib
+import math
+import random
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+# Cache key prefixes for per-model content versions and change times
+CONTENT_VERSION_KEY = 'content-version:{}'
+CONTENT_CHANGED_KEY = 'content-changed:{}'
+
+# Cache key prefixes for full rendered pages and cached row counts
+PAGE_CACHE_KEY = 'page:{}'
+COUNT_CACHE_KEY = 'count:{}:{}:{}'
+
+# Cache key prefix for the regeneration lock of a single-flight entry
+REGENERATE_LOCK_KEY = 'regenerating:{}'
+
+# Seconds between two looks at the cache while another request regenerates a missing entry
+REGENERATE_POLL_INTERVAL = 0.05
+
+
+def _version_key(model):
+    return CONTENT_VERSION_KEY.format(model._meta.label_lower)
+
+
+def _changed_key(model):
+    return CONTENT_CHANGED_KEY.format(model._meta.label_lower)
+
+
+def initial_version():
+    """
+    Starting value for a version key. Seeded with the current time, so a
+    key that was evicted never comes back with a number that old cached
+    values are still stored under.
+    """
+    return int(time.time() * 1000)
+
+
+def get_content_versions(models):
+    """Return {model_name: version} for the given models in a single cache round trip"""
+    keys = {_version_key(model): model._meta.model_name for model in models}
+    found = cache.get_many(list(keys))
+
+    versions = {}
+    for key, name in keys.items():
+        if key not in found:
+            cache.add(key, initial_version(), timeout=None)
+            found[key] = cache.get(key)
+        versions[name] = found[key]
+    return versions
+
+
+def get_content_changed_at(models):
+    """Return the latest recorded change time (unix seconds) across the given models"""
+    found = cache.get_many([_changed_key(model) for model in models])
+    return max(found.values(), default=None)
+
+
+def bump_content_version(model):
+    """Invalidate everything rendered from this model's rows"""
+    cache.set(_changed_key(model), int(time.time()), timeout=None)
+    key = _version_key(model)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Key was never set or has been evicted
+        cache.set(key, initial_version(), timeout=None)
+        return cache.get(key)
+
+
+def _count_key(queryset):
+    model = queryset.model
+    version = get_content_versions([model])[model._meta.model_name]
+    sql = hashlib.md5(str(queryset.query).encode()).hexdigest()
+    return COUNT_CACHE_KEY.format(model._meta.label_lower, version, sql)
+
+
+def cached_count(queryset):
+    """COUNT(*) for a queryset, cached until its model's content version changes"""
+    key = _count_key(queryset)
+    total = cache.get(key)
+    if total is None:
+        total = queryset.count()
+        cache.set(key, total, settings.PAGE_CACHE_TIMEOUT)
+    return total
+
+
+async def acached_count(queryset):
+    """cached_count for async views"""
+    key = await sync_to_async(_count_key)(queryset)
+    total = await cache.aget(key)
+    if total is None:
+        total = await queryset.acount()
+        await cache.aset(key, total, settings.PAGE_CACHE_TIMEOUT)
+    return total
+
+
+def _expires_early(entry, beta):
+    """
+    Probabilistic early expiration: the closer an entry is to its expiry,
+    and the longer it took to compute, the likelier one request is to
+    regenerate it ahead of time, so expiries do not all land at once.
+    """
+    return time.time() - entry['delta'] * beta * math.log(1 - random.random()) >= entry['expires']
+
+
+def _new_entry(value, version, started, timeout):
+    return {
+        'value': value,
+        'version': version,
+        'expires': time.time() + timeout,
+        'delta': time.time() - started,
+    }
+
+
+def _is_current(entry, version):
+    return entry['version'] == version and not _expires_early(entry, settings.STAMPEDE_EARLY_EXPIRY_BETA)
+
+
+def single_flight(key, compute, version=None, timeout=None):
+    """
+    Return (value, version it was computed for), computing it at most once at a time.
+
+    Entries are stored under a stable key together with the version they
+    were computed for (a content version or freshness token). When the
+    version has moved on, the entry has expired or is chosen for early
+    expiry, one request takes a lock and regenerates it while every
+    other request keeps getting the stale value. A missing entry is
+    computed by the lock holder while the others wait for it, up to
+    STAMPEDE_LOCK_TIMEOUT. compute() may return None for a value that
+    must not be cached.
+    """
+    timeout = settings.PAGE_CACHE_TIMEOUT if timeout is None else timeout
+    lock_key = REGENERATE_LOCK_KEY.format(key)
+
+    def regenerate():
+        started = time.time()
+        try:
+            value = compute()
+            if value is not None:
+                # Stale entries stay around to be served while the next regeneration runs
+                cache.set(key, _new_entry(value, version, started, timeout), timeout + settings.STAMPEDE_STALE_TIMEOUT)
+        finally:
+            cache.delete(lock_key)
+        return value, version
+
+    entry = cache.get(key)
+    if entry is not None:
+        if _is_current(entry, version):
+            return entry['value'], entry['version']
+        if cache.add(lock_key, 1, settings.STAMPEDE_LOCK_TIMEOUT):
+            return regenerate()
+        return entry['value'], entry['version']
+
+    deadline = time.monotonic() + settings.STAMPEDE_LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        if cache.add(lock_key, 1, settings.STAMPEDE_LOCK_TIMEOUT):
+            return regenerate()
+        time.sleep(REGENERATE_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry['value'], entry['version']
+    # The lock holder is stuck or gone; render without waiting any longer
+    return compute(), version
+
+
+async def asingle_flight(key, compute, version=None, timeout=None):
+    """
+    single_flight for async callers: compute is a coroutine function, and
+    requests waiting for another one's render sleep without holding a thread.
+    """
+    timeout = settings.PAGE_CACHE_TIMEOUT if timeout is None else timeout
+    lock_key = REGENERATE_LOCK_KEY.format(key)
+
+    async def regenerate():
+        started = time.time()
+        try:
+            value = await compute()
+            if value is not None:
+                await cache.aset(key, _new_entry(value, version, started, timeout), timeout + settings.STAMPEDE_STALE_TIMEOUT)
+        finally:
+            await cache.adelete(lock_key)
+        return value, version
+
+    entry = await cache.aget(key)
+    if entry is not None:
+        if _is_current(entry, version):
+            return entry['value'], entry['version']
+        if await cache.aadd(lock_key, 1, settings.STAMPEDE_LOCK_TIMEOUT):
+            return await regenerate()
+        return entry['value'], entry['version']
+
+    deadline = time.monotonic() + settings.STAMPEDE_LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        if await cache.aadd(lock_key, 1, settings.STAMPEDE_LOCK_TIMEOUT):
+            return await regenerate()
+        await asyncio.sleep(REGENERATE_POLL_INTERVAL)
+        entry = await cache.aget(key)
+        if entry is not None:
+            return entry['value'], entry['version']
+    return await compute(), version
+
+
+def note_stale_fragment(request):
+    """Record that the page being rendered for request includes a stale cached fragment"""
+    if request is not None:
+        request._stale_fragment = True
+
+
+def content_freshness(*sources):
+    """
+    Build a freshness function for conditional_page.
+
+    Each source is a (queryset, date_field) pair; date_field may be None for
+    models without a timestamp. The token combines the
+    request path and query string (so every page number gets its own entry),
+    one MAX/COUNT aggregate per source and the content versions of the
+    source models, so no queryset rows are ever fetched.
+    """
+    def freshness(request, *args, **kwargs):
+        models = [queryset.model for queryset, date_field in sources]
+        parts = [request.path, sorted(request.GET.lists())]
+        latest = []
+        for queryset, date_field in sources:
+            aggregates = {'total': Count('pk')}
+            if date_field:
+                aggregates['latest'] = Max(date_field)
+            state = queryset.aggregate(**aggregates)
+            parts.append((state['total'], state.get('latest')))
+            if state.get('latest'):
+                latest.append(int(state['latest'].timestamp()))
+        parts.append(sorted(get_content_versions(models).items()))
+
+        changed_at = get_content_changed_at(models)
+        if changed_at:
+            latest.append(changed_at)
+
+        token = hashlib.md5(repr(parts).encode()).hexdigest()
+        return token, max(latest, default=None)
+    return freshness
+
+
+def content_version_freshness(*models):
+    """
+    Build a freshness function for conditional_page from content versions alone.
+
+    Unlike content_freshness it runs no queries, for pages that only render
+    fragments cached on the same content versions, such as the homepage.
+    """
+    def freshness(request, *args, **kwargs):
+        parts = [request.path, sorted(request.GET.lists()), sorted(get_content_versions(models).items())]
+        token = hashlib.md5(repr(parts).encode()).hexdigest()
+        return token, get_content_changed_at(models)
+    return freshness
+
+
+def _page_cache_key(request):
+    return PAGE_CACHE_KEY.format(hashlib.md5(request.get_full_path().encode()).hexdigest())
+
+
+def _cacheable_page(response):
+    if response.status_code == 200 and not response.streaming and not response.cookies:
+        return response.content, response['Content-Type']
+    return None
+
+
+def _finish_page(request, rendered, cached, version, token, last_modified):
+    """The response for a page found in or put into the page cache"""
+    etag = quote_etag(token)
+    if rendered:
+        response = rendered[0]
+    else:
+        content, content_type = cached
+        response = HttpResponse(content, content_type=content_type)
+    if version != token:
+        # A stale copy: tag it with the token it was rendered for,
+        # so the browser does not keep it as the current page
+        etag, last_modified = quote_etag(version), None
+    elif rendered and getattr(request, '_stale_fragment', False):
+        # Rendered with a fragment another request is still regenerating:
+        # no validators, so it is fetched again rather than revalidated
+        etag, last_modified = None, None
+    return _tag_page(response, etag, last_modified)
+
+
+def _tag_page(response, etag, last_modified):
+    if etag:
+        response.headers.setdefault('ETag', etag)
+    if last_modified and not response.has_header('Last-Modified'):
+        response.headers['Last-Modified'] = http_date(last_modified)
+    # Let browsers keep the page but always revalidate it
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+def conditional_page(freshness, timeout=None):
+    """
+    Serve a public page through conditional GET and a full-page cache.
+
+    A matching If-None-Match/If-Modified-Since is answered with 304 before
+    the view runs; otherwise the rendered body is served from the cache,
+    and only rendered on a miss or once the freshness token changes.
+    Rendering goes through single_flight, so while one request renders the
+    page, concurrent requests get the previous copy, with its own ETag, or
+    wait for the first render. A render that used a stale {% stampede_cache %}
+    fragment is served but not cached.
+
+    Async views are supported: freshness, which may run queries, is called
+    in a worker thread and the render goes through asingle_flight. The
+    sync and async variants of a page share its cache entry.
+    """
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return await view_func(request, *args, **kwargs)
+
+                token, last_modified = await sync_to_async(freshness)(request, *args, **kwargs)
+                response = get_conditional_response(request, etag=quote_etag(token), last_modified=last_modified)
+                if response is not None:
+                    return _tag_page(response, quote_etag(token), last_modified)
+
+                rendered = []
+
+                async def render():
+                    response = await view_func(request, *args, **kwargs)
+                    rendered.append(response)
+                    if getattr(request, '_stale_fragment', False):
+                        return None
+                    return _cacheable_page(response)
+
+                cached, version = await asingle_flight(_page_cache_key(request), render, version=token, timeout=timeout)
+                return _finish_page(request, rendered, cached, version, token, last_modified)
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
+
+            token, last_modified = freshness(request, *args, **kwargs)
+            response = get_conditional_response(request, etag=quote_etag(token), last_modified=last_modified)
+            if response is not None:
+                return _tag_page(response, quote_etag(token), last_modified)
+
+            rendered = []
+
+            def render():
+                response = view_func(request, *args, **kwargs)
+                rendered.append(response)
+                if getattr(request, '_stale_fragment', False):
+                    # Storing it under the new token would serve the stale
+                    # fragment as current until the next content change
+                    return None
+                return _cacheable_page(response)
+
+            cached, version = single_flight(_page_cache_key(request), render, version=token, timeout=timeout)
+            return _finish_page(request, rendered, cached, version, token, last_modified)
+        return wrapper
+    return decorator
@@ -0,0 +1,114 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Exists, Max, OuterRef
+from django.utils import timezone
+
+from .api import API_RESOURCES
+from .models import ChangeLogEntry
+from .pagination import pack_cursor, unpack_cursor
+
+
+# Entries returned by one call of the change feed
+CHANGE_FEED_PAGE_SIZE = 200
+
+# API resource name of each model whose changes are logged
+RESOURCE_BY_MODEL = {resource.queryset.model: name for name, resource in API_RESOURCES.items()}
+
+
+def record_change(model, object_id, action, published=False):
+    """Append a change of one row to the change log"""
+    ChangeLogEntry.objects.create(
+        resource=RESOURCE_BY_MODEL[model], object_id=object_id, action=action, published=published,
+    )
+
+
+def encode_cursor(sequence, issued_at):
+    """
+    Opaque feed cursor: the last sequence number a client has seen, and the
+    time from which it is known to have seen every change. The time lets the
+    feed tell a client that slept through tombstone compaction to resync.
+    """
+    return pack_cursor({'s': sequence, 't': int(issued_at)})
+
+
+def decode_cursor(cursor):
+    """(sequence, issued_at) of a cursor, or None if it is not one"""
+    payload = unpack_cursor(cursor)
+    try:
+        return int(payload['s']), int(payload['t'])
+    except (ValueError, TypeError, KeyError):
+        return None
+
+
+def current_cursor():
+    """Cursor a client takes before its full download, to follow changes from then on"""
+    latest = ChangeLogEntry.objects.aggregate(latest=Max('id'))['latest']
+    return encode_cursor(latest or 0, time.time())
+
+
+def cursor_expired(issued_at):
+    """Whether tombstones a client with this cursor has not seen may have been compacted away"""
+    horizon = timezone.now() - timedelta(days=settings.CHANGE_LOG_RETENTION_DAYS)
+    return issued_at < horizon.timestamp()
+
+
+def changes_since(sequence, issued_at, limit=CHANGE_FEED_PAGE_SIZE):
+    """
+    Changes after a sequence number as (changes, next cursor, more).
+
+    Each changed row appears once, at its latest change. Created and updated
+    rows carry their current API fields; rows deleted, or no longer served
+    by their resource (e.g. unpublished), are sent as tombstones.
+    """
+    entries = list(
+        ChangeLogEntry.objects.filter(id__gt=sequence)
+        .order_by('id')
+        .values_list('id', 'resource', 'object_id', 'action')[:limit + 1]
+    )
+    more = len(entries) > limit
+    entries = entries[:limit]
+
+    latest = {}
+    for entry_id, resource, object_id, action in entries:
+        latest.pop((resource, object_id), None)
+        latest[(resource, object_id)] = (entry_id, action)
+
+    rows = {}
+    for name in {resource for resource, _ in latest}:
+        ids = [object_id for (resource, object_id), (_, action) in latest.items()
+               if resource == name and action != 'deleted']
+        if ids:
+            rows[name] = API_RESOURCES[name].rows_by_id(ids)
+
+    changes = []
+    for (resource, object_id), (entry_id, action) in latest.items():
+        data = rows.get(resource, {}).get(object_id)
+        change = {'seq': entry_id, 'resource': resource, 'id': object_id}
+        if data is None:
+            change['action'] = 'deleted'
+        else:
+            change.update(action=action, data=data)
+        changes.append(change)
+
+    # A client that has read to the end has seen everything up to now; one
+    # still paging through a backlog keeps the time of its original cursor
+    last_sequence = entries[-1][0] if entries else sequence
+    next_cursor = encode_cursor(last_sequence, issued_at if more else time.time())
+    return changes, next_cursor, more
+
+
+def compact():
+    """
+    Remove change log entries no client needs: those superseded by a later
+    change of the same row, and tombstones past CHANGE_LOG_RETENTION_DAYS.
+    Returns the number of entries removed.
+    """
+    later = ChangeLogEntry.objects.filter(
+        resource=OuterRef('resource'), object_id=OuterRef('object_id'), id__gt=OuterRef('id')
+    )
+    superseded, _ = ChangeLogEntry.objects.filter(Exists(later)).delete()
+    horizon = timezone.now() - timedelta(days=settings.CHANGE_LOG_RETENTION_DAYS)
+    expired, _ = ChangeLogEntry.objects.filter(action='deleted', changed_at__lt=horizon).delete()
+    return superseded + expired
@@ -0,0 +1,166 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import Max
+from django.urls import reverse
+
+from .api import API_RESOURCES
+from .changelog import CHANGE_FEED_PAGE_SIZE
+from .models import ChangeLogEntry
+
+
+# Change log resources pushed to connected clients, with their event names and detail pages
+STREAMED_RESOURCES = {
+    'notices': ('notice', 'base:notice_detail'),
+    'news': ('news', 'base:news_detail'),
+}
+
+# Queue entry telling a subscriber that fell behind to reconnect
+_OVERFLOW = None
+
+
+def _latest_sequence():
+    return ChangeLogEntry.objects.aggregate(latest=Max('id'))['latest'] or 0
+
+
+def published_events(sequence, limit=CHANGE_FEED_PAGE_SIZE):
+    """
+    Server-sent events for notices and news published after a change log
+    sequence number, as (events, last sequence read, more). Edits of rows
+    that were already published are not announced.
+    """
+    entries = list(
+        ChangeLogEntry.objects.filter(id__gt=sequence, published=True, resource__in=STREAMED_RESOURCES)
+        .order_by('id')
+        .values_list('id', 'resource', 'object_id')[:limit + 1]
+    )
+    more = len(entries) > limit
+    entries = entries[:limit]
+
+    rows = {}
+    for name in {resource for _, resource, _ in entries}:
+        ids = [object_id for _, resource, object_id in entries if resource == name]
+        rows[name] = API_RESOURCES[name].rows_by_id(ids)
+
+    events = []
+    for entry_id, resource, object_id in entries:
+        data = rows[resource].get(object_id)
+        if data is None:
+            # Unpublished or deleted again since
+            continue
+        event, url_name = STREAMED_RESOURCES[resource]
+        data = dict(data, url=reverse(url_name, args=[object_id]))
+        events.append((entry_id, event, json.dumps(data, ensure_ascii=False, separators=(',', ':'))))
+    last_sequence = entries[-1][0] if entries else sequence
+    return events, last_sequence, more
+
+
+def format_event(sequence, event, data):
+    return f'id: {sequence}\nevent: {event}\ndata: {data}\n\n'
+
+
+class Broadcaster:
+    """
+    Fans change log events out to the server-sent event streams of one worker process.
+
+    One task per process reads the change log, however many clients are
+    connected: right away when a model signal in this process calls
+    notify(), and every SSE_POLL_INTERVAL seconds for changes saved by
+    other processes. Each client has a bounded queue; a client too slow to
+    keep up is told to reconnect, and catches up from the change log with
+    its Last-Event-ID, instead of holding events in memory.
+    """
+
+    def __init__(self):
+        self.subscribers = set()
+        self.loop = None
+        self.wakeup = None
+        self.task = None
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=settings.SSE_QUEUE_SIZE)
+        self.subscribers.add(queue)
+        if self.task is None or self.task.done():
+            self.loop = asyncio.get_running_loop()
+            self.wakeup = asyncio.Event()
+            self.task = self.loop.create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+
+    def notify(self):
+        """Wake the reader task; safe to call from any thread"""
+        loop = self.loop
+        if loop is not None and not loop.is_closed() and self.subscribers:
+            loop.call_soon_threadsafe(self.wakeup.set)
+
+    def publish(self, message):
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Drop what the client has not read and ask it to reconnect
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(_OVERFLOW)
+                self.subscribers.discard(queue)
+
+    async def _run(self):
+        sequence = await sync_to_async(_latest_sequence)()
+        while self.subscribers:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), settings.SSE_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            more = True
+            while more:
+                try:
+                    events, sequence, more = await sync_to_async(published_events)(sequence)
+                except DatabaseError:
+                    # Locked or briefly unavailable: try again on the next wakeup
+                    break
+                for event_sequence, event, data in events:
+                    self.publish((event_sequence, format_event(event_sequence, event, data)))
+
+
+broadcaster = Broadcaster()
+
+
+async def event_stream(last_event_id=None):
+    """
+    Body of one SSE response: events missed since Last-Event-ID, then live
+    events, with a comment line as heartbeat when nothing happens.
+    """
+    if len(broadcaster.subscribers) >= settings.SSE_MAX_CLIENTS:
+        # Full: ask the browser to come back later rather than queue another client
+        yield f'retry: {settings.SSE_RETRY_MS * 10}\n\n'
+        return
+
+    queue = broadcaster.subscribe()
+    try:
+        yield f'retry: {settings.SSE_RETRY_MS}\n\n'
+        replayed = 0
+        if last_event_id is not None:
+            events, _, _ = await sync_to_async(published_events)(last_event_id)
+            for sequence, event, data in events:
+                replayed = sequence
+                yield format_event(sequence, event, data)
+
+        while True:
+            try:
+                message = await asyncio.wait_for(queue.get(), settings.SSE_HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                yield ': heartbeat\n\n'
+                continue
+            if message is _OVERFLOW:
+                return
+            sequence, text = message
+            if sequence > replayed:
+                yield text
+    finally:
+        broadcaster.unsubscribe(queue)
@@ -0,0 +1,270 @@
+import csv
+import os
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+from django.db.models import Count, Max
+
+from .models import AdmissionApplication, AcademicQualification
+
+
+# Rows fetched per query while exporting; each chunk prefetches its qualifications
+EXPORT_CHUNK_SIZE = 500
+
+# Exported columns: (heading, value getter)
+APPLICATION_COLUMNS = [
+    ('Application ID', lambda application: application.pk),
+    (AdmissionApplication._meta.get_field('full_name').verbose_name, lambda application: application.full_name),
+    (AdmissionApplication._meta.get_field('date_of_birth_ad').verbose_name, lambda application: application.date_of_birth_ad),
+    (AdmissionApplication._meta.get_field('date_of_birth_bs').verbose_name, lambda application: application.date_of_birth_bs),
+    ('Nationality', lambda application: application.get_nationality_display()),
+    ('Gender', lambda application: application.get_gender_display()),
+    (AdmissionApplication._meta.get_field('permanent_address').verbose_name, lambda application: application.permanent_address),
+    (AdmissionApplication._meta.get_field('temporary_address').verbose_name, lambda application: application.temporary_address),
+    (AdmissionApplication._meta.get_field('contact_number').verbose_name, lambda application: application.contact_number),
+    (AdmissionApplication._meta.get_field('email').verbose_name, lambda application: application.email),
+    ('Other Qualification', lambda application: application.other_qualification),
+    ('Result Status', lambda application: application.get_result_status_display()),
+    (AdmissionApplication._meta.get_field('guardian_name').verbose_name, lambda application: application.guardian_name),
+    (AdmissionApplication._meta.get_field('guardian_contact').verbose_name, lambda application: application.guardian_contact),
+    ('Submitted At', lambda application: application.submitted_at.strftime('%Y-%m-%d %H:%M')),
+    ('Processed', lambda application: 'Yes' if application.is_processed else 'No'),
+]
+
+# Qualification fields, repeated once per qualification of the busiest application
+QUALIFICATION_FIELDS = ['institution_name', 'program', 'symbol_number', 'passed_year', 'percentage_cgpa', 'major_subjects']
+
+# Leading characters that make a spreadsheet read a cell as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def neutralize_formula(value):
+    """
+    Prefix text that a spreadsheet would evaluate as a formula with an
+    apostrophe, so applicant input such as =HYPERLINK(...) is shown as typed.
+    """
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return f"'{value}"
+    return value
+
+
+def _qualification_slots(queryset):
+    # COUNT(DISTINCT) since the admin changelist queryset already joins documents
+    counts = queryset.annotate(qualification_total=Count('academic_qualifications', distinct=True))
+    return counts.aggregate(slots=Max('qualification_total'))['slots'] or 0
+
+
+def export_headings(slots):
+    headings = [heading for heading, _ in APPLICATION_COLUMNS]
+    for number in range(1, slots + 1):
+        for field_name in QUALIFICATION_FIELDS:
+            verbose_name = AcademicQualification._meta.get_field(field_name).verbose_name
+            headings.append(f'Qualification {number} {verbose_name}')
+    return headings
+
+
+def export_rows(queryset):
+    """
+    Yield the heading row, then one flat row per application with its
+    academic qualifications side by side.
+
+    Applications are read with iterator(), so only EXPORT_CHUNK_SIZE of them
+    (and their prefetched qualifications) are in memory at a time. Values
+    go through neutralize_formula(), for both CSV and XLSX.
+    """
+    slots = _qualification_slots(queryset)
+    yield export_headings(slots)
+
+    applications = queryset.prefetch_related('academic_qualifications').iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    for application in applications:
+        row = [getter(application) for _, getter in APPLICATION_COLUMNS]
+        for qualification in application.academic_qualifications.all():
+            row.extend(getattr(qualification, field_name) for field_name in QUALIFICATION_FIELDS)
+        row.extend([''] * (len(APPLICATION_COLUMNS) + slots * len(QUALIFICATION_FIELDS) - len(row)))
+        yield ['' if value is None else neutralize_formula(value) for value in row]
+
+
+class _Echo:
+    """Pseudo file whose write() returns the data, for streaming csv.writer output"""
+
+    def write(self, value):
+        return value
+
+
+def csv_stream(queryset):
+    """Yield the export as CSV, one encoded line at a time"""
+    writer = csv.writer(_Echo())
+    # BOM so Excel opens the Nepali text as UTF-8
+    yield '\ufeff'.encode()
+    for row in export_rows(queryset):
+        yield writer.writerow(row).encode()
+
+
+class StreamBuffer:
+    """Write-only file that collects what zipfile writes until the caller drains it"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+_XLSX_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Applications" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+# Characters XML 1.0 does not allow, even escaped
+_INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _xlsx_row(row):
+    cells = ''.join(
+        f'<c t="inlineStr"><is><t xml:space="preserve">{escape(_INVALID_XML_CHARS.sub("", str(value)))}</t></is></c>'
+        for value in row
+    )
+    return f'<row>{cells}</row>'.encode()
+
+
+def xlsx_stream(queryset):
+    """
+    Yield the export as an XLSX workbook.
+
+    The worksheet is written with inline strings straight into a zip entry,
+    and the compressed bytes are handed out as they are produced, so neither
+    the rows nor the workbook are ever held in memory as a whole.
+    """
+    buffer = StreamBuffer()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as workbook:
+        for name, content in _XLSX_PARTS.items():
+            workbook.writestr(name, content)
+        with workbook.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            for row in export_rows(queryset):
+                sheet.write(_xlsx_row(row))
+                data = buffer.drain()
+                if data:
+                    yield data
+            sheet.write(b'</sheetData></worksheet>')
+    yield buffer.drain()
+
+
+# Bytes read from storage per write into a document bundle
+BUNDLE_READ_SIZE = 64 * 2 ** 10
+
+
+# Characters that are not safe in file names inside the archive
+_UNSAFE_NAME_CHARS = re.compile(r'[\\/:*?"<>|\x00-\x1f]+')
+
+
+def _safe_name(value, default):
+    # slugify() would drop Devanagari vowel signs, so only strip unsafe characters
+    name = '-'.join(_UNSAFE_NAME_CHARS.sub('', value or '').split())
+    return name.strip('.') or default
+
+
+def _bundle_folder(application):
+    return f"{application.pk:05d}-{_safe_name(application.full_name, 'applicant')}"
+
+
+def _bundle_entries(application):
+    """(archive name, field file, timestamp) for the photo and documents of one application"""
+    folder = _bundle_folder(application)
+    used = set()
+    entries = []
+    files = [('profile-photo', application.profile_photo, application.submitted_at)]
+    files += [
+        (_safe_name(document.document_name, 'document'), document.document_file, document.uploaded_at)
+        for document in application.documents.all()
+    ]
+    for label, field_file, timestamp in files:
+        if not field_file:
+            continue
+        extension = os.path.splitext(field_file.name)[1].lower()
+        name, number = f'{label}{extension}', 1
+        while name in used:
+            number += 1
+            name = f'{label}-{number}{extension}'
+        used.add(name)
+        entries.append((f'{folder}/{name}', field_file, timestamp))
+    return entries
+
+
+def documents_zip_stream(queryset):
+    """
+    Yield a ZIP of the profile photo and documents of every application, one
+    folder per applicant.
+
+    Entries are stored uncompressed (scans and PDFs are already compressed)
+    and copied from storage BUNDLE_READ_SIZE bytes at a time; the archive
+    bytes are handed out as soon as they are written, so the download starts
+    immediately and memory use does not depend on the size of the cohort.
+    Files missing from storage are listed in a missing-files.txt per folder.
+    """
+    buffer = StreamBuffer()
+    applications = queryset.prefetch_related('documents').iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for application in applications:
+            missing = []
+            for arcname, field_file, timestamp in _bundle_entries(application):
+                try:
+                    source = field_file.storage.open(field_file.name, 'rb')
+                except FileNotFoundError:
+                    missing.append(field_file.name)
+                    continue
+                entry = zipfile.ZipInfo(arcname, date_time=timestamp.timetuple()[:6])
+                with source, archive.open(entry, 'w', force_zip64=True) as target:
+                    while chunk := source.read(BUNDLE_READ_SIZE):
+                        target.write(chunk)
+                        yield buffer.drain()
+            if missing:
+                archive.writestr(f'{_bundle_folder(application)}/missing-files.txt', '\n'.join(missing) + '\n')
+            yield buffer.drain()
+    yield buffer.drain()
+
+
+# Export formats: name -> (stream function, content type)
+EXPORT_FORMATS = {
+    'csv': (csv_stream, 'text/csv; charset=utf-8'),
+    'xlsx': (xlsx_stream, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
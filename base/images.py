@@ -0,0 +1,128 @@
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from .models import (
+    Gallery, SplashImage, FacultyMember, Alumni, StudentTestimonial,
+    Course, News, Facility, ImageRendition
+)
+
+
+# Public image fields that get responsive renditions: model -> field names
+RESPONSIVE_IMAGE_FIELDS = {
+    Gallery: ['image'],
+    SplashImage: ['image'],
+    FacultyMember: ['image'],
+    Alumni: ['photo'],
+    StudentTestimonial: ['photo'],
+    Course: ['image'],
+    News: ['image'],
+    Facility: ['image'],
+}
+
+# Cache key prefix for the renditions of one source image
+RENDITIONS_CACHE_KEY = 'renditions:{}'
+
+# EXIF tag holding the camera orientation
+ORIENTATION_TAG = 0x0112
+
+# Pillow save options per output format
+_SAVE_OPTIONS = {
+    'webp': {'format': 'WEBP', 'method': 4},
+    'jpeg': {'format': 'JPEG', 'optimize': True, 'progressive': True},
+}
+
+
+def _target_widths(original_width):
+    """Configured widths below the original, plus the original capped at the largest step"""
+    steps = sorted(settings.IMAGE_RENDITION_WIDTHS)
+    widths = [width for width in steps if width < original_width]
+    widths.append(min(original_width, steps[-1]))
+    return sorted(set(widths))
+
+
+def _render(image, width, image_format):
+    height = max(1, round(image.height * width / image.width))
+    resized = image.resize((width, height), Image.LANCZOS)
+    buffer = BytesIO()
+    resized.save(buffer, quality=settings.IMAGE_RENDITION_QUALITY, **_SAVE_OPTIONS[image_format])
+    return height, buffer.getvalue()
+
+
+def _upright_width(image):
+    """Width after EXIF rotation, read from the header without decoding the pixels"""
+    # Orientations 5-8 rotate the image by 90 or 270 degrees
+    if image.getexif().get(ORIENTATION_TAG, 1) in (5, 6, 7, 8):
+        return image.height
+    return image.width
+
+
+def generate_renditions(field_file):
+    """
+    Create WebP and JPEG renditions for an uploaded image at every configured width.
+
+    Existing renditions for the same source are kept, and when every one
+    already exists only the image header is read, so calling this again
+    for an unchanged image does no work. Returns the number of new renditions.
+    """
+    if not field_file:
+        return 0
+    source = field_file.name
+    existing = set(ImageRendition.objects.filter(source=source).values_list('format', 'width'))
+
+    try:
+        with field_file.open('rb') as original:
+            # Image.open only parses the header; pixels are decoded on first use
+            image = Image.open(original)
+            missing = [
+                (width, image_format)
+                for width in _target_widths(_upright_width(image))
+                for image_format in ('webp', 'jpeg')
+                if (image_format, width) not in existing
+            ]
+            if not missing:
+                return 0
+            image = ImageOps.exif_transpose(image)
+            image = image.convert('RGB')
+    except (OSError, ValueError):
+        # Missing or unreadable source file
+        return 0
+
+    stem = os.path.splitext(os.path.basename(source))[0]
+    for width, image_format in missing:
+        height, content = _render(image, width, image_format)
+        extension = 'jpg' if image_format == 'jpeg' else image_format
+        rendition = ImageRendition(source=source, format=image_format, width=width, height=height)
+        rendition.file.save(f"{stem}_{width}w.{extension}", ContentFile(content), save=False)
+        rendition.save()
+
+    cache.delete(RENDITIONS_CACHE_KEY.format(source))
+    return len(missing)
+
+
+def delete_renditions(source):
+    """Remove the renditions (rows and files) of a source image"""
+    for rendition in ImageRendition.objects.filter(source=source):
+        rendition.file.delete(save=False)
+        rendition.delete()
+    cache.delete(RENDITIONS_CACHE_KEY.format(source))
+
+
+def get_renditions(source):
+    """
+    Return {'webp': [...], 'jpeg': [...]} of (url, width, height) tuples for a
+    source image, narrowest first. Lookups are cached since renditions of a
+    stored file never change.
+    """
+    key = RENDITIONS_CACHE_KEY.format(source)
+    renditions = cache.get(key)
+    if renditions is None:
+        renditions = {'webp': [], 'jpeg': []}
+        for rendition in ImageRendition.objects.filter(source=source).order_by('format', 'width'):
+            renditions[rendition.format].append((rendition.file.url, rendition.width, rendition.height))
+        cache.set(key, renditions, None)
+    return renditions
@@ -0,0 +1,103 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+
+def queue_email(subject, message, recipient_list, from_email=None):
+    """Add an email to the outbox; the send_queued_email worker delivers it"""
+    return OutboundEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+        recipients=', '.join(recipient_list),
+    )
+
+
+def _retry_delay(attempts):
+    # Exponential backoff: base delay, doubled for every failed attempt
+    return timedelta(seconds=settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def claim_batch(batch_size):
+    """
+    Mark up to batch_size due messages as 'sending' and return them.
+
+    The status guard on the UPDATE makes claiming safe with several workers:
+    a row already claimed by another worker is simply not updated. Messages
+    left in 'sending' by a crashed worker are reclaimed after EMAIL_OUTBOX_LOCK_TIMEOUT.
+    """
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.EMAIL_OUTBOX_LOCK_TIMEOUT)
+    OutboundEmail.objects.filter(status='sending', locked_at__lt=stale).update(status='pending')
+
+    due_ids = list(
+        OutboundEmail.objects.filter(status='pending', next_attempt_at__lte=now)
+        .order_by('next_attempt_at', 'id')
+        .values_list('id', flat=True)[:batch_size]
+    )
+    OutboundEmail.objects.filter(id__in=due_ids, status='pending').update(status='sending', locked_at=now)
+    return list(OutboundEmail.objects.filter(id__in=due_ids, status='sending', locked_at=now).order_by('id'))
+
+
+def send_batch(batch_size=None):
+    """
+    Deliver one batch of due messages over a single SMTP connection.
+
+    Failed messages are rescheduled with exponential backoff and moved to
+    'dead' after EMAIL_OUTBOX_MAX_ATTEMPTS. Returns (sent, failed) counts.
+    """
+    batch = claim_batch(batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE)
+    if not batch:
+        return 0, 0
+
+    sent = failed = 0
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        # Server unreachable: every message in the batch counts as an attempt
+        for email in batch:
+            _record_failure(email, e)
+        return 0, len(batch)
+
+    try:
+        for email in batch:
+            message = EmailMessage(
+                subject=email.subject,
+                body=email.body,
+                from_email=email.from_email,
+                to=email.recipient_list,
+                connection=connection,
+            )
+            try:
+                message.send()
+            except Exception as e:
+                _record_failure(email, e)
+                failed += 1
+            else:
+                email.status = 'sent'
+                email.attempts += 1
+                email.sent_at = timezone.now()
+                email.locked_at = None
+                email.last_error = ''
+                email.save(update_fields=['status', 'attempts', 'sent_at', 'locked_at', 'last_error'])
+                sent += 1
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def _record_failure(email, error):
+    email.attempts += 1
+    email.last_error = f"{type(error).__name__}: {error}"
+    email.locked_at = None
+    if email.attempts >= settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+        email.status = 'dead'
+    else:
+        email.status = 'pending'
+        email.next_attempt_at = timezone.now() + _retry_delay(email.attempts)
+    email.save(update_fields=['attempts', 'last_error', 'locked_at', 'status', 'next_attempt_at'])
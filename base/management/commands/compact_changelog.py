@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from base.changelog import compact
+
+
+class Command(BaseCommand):
+    help = 'Remove superseded change log entries and tombstones past CHANGE_LOG_RETENTION_DAYS'
+
+    def handle(self, *args, **options):
+        removed = compact()
+        self.stdout.write(self.style.SUCCESS(f'Removed {removed} change log entries.'))
@@ -0,0 +1,33 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from base.exports import EXPORT_FORMATS
+from base.models import AdmissionApplication
+
+
+class Command(BaseCommand):
+    help = 'Export admission applications with their academic qualifications as CSV or XLSX'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(EXPORT_FORMATS), default='csv', help='Export format (default: csv)')
+        parser.add_argument('--output', help='File to write to (default: standard output, CSV only)')
+        parser.add_argument('--unprocessed', action='store_true', help='Only export applications not yet marked as processed')
+
+    def handle(self, *args, **options):
+        stream, _ = EXPORT_FORMATS[options['format']]
+        if not options['output'] and options['format'] != 'csv':
+            raise CommandError('--output is required for XLSX exports.')
+
+        applications = AdmissionApplication.objects.all()
+        if options['unprocessed']:
+            applications = applications.filter(is_processed=False)
+
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                for chunk in stream(applications):
+                    output.write(chunk)
+            self.stdout.write(self.style.SUCCESS(f'Exported applications to {options["output"]}.'))
+        else:
+            for chunk in stream(applications):
+                sys.stdout.buffer.write(chunk)
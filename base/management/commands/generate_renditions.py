@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from base.images import RESPONSIVE_IMAGE_FIELDS, generate_renditions
+
+
+class Command(BaseCommand):
+    help = 'Generate missing WebP/JPEG renditions for every public image already uploaded'
+
+    def handle(self, *args, **options):
+        total = 0
+        for model, field_names in RESPONSIVE_IMAGE_FIELDS.items():
+            for obj in model.objects.iterator():
+                for field_name in field_names:
+                    total += generate_renditions(getattr(obj, field_name))
+        self.stdout.write(self.style.SUCCESS(f'Generated {total} renditions.'))
@@ -0,0 +1,89 @@
+import time
+
+from django.apps import apps
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from base.caching import bump_content_version, get_content_versions
+from base.querycache import bump_table_version, get_table_versions, is_cached_model
+from base.routers import REPLICA_ALIAS, mark_replica_refreshed
+from base.signals import CONTENT_MODELS
+
+
+# Cache key of the content and table versions the replica was last refreshed at
+REPLICA_VERSIONS_KEY = 'replica-versions'
+
+
+class Command(BaseCommand):
+    help = 'Copy the default SQLite database into the read replica with the online backup API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=-1, help='Pages copied per backup step (default: all at once)')
+        parser.add_argument('--sleep', type=float, default=0.0, help='Seconds to pause between backup steps')
+        parser.add_argument('--loop', action='store_true', help='Keep refreshing instead of exiting after one copy')
+        parser.add_argument(
+            '--interval', type=float, default=60.0,
+            help='Seconds between refreshes with --loop; keep it below DATABASE_REPLICA_MAX_AGE',
+        )
+
+    def handle(self, *args, **options):
+        if REPLICA_ALIAS not in connections.settings:
+            raise CommandError(f'No "{REPLICA_ALIAS}" database is configured.')
+        source, replica = connections['default'], connections[REPLICA_ALIAS]
+        if source.vendor != 'sqlite' or replica.vendor != 'sqlite':
+            raise CommandError('refresh_replica only copies SQLite databases.')
+
+        while True:
+            self.refresh(source, replica, options)
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def refresh(self, source, replica, options):
+        # Every ORM write bumps its model's versions, so versions unchanged
+        # since the last refresh mean the copy brings nothing new to pages
+        # or query results; taken before the copy, so writes made during it
+        # show up as changes next time
+        tables = [model._meta.db_table for model in apps.get_models() if is_cached_model(model)]
+        before = {
+            'content': get_content_versions(CONTENT_MODELS),
+            'tables': get_table_versions(tables),
+        }
+        source.ensure_connection()
+        replica.ensure_connection()
+        started = time.perf_counter()
+        # The backup replaces the replica's pages in place; readers holding a
+        # WAL snapshot keep reading it and see the new copy on their next read
+        source.connection.backup(replica.connection, pages=options['pages'], sleep=options['sleep'])
+        elapsed = time.perf_counter() - started
+
+        # Pages cached while the replica lagged were keyed on the new content
+        # versions; bump them so they are rendered again from the fresh copy
+        refreshed = cache.get(REPLICA_VERSIONS_KEY) or {'content': {}, 'tables': {}}
+        bumped = 0
+        for model in CONTENT_MODELS:
+            name = model._meta.model_name
+            bumped += self.bump(before['content'], refreshed['content'], name, lambda: bump_content_version(model))
+        # Likewise query results read from the replica before the refresh
+        for table in tables:
+            bumped += self.bump(before['tables'], refreshed['tables'], table, lambda: bump_table_version(table))
+        cache.set(REPLICA_VERSIONS_KEY, before, timeout=None)
+        # Readers fall back to 'default' once this is older than DATABASE_REPLICA_MAX_AGE
+        mark_replica_refreshed()
+        self.stdout.write(self.style.SUCCESS(f'Replica refreshed in {elapsed:.2f}s, {bumped} versions bumped.'))
+
+    @staticmethod
+    def bump(before, refreshed, name, bump):
+        """
+        Bump one version if it moved since the last refresh, recording in
+        `before` the version the next refresh compares against. Returns 1
+        if it was bumped.
+        """
+        if refreshed.get(name) == before[name]:
+            return 0
+        version = bump()
+        # Another write landed after `before` was read and the copy may have
+        # missed it: leave the old number, so the next refresh bumps again
+        before[name] = version if version == before[name] + 1 else None
+        return 1
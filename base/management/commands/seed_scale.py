@@ -0,0 +1,258 @@
+import multiprocessing
+import os
+import random
+from datetime import timedelta
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from base.caching import bump_content_version
+from base.models import (
+    College, Course, Syllabus, FacultyMember, HeadOfCampus,
+    News, Notice, AdmissionApplication, AcademicQualification, AdmissionDocument,
+    Facility, Calendar, Resource, Gallery, Alumni, SplashImage, StudentTestimonial, Contact
+)
+from base.search import rebuild_index
+from base.seeding import (
+    DESIGNATIONS, DOCUMENT_NAMES, INSTITUTIONS, PLACES, PROGRAMS,
+    bs_date, explicit_timestamps, headline, make_placeholder, nepali_name, paragraph
+)
+from base.signals import CONTENT_MODELS
+
+
+# Programmes offered by the campus: (level, code, name)
+PROGRAMMES = [
+    ('B', 'BBS', 'Bachelor of Business Studies'), ('B', 'BED', 'Bachelor of Education'),
+    ('B', 'BA', 'Bachelor of Arts'), ('B', 'BBA', 'Bachelor of Business Administration'),
+    ('M', 'MBS', 'Master of Business Studies'), ('M', 'MED', 'Master of Education'),
+    ('M', 'MA', 'Master of Arts'),
+]
+
+
+class Command(BaseCommand):
+    help = 'Fill every model with large volumes of plausible data for scale testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--news', type=int, default=5000)
+        parser.add_argument('--notices', type=int, default=5000)
+        parser.add_argument('--gallery', type=int, default=2000)
+        parser.add_argument('--faculty', type=int, default=300)
+        parser.add_argument('--alumni', type=int, default=1000)
+        parser.add_argument('--courses', type=int, default=20)
+        parser.add_argument('--applications', type=int, default=20000)
+        parser.add_argument('--testimonials', type=int, default=200)
+        parser.add_argument('--resources', type=int, default=500)
+        parser.add_argument('--calendars', type=int, default=20)
+        parser.add_argument('--facilities', type=int, default=15)
+        parser.add_argument('--contacts', type=int, default=5000)
+        parser.add_argument('--images', type=int, default=40, help='Distinct placeholder images to generate')
+        parser.add_argument('--pdfs', type=int, default=20, help='Distinct placeholder PDFs to generate')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows per bulk_create')
+        parser.add_argument('--processes', type=int, default=os.cpu_count(), help='Worker processes for file generation')
+        parser.add_argument('--seed', type=int, default=None, help='Random seed for repeatable data')
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+
+        self.images, self.pdfs = self.generate_files(options['images'], options['pdfs'], options['processes'])
+
+        if not College.objects.exists():
+            College.objects.create(name='Bhanubhakta Multiple Campus', address='Damauli, Tanahun')
+        self.seed_courses(options['courses'])
+        self.seed_faculty(options['faculty'])
+        self.insert(News, self.news_rows(options['news']), options['news'])
+        self.insert(Notice, self.notice_rows(options['notices']), options['notices'])
+        with explicit_timestamps(Gallery, 'uploaded_at'):
+            self.insert(Gallery, self.gallery_rows(options['gallery']), options['gallery'])
+        self.insert(Alumni, self.alumni_rows(options['alumni']), options['alumni'])
+        with explicit_timestamps(StudentTestimonial, 'created_at'):
+            self.insert(StudentTestimonial, self.testimonial_rows(options['testimonials']), options['testimonials'])
+        with explicit_timestamps(Resource, 'uploaded_at'):
+            self.insert(Resource, self.resource_rows(options['resources']), options['resources'])
+        with explicit_timestamps(Calendar, 'uploaded_at'):
+            self.insert(Calendar, self.calendar_rows(options['calendars']), options['calendars'])
+        self.insert(Facility, self.facility_rows(options['facilities']), options['facilities'])
+        if not SplashImage.objects.exists():
+            self.insert(SplashImage, self.splash_rows(3), 3)
+        with explicit_timestamps(Contact, 'submitted_at'):
+            self.insert(Contact, self.contact_rows(options['contacts']), options['contacts'])
+        with explicit_timestamps(AdmissionApplication, 'submitted_at'), explicit_timestamps(AdmissionDocument, 'uploaded_at'):
+            self.seed_applications(options['applications'])
+
+        # bulk_create sends no signals: refresh what the signal handlers maintain
+        indexed = rebuild_index()
+        for model in CONTENT_MODELS:
+            bump_content_version(model)
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeding complete, {indexed} documents indexed. '
+            'Run generate_renditions to create responsive images for the placeholders.'
+        ))
+
+    def generate_files(self, image_count, pdf_count, processes):
+        tasks = [('image', index) for index in range(image_count)] + [('pdf', index) for index in range(pdf_count)]
+        with multiprocessing.Pool(processes) as pool:
+            names = pool.map(make_placeholder, tasks)
+        self.stdout.write(f'Generated {image_count} placeholder images and {pdf_count} PDFs.')
+        return names[:image_count], names[image_count:]
+
+    def insert(self, model, rows, total):
+        """bulk_create rows in batches, one transaction per batch"""
+        inserted = 0
+        while batch := list(islice(rows, self.batch_size)):
+            with transaction.atomic():
+                model.objects.bulk_create(batch)
+            inserted += len(batch)
+        self.stdout.write(f'{model._meta.verbose_name_plural.title()}: {inserted} of {total} rows.')
+
+    def image(self):
+        return self.rng.choice(self.images)
+
+    def pdf(self):
+        return self.rng.choice(self.pdfs)
+
+    def moment(self, days):
+        """A random timestamp within the last `days` days"""
+        return self.now - timedelta(seconds=self.rng.randint(0, days * 86400))
+
+    def seed_courses(self, count):
+        start = Course.objects.count()
+        courses = []
+        for number in range(start, start + count):
+            level, code, name = PROGRAMMES[number % len(PROGRAMMES)]
+            courses.append(Course(
+                level=level, name=f'{name} ({number // len(PROGRAMMES) + 1})', course_code=f'{code}-{number:04d}',
+                description=paragraph(self.rng), image=self.image(),
+            ))
+        with transaction.atomic():
+            courses = Course.objects.bulk_create(courses)
+            Syllabus.objects.bulk_create([Syllabus(course=course, file=self.pdf()) for course in courses])
+        self.stdout.write(f'Courses: {len(courses)} rows, with syllabuses.')
+
+    def seed_faculty(self, count):
+        faculty = []
+        for _ in range(count):
+            name = nepali_name(self.rng)
+            faculty.append(FacultyMember(
+                full_name=name, designation=self.rng.choice(DESIGNATIONS), image=self.image(),
+                bio=paragraph(self.rng, 40), contact_email=f"{name.lower().replace(' ', '.').replace('..', '.')}@bmc.edu.np",
+                phone_number=f'98{self.rng.randint(10000000, 69999999)}',
+            ))
+        with transaction.atomic():
+            faculty = FacultyMember.objects.bulk_create(faculty, batch_size=self.batch_size)
+            if faculty and not HeadOfCampus.objects.exists():
+                HeadOfCampus.objects.create(head=faculty[0], position='Campus Chief', message=paragraph(self.rng, 80))
+        self.stdout.write(f'Faculty members: {len(faculty)} rows.')
+
+    def news_rows(self, count):
+        for _ in range(count):
+            yield News(
+                title=headline(self.rng, self.rng.randint(2075, 2082)), content=paragraph(self.rng, 300),
+                published_date=self.moment(3650), image=self.image(), is_published=self.rng.random() < 0.9,
+            )
+
+    def notice_rows(self, count):
+        for _ in range(count):
+            yield Notice(
+                title=headline(self.rng, self.rng.randint(2075, 2082)), content=paragraph(self.rng, 120),
+                published_date=self.moment(3650), is_published=self.rng.random() < 0.9,
+                file=self.pdf() if self.rng.random() < 0.5 else None,
+            )
+
+    def gallery_rows(self, count):
+        for number in range(count):
+            yield Gallery(title=f'Campus event {number + 1}', image=self.image(), uploaded_at=self.moment(3650))
+
+    def alumni_rows(self, count):
+        for _ in range(count):
+            first_year = self.rng.randint(2000, 2022)
+            yield Alumni(
+                full_name=nepali_name(self.rng), batch_year=f'{first_year}-{first_year + 4}',
+                present_post=self.rng.choice(['Teacher', 'Bank Officer', 'Entrepreneur', 'Section Officer', 'Accountant']),
+                photo=self.image(), message=paragraph(self.rng, 30),
+            )
+
+    def testimonial_rows(self, count):
+        for _ in range(count):
+            yield StudentTestimonial(
+                student_name=nepali_name(self.rng), designation=f"{self.rng.choice(['BBS', 'BEd', 'BA'])}, {self.rng.randint(2070, 2081)}",
+                message=paragraph(self.rng, 50), photo=self.image(), is_published=self.rng.random() < 0.8,
+                created_at=self.moment(1825),
+            )
+
+    def resource_rows(self, count):
+        for number in range(count):
+            yield Resource(
+                title=f'Study material {number + 1}', file=self.pdf(), description=paragraph(self.rng, 20),
+                uploaded_at=self.moment(1825),
+            )
+
+    def calendar_rows(self, count):
+        for number in range(count):
+            year = 2082 - number
+            yield Calendar(
+                title=f'Academic calendar {year}', academic_year=str(year), file=self.pdf(),
+                uploaded_at=self.now - timedelta(days=365 * number),
+            )
+
+    def facility_rows(self, count):
+        for number in range(count):
+            yield Facility(name=f'Facility {number + 1}', description=paragraph(self.rng, 40), image=self.image())
+
+    def splash_rows(self, count):
+        for number in range(count):
+            yield SplashImage(title=f'Welcome {number + 1}', image=self.image(), order=number)
+
+    def contact_rows(self, count):
+        for _ in range(count):
+            name = nepali_name(self.rng)
+            yield Contact(
+                name=name, email=f"{name.split()[0].lower()}{self.rng.randint(1, 999)}@example.com",
+                phone=f'98{self.rng.randint(10000000, 69999999)}', subject='Admission enquiry',
+                message=paragraph(self.rng, 40), submitted_at=self.moment(730), is_replied=self.rng.random() < 0.6,
+            )
+
+    def seed_applications(self, count):
+        """Applications with two or three qualifications and two to four documents each"""
+        inserted = 0
+        while inserted < count:
+            applications = []
+            for _ in range(min(self.batch_size, count - inserted)):
+                name = nepali_name(self.rng)
+                dob_bs, dob_ad = bs_date(self.rng, 2055, 2063)
+                place = self.rng.choice(PLACES)
+                applications.append(AdmissionApplication(
+                    profile_photo=self.image(), full_name=name.upper(), date_of_birth_ad=dob_ad, date_of_birth_bs=dob_bs,
+                    nationality='nepali', gender=self.rng.choice(['male', 'female']),
+                    permanent_address=place, temporary_address=self.rng.choice([place, 'Damauli, Tanahun']),
+                    contact_number=f'98{self.rng.randint(10000000, 69999999)}',
+                    email=f"{name.split()[0].lower()}{self.rng.randint(1, 9999)}@example.com",
+                    result_status=self.rng.choice(['passed', 'passed', 'awaited']),
+                    guardian_name=nepali_name(self.rng), guardian_contact=f'98{self.rng.randint(10000000, 69999999)}',
+                    submitted_at=self.moment(1095), is_processed=self.rng.random() < 0.7,
+                ))
+
+            with transaction.atomic():
+                applications = AdmissionApplication.objects.bulk_create(applications)
+                qualifications, documents = [], []
+                for application in applications:
+                    for program, subjects in PROGRAMS[:self.rng.randint(2, 3)]:
+                        qualifications.append(AcademicQualification(
+                            application=application, institution_name=self.rng.choice(INSTITUTIONS), program=program,
+                            symbol_number=str(self.rng.randint(10000000, 99999999)),
+                            passed_year=str(self.rng.randint(2074, 2081)),
+                            percentage_cgpa=f'{self.rng.uniform(2.0, 4.0):.2f}', major_subjects=subjects,
+                        ))
+                    for document_name in self.rng.sample(DOCUMENT_NAMES, self.rng.randint(2, 4)):
+                        documents.append(AdmissionDocument(
+                            application=application, document_name=document_name,
+                            document_file=self.pdf() if self.rng.random() < 0.6 else self.image(),
+                            uploaded_at=application.submitted_at,
+                        ))
+                AcademicQualification.objects.bulk_create(qualifications)
+                AdmissionDocument.objects.bulk_create(documents)
+            inserted += len(applications)
+        self.stdout.write(f'Admission applications: {inserted} of {count} rows, with qualifications and documents.')
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from base.mail import send_batch
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued outbox email in batches over one SMTP connection per batch'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Messages per batch (default: EMAIL_OUTBOX_BATCH_SIZE)')
+        parser.add_argument('--loop', action='store_true', help='Keep polling the outbox instead of exiting when it is empty')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds to sleep between polls when the outbox is empty')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = send_batch(options['batch_size'])
+            if sent or failed:
+                self.stdout.write(f'Sent {sent}, failed {failed}.')
+                continue
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,171 @@
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .routers import (
+    read_from_replica, replica_available, stop_reading_from_replica, stop_tracking_request, track_request,
+)
+from .timing import current_timings, start_request, stop_request
+
+logger = logging.getLogger('base.timing')
+
+
+# Cookie marking a client that wrote recently and must read its own writes
+REPLICA_PIN_COOKIE = 'pin_primary'
+
+
+class ReplicaMiddleware:
+    """
+    Serve public GET and HEAD requests from the read replica.
+
+    A client whose request wrote to the database (the router reports every
+    write) is pinned to 'default' for DATABASE_REPLICA_PIN_SECONDS with a
+    cookie, so it sees its own writes until the replica has been refreshed;
+    a POST that only re-renders an invalid form does not pin. The admin
+    always uses 'default', and so does everyone once the replica is older
+    than DATABASE_REPLICA_MAX_AGE.
+
+    A request whose view reported a row missing from the replica (see
+    routers.note_replica_miss) runs again on 'default', so a notice
+    published since the last refresh is not missing from its own detail
+    page; other 404s, such as unknown URLs, are not retried.
+
+    Works in both sync and async chains, so async views under ASGI are not
+    pushed onto a thread by this middleware.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        record, token = track_request()
+        try:
+            response = self.respond(request, record)
+        finally:
+            stop_tracking_request(token)
+        return self.pin_to_primary(response) if record['wrote'] else response
+
+    async def __acall__(self, request):
+        record, token = track_request()
+        try:
+            response = await self.arespond(request, record)
+        finally:
+            stop_tracking_request(token)
+        return self.pin_to_primary(response) if record['wrote'] else response
+
+    def respond(self, request, record):
+        if not self.may_read_replica(request):
+            return self.get_response(request)
+
+        token = read_from_replica()
+        try:
+            response = self.get_response(request)
+        finally:
+            stop_reading_from_replica(token)
+        if record['missed']:
+            response = self.get_response(request)
+        return response
+
+    async def arespond(self, request, record):
+        if not self.may_read_replica(request):
+            return await self.get_response(request)
+
+        token = read_from_replica()
+        try:
+            response = await self.get_response(request)
+        finally:
+            stop_reading_from_replica(token)
+        if record['missed']:
+            response = await self.get_response(request)
+        return response
+
+    def may_read_replica(self, request):
+        return not (
+            request.method not in ('GET', 'HEAD')
+            or request.path.startswith('/admin/')
+            or REPLICA_PIN_COOKIE in request.COOKIES
+            or not replica_available()
+        )
+
+    def pin_to_primary(self, response):
+        response.set_cookie(
+            REPLICA_PIN_COOKIE, '1', max_age=settings.DATABASE_REPLICA_PIN_SECONDS,
+            httponly=True, samesite='Lax',
+        )
+        return response
+
+
+class ServerTimingMiddleware:
+    """
+    Break each request's time down into database, template and view time.
+
+    Phases go out in one log line per request on the 'base.timing' logger
+    and, with DEBUG on or for staff users, in a Server-Timing header, which
+    browser devtools show next to the request; it is not sent to the
+    public, as it tells anyone how expensive each page is. Queries are timed by base.timing.time_queries and
+    renders by the TimedDjangoTemplates backend. Put it first in MIDDLEWARE
+    so total covers every other middleware; view runs from the last
+    process_view hook until the response is back here.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # A sync hook would cost every async request a trip to a worker thread
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings, token = start_request()
+        try:
+            response = self.get_response(request)
+            # Inside the timed span, since it may load the session and user
+            show_header = settings.DEBUG or getattr(getattr(request, 'user', None), 'is_staff', False)
+        finally:
+            stop_request(token)
+        return self.report(request, response, timings, show_header)
+
+    async def __acall__(self, request):
+        timings, token = start_request()
+        try:
+            response = await self.get_response(request)
+            show_header = settings.DEBUG or (hasattr(request, 'auser') and (await request.auser()).is_staff)
+        finally:
+            stop_request(token)
+        return self.report(request, response, timings, show_header)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        current_timings().view_started = time.perf_counter()
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        current_timings().view_started = time.perf_counter()
+
+    def report(self, request, response, timings, show_header):
+        if timings.view_started is not None:
+            timings.view = time.perf_counter() - timings.view_started
+        phases = timings.phases()
+        if show_header:
+            response['Server-Timing'] = ', '.join(
+                f'{name};dur={duration:.1f};desc="{description}"' for name, duration, description in phases
+            )
+        fields = {f'{name}_ms': round(duration, 1) for name, duration, _ in phases}
+        fields['queries'] = timings.queries
+        logger.info(
+            'method=%s path=%s status=%s %s', request.method, request.path, response.status_code,
+            ' '.join(f'{name}={value}' for name, value in fields.items()),
+            extra={'timings': fields, 'path': request.path, 'status': response.status_code},
+        )
+        return response
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0007_contact'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='facultymember',
+            index=models.Index(fields=['designation', 'full_name', 'id'], name='faculty_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gallery',
+            index=models.Index(fields=['-uploaded_at', '-id'], name='gallery_uploaded_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='news',
+            index=models.Index(fields=['is_published', '-published_date', '-id'], name='news_published_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notice',
+            index=models.Index(fields=['is_published', '-published_date', '-id'], name='notice_published_keyset_idx'),
+        ),
+    ]
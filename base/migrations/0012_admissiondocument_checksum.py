@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0011_outboundemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='admissiondocument',
+            name='file_size',
+            field=models.PositiveBigIntegerField(blank=True, null=True, verbose_name='File Size (bytes)'),
+        ),
+        migrations.AddField(
+            model_name='admissiondocument',
+            name='sha256',
+            field=models.CharField(blank=True, max_length=64, verbose_name='SHA-256 Checksum'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-17 22:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0012_admissiondocument_checksum'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='gallery',
+            name='gallery_uploaded_keyset_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='news',
+            name='news_published_keyset_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='notice',
+            name='notice_published_keyset_idx',
+        ),
+        migrations.AddIndex(
+            model_name='alumni',
+            index=models.Index(fields=['-batch_year'], name='alumni_batch_year_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='calendar',
+            index=models.Index(fields=['-uploaded_at'], name='calendar_uploaded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='course',
+            index=models.Index(fields=['level', 'name'], name='course_level_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='gallery',
+            index=models.Index(condition=models.Q(('image__isnull', False)), fields=['-uploaded_at', '-id'], name='gallery_image_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='news',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-published_date', '-id'], name='news_published_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='notice',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-published_date', '-id'], name='notice_published_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='resource',
+            index=models.Index(fields=['-uploaded_at'], name='resource_uploaded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='splashimage',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['order'], name='splash_published_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='studenttestimonial',
+            index=models.Index(condition=models.Q(('is_published', True)), fields=['-created_at'], name='testimonial_published_idx'),
+        ),
+    ]
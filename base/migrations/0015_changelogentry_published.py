@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 23:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0014_change_log'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='changelogentry',
+            name='published',
+            field=models.BooleanField(default=False, help_text='This change published the row: created published, or is_published turned on'),
+        ),
+    ]
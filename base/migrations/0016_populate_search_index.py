@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+def populate_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    # Fills the table 0009 created with content saved before it existed,
+    # giving every document the rowid base.search looks it up by
+    from base.search import rebuild_index
+    rebuild_index(using=schema_editor.connection.alias, apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0015_changelogentry_published'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_search_index, migrations.RunPython.noop),
+    ]
@@ -3,6 +3,8 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+from .querycache import CachedQuerySet
+
 # The core model for the college itself. This can be used for general site information.
 class College(models.Model):
     name = models.CharField(max_length=200)
@@ -26,6 +28,14 @@ class Course(models.Model):
     course_code = models.CharField(max_length=20, unique=True)
     description = models.TextField(blank=True)
     image = models.ImageField(upload_to='course_images/', blank=True, null=True, help_text="Course image for display")
+
+    objects = CachedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Syllabus page lists the courses of each level by name
+            models.Index(fields=['level', 'name'], name='course_level_name_idx'),
+        ]
     
     def __str__(self):
         return f"{self.get_level_display()} - {self.name}"
@@ -34,7 +44,9 @@ class Course(models.Model):
 class Syllabus(models.Model):
     course = models.OneToOneField(Course, on_delete=models.CASCADE, primary_key=True)
     file = models.FileField(upload_to='syllabuses/', help_text="Upload the course syllabus as a PDF file.")
-    
+
+    objects = CachedQuerySet.as_manager()
+
     def __str__(self):
         return f"Syllabus for {self.course.name}"
 
@@ -49,6 +61,14 @@ class FacultyMember(models.Model):
     contact_email = models.EmailField(blank=True)
     phone_number = models.CharField(max_length=20, blank=True)
 
+    objects = CachedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the faculty directory
+            models.Index(fields=['designation', 'full_name', 'id'], name='faculty_keyset_idx'),
+        ]
+
     def __str__(self):
         return self.full_name
 
@@ -69,10 +89,21 @@ class News(models.Model):
     author = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
     image = models.ImageField(upload_to='news_images/', blank=True, null=True)
     is_published = models.BooleanField(default=False)
-    
+
+    objects = CachedQuerySet.as_manager()
+
     class Meta:
         ordering = ['-published_date']
         verbose_name_plural = "News"
+        indexes = [
+            # Keyset pagination of the published archive. Partial, because
+            # is_published=True compiles to a bare boolean test on SQLite,
+            # which can't use a composite index on (is_published, ...)
+            models.Index(
+                fields=['-published_date', '-id'], condition=models.Q(is_published=True),
+                name='news_published_keyset_idx'
+            ),
+        ]
         
     def __str__(self):
         return self.title
@@ -84,9 +115,18 @@ class Notice(models.Model):
     published_date = models.DateTimeField(default=timezone.now)
     is_published = models.BooleanField(default=False)
     file = models.FileField(upload_to='notices/', blank=True, null=True, help_text="Optional PDF file for the notice.")
-    
+
+    objects = CachedQuerySet.as_manager()
+
     class Meta:
         ordering = ['-published_date']
+        indexes = [
+            # Keyset pagination of the published archive (partial, as for News)
+            models.Index(
+                fields=['-published_date', '-id'], condition=models.Q(is_published=True),
+                name='notice_published_keyset_idx'
+            ),
+        ]
         
     def __str__(self):
         return self.title
@@ -169,6 +209,8 @@ class AdmissionDocument(models.Model):
     application = models.ForeignKey(AdmissionApplication, on_delete=models.CASCADE, related_name='documents')
     document_name = models.CharField(max_length=100, verbose_name="Document Name")
     document_file = models.FileField(upload_to='admission_documents/', verbose_name="Document File")
+    file_size = models.PositiveBigIntegerField(null=True, blank=True, verbose_name="File Size (bytes)")
+    sha256 = models.CharField(max_length=64, blank=True, verbose_name="SHA-256 Checksum")
     uploaded_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
@@ -184,6 +226,8 @@ class Facility(models.Model):
     description = models.TextField()
     image = models.ImageField(upload_to='facility_images/', blank=True, null=True)
 
+    objects = CachedQuerySet.as_manager()
+
     class Meta:
         verbose_name_plural = "Facilities"
 
@@ -196,6 +240,14 @@ class Calendar(models.Model):
     academic_year = models.CharField(max_length=10)
     file = models.FileField(upload_to='calendars/')
     uploaded_at = models.DateTimeField(auto_now_add=True)
+
+    objects = CachedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Latest calendar and the calendar archive on the resources page
+            models.Index(fields=['-uploaded_at'], name='calendar_uploaded_idx'),
+        ]
     
     def __str__(self):
         return f"{self.title} ({self.academic_year})"
@@ -206,6 +258,13 @@ class Resource(models.Model):
     file = models.FileField(upload_to='resources/')
     description = models.TextField(blank=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
+
+    objects = CachedQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-uploaded_at'], name='resource_uploaded_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -217,9 +276,20 @@ class Gallery(models.Model):
     image = models.ImageField(upload_to='gallery_images/', blank=True, null=True)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     title = models.CharField(max_length=200, help_text="Title of the gallery")
+
+    objects = CachedQuerySet.as_manager()
+
     class Meta:
         verbose_name_plural = "Galleries"
         ordering = ['-uploaded_at']
+        indexes = [
+            # Keyset pagination of the gallery page and the home page gallery,
+            # which only show entries that have an image
+            models.Index(
+                fields=['-uploaded_at', '-id'], condition=models.Q(image__isnull=False),
+                name='gallery_image_keyset_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -231,10 +301,15 @@ class Alumni(models.Model):
     present_post = models.CharField(max_length=200)
     photo = models.ImageField(upload_to='alumni_photos/', blank=True, null=True)
     message = models.TextField(blank=True)
-    
+
+    objects = CachedQuerySet.as_manager()
+
     class Meta:
         verbose_name_plural = "Alumni"
         ordering = ['-batch_year']
+        indexes = [
+            models.Index(fields=['-batch_year'], name='alumni_batch_year_idx'),
+        ]
 
     def __str__(self):
         return f"{self.full_name} ({self.batch_year})"
@@ -250,10 +325,16 @@ class SplashImage(models.Model):
     image = models.ImageField(upload_to='splash_images/')
     order = models.PositiveIntegerField(default=0, help_text="Order in which the image should appear.")
     is_published = models.BooleanField(default=True)
-    
+
+    objects = CachedQuerySet.as_manager()
+
     class Meta:
         verbose_name_plural = "Splash Images"
         ordering = ['order']
+        indexes = [
+            # Published slides of the home page splash modal, in order
+            models.Index(fields=['order'], condition=models.Q(is_published=True), name='splash_published_order_idx'),
+        ]
 
     def __str__(self):
         return self.title
@@ -268,9 +349,15 @@ class StudentTestimonial(models.Model):
     is_published = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = CachedQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
         verbose_name_plural = "Student Testimonials"
+        indexes = [
+            # Latest published testimonials on the home page
+            models.Index(fields=['-created_at'], condition=models.Q(is_published=True), name='testimonial_published_idx'),
+        ]
 
     def __str__(self):
         return f"Testimonial from {self.student_name}"
@@ -293,4 +380,110 @@ class Contact(models.Model):
         verbose_name_plural = "Contact Messages"
     
     def __str__(self):
-        return f"Message from {self.name} - {self.subject}"
\ No newline at end of file
+        return f"Message from {self.name} - {self.subject}"
+
+# --- Responsive image renditions ---
+
+class ImageRendition(models.Model):
+    """
+    A resized copy of an uploaded image, generated when the image is saved.
+    Renditions are looked up by the storage name of the original file.
+    """
+    FORMAT_CHOICES = [
+        ('webp', 'WebP'),
+        ('jpeg', 'JPEG'),
+    ]
+
+    source = models.CharField(max_length=255, db_index=True, help_text="Storage name of the original image")
+    format = models.CharField(max_length=4, choices=FORMAT_CHOICES)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+    file = models.FileField(upload_to='renditions/')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['source', 'format', 'width']
+        constraints = [
+            models.UniqueConstraint(fields=['source', 'format', 'width'], name='unique_image_rendition'),
+        ]
+
+    def __str__(self):
+        return f"{self.source} ({self.format}, {self.width}w)"
+
+
+# --- Outbox for email sent by the background worker ---
+
+class OutboundEmail(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('dead', 'Failed permanently'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    recipients = models.TextField(help_text="Comma-separated list of recipient addresses")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "Outbound Email"
+        verbose_name_plural = "Outbound Emails"
+        indexes = [
+            # Worker picks due messages in order
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} ({self.get_status_display()})"
+
+    @property
+    def recipient_list(self):
+        return [address.strip() for address in self.recipients.split(',') if address.strip()]
+
+
+# --- Change log for incremental client sync ---
+
+class ChangeLogEntry(models.Model):
+    """
+    A create, update or delete of a row served by the JSON API.
+
+    The primary key is the sequence number clients sync from: SQLite never
+    reuses AUTOINCREMENT ids and commits one writer at a time, so entries
+    become visible in id order. Entries superseded by a later change of the
+    same row, and tombstones past CHANGE_LOG_RETENTION_DAYS, are removed by
+    the compact_changelog command.
+    """
+    ACTION_CHOICES = [
+        ('created', 'Created'),
+        ('updated', 'Updated'),
+        ('deleted', 'Deleted'),
+    ]
+
+    resource = models.CharField(max_length=20, help_text="JSON API resource name, e.g. 'news'")
+    object_id = models.PositiveBigIntegerField()
+    action = models.CharField(max_length=7, choices=ACTION_CHOICES)
+    published = models.BooleanField(
+        default=False, help_text='This change published the row: created published, or is_published turned on',
+    )
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = "Change Log Entry"
+        verbose_name_plural = "Change Log"
+        indexes = [
+            # Compaction finds the latest entry of each row
+            models.Index(fields=['resource', 'object_id', 'id'], name='changelog_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"#{self.pk} {self.resource} {self.object_id} {self.action}"
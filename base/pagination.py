@@ -0,0 +1,142 @@
+import base64
+import binascii
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+def pack_cursor(payload):
+    """Opaque URL-safe cursor for a JSON-serializable payload"""
+    data = json.dumps(payload, separators=(',', ':'))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def unpack_cursor(cursor):
+    """The payload of a pack_cursor() cursor, or None if it is not one"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        return json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError, TypeError):
+        return None
+
+
+class KeysetPage:
+    """One page of a keyset-paginated queryset, iterable like a Paginator page"""
+
+    def __init__(self, object_list, has_next, has_previous, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __bool__(self):
+        return bool(self.object_list)
+
+    @property
+    def has_other_pages(self):
+        return self.has_next or self.has_previous
+
+
+class KeysetPaginator:
+    """
+    Cursor paginator ordered on a unique tuple of fields, e.g. ('-published_date', '-id').
+
+    Each page is a single indexed range query of per_page + 1 rows, with no
+    OFFSET and no COUNT(*), so deep pages cost the same as the first one.
+    Cursors are opaque URL-safe tokens; an invalid cursor gives the first page.
+    """
+
+    def __init__(self, queryset, per_page, ordering):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = tuple(ordering)
+        self.fields = [name.lstrip('-') for name in self.ordering]
+
+    def get_page(self, cursor=None):
+        queryset, forward, first = self._page_query(cursor)
+        try:
+            rows = list(queryset[:self.per_page + 1])
+        except (ValidationError, ValueError, TypeError):
+            # Cursor values that don't fit the ordering fields
+            return self.get_page()
+        return self._page(rows, forward, first)
+
+    async def aget_page(self, cursor=None):
+        """get_page for async views"""
+        queryset, forward, first = self._page_query(cursor)
+        try:
+            rows = [row async for row in queryset[:self.per_page + 1]]
+        except (ValidationError, ValueError, TypeError):
+            return await self.aget_page()
+        return self._page(rows, forward, first)
+
+    def _page_query(self, cursor):
+        """(queryset of the page and the row after it, forward, first page)"""
+        position = self.decode_cursor(cursor)
+        if position is None:
+            return self.queryset.order_by(*self.ordering), True, True
+
+        values, forward = position
+        ordering = self.ordering if forward else self._reversed(self.ordering)
+        try:
+            return self.queryset.filter(self._after(ordering, values)).order_by(*ordering), forward, False
+        except (ValidationError, ValueError, TypeError):
+            return self.queryset.order_by(*self.ordering), True, True
+
+    def _page(self, rows, forward, first):
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+
+        if forward:
+            has_next, has_previous = has_more, not first
+        else:
+            has_next, has_previous = True, has_more
+
+        next_cursor = self.encode_cursor(rows[-1], forward=True) if rows and has_next else None
+        previous_cursor = self.encode_cursor(rows[0], forward=False) if rows and has_previous else None
+        return KeysetPage(rows, has_next, has_previous, next_cursor, previous_cursor)
+
+    def _after(self, ordering, values):
+        # (a, b, c) > (x, y, z) expanded to: a > x OR (a = x AND b > y) OR ...
+        condition = Q()
+        for i, name in enumerate(ordering):
+            field = name.lstrip('-')
+            lookup = 'lt' if name.startswith('-') else 'gt'
+            clause = Q(**{f'{field}__{lookup}': values[i]})
+            for prev_name, prev_value in zip(self.fields[:i], values[:i]):
+                clause &= Q(**{prev_name: prev_value})
+            condition |= clause
+        return condition
+
+    @staticmethod
+    def _reversed(ordering):
+        return tuple(name[1:] if name.startswith('-') else '-' + name for name in ordering)
+
+    def encode_cursor(self, row, forward):
+        values = []
+        for field in self.fields:
+            value = row[field] if isinstance(row, dict) else getattr(row, field)
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            values.append(value)
+        return pack_cursor({'v': values, 'd': 'n' if forward else 'p'})
+
+    def decode_cursor(self, cursor):
+        payload = unpack_cursor(cursor) if cursor else None
+        try:
+            values, direction = payload['v'], payload['d']
+        except (TypeError, KeyError):
+            return None
+        if not isinstance(values, list) or len(values) != len(self.fields) or direction not in ('n', 'p'):
+            return None
+        return values, direction == 'n'
@@ -0,0 +1,181 @@
+"""
+Query result cache for models whose manager is CachedQuerySet.as_manager().
+
+Every table has a version number in the cache. A query's results are
+stored under its SQL, its parameters and the versions of the tables it
+reads; writing a table bumps its version, so those results are never
+read again and simply expire. Nothing is deleted on a write, and a model
+opts in by declaring `objects = CachedQuerySet.as_manager()`.
+"""
+import functools
+import hashlib
+import re
+import threading
+from collections import Counter
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import connections, models, transaction
+from django.db.models.query import NamedValuesListIterable
+
+from .caching import initial_version
+
+
+# Cache key formats: per-table version, and one cached query result
+TABLE_VERSION_KEY = 'table-version:{}'
+QUERY_RESULT_KEY = 'query:{}'
+
+# Quoted identifiers in compiled SQL; the table names among them are the tables a query reads
+_IDENTIFIER_RE = re.compile(r'"(\w+)"')
+
+_stats_lock = threading.Lock()
+_hits = Counter()
+_misses = Counter()
+
+
+def get_table_versions(tables):
+    """Return {table: version} for the given tables in a single cache round trip"""
+    keys = {TABLE_VERSION_KEY.format(table): table for table in tables}
+    found = cache.get_many(list(keys))
+    for key in keys:
+        if key not in found:
+            cache.add(key, initial_version(), timeout=None)
+            found[key] = cache.get(key)
+    return {table: found[key] for key, table in keys.items()}
+
+
+def bump_table_version(table):
+    """Invalidate every cached query result that read this table; returns its new version"""
+    key = TABLE_VERSION_KEY.format(table)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.set(key, initial_version(), timeout=None)
+        return cache.get(key)
+
+
+def invalidate_model(model, using='default'):
+    """
+    Invalidate cached results for a model's table after a write.
+
+    Bumped right away, so the writing transaction does not read stale
+    results, and again on commit, since another request may have cached
+    the pre-commit rows under the new version in between.
+    """
+    table = model._meta.db_table
+    bump_table_version(table)
+    if connections[using].in_atomic_block:
+        transaction.on_commit(lambda: bump_table_version(table), using=using)
+
+
+def is_cached_model(model):
+    return issubclass(getattr(model._default_manager, '_queryset_class', type), CachedQuerySet)
+
+
+@functools.lru_cache(maxsize=None)
+def _tables():
+    """(every model table, tables of models that opted in), built on first use"""
+    every_table = {model._meta.db_table for model in apps.get_models(include_auto_created=True)}
+    cached_tables = {model._meta.db_table for model in apps.get_models() if is_cached_model(model)}
+    return every_table, cached_tables
+
+
+def query_cache_stats():
+    """Hit and miss counts of this process, per model"""
+    with _stats_lock:
+        return {
+            label: {'hits': _hits[label], 'misses': _misses[label]}
+            for label in sorted(set(_hits) | set(_misses))
+        }
+
+
+def _record(model, hit):
+    with _stats_lock:
+        (_hits if hit else _misses)[model._meta.label] += 1
+
+
+class CachedQuerySet(models.QuerySet):
+    """
+    QuerySet whose results are cached until a table they were read from is written.
+
+    Opt a model in with `objects = CachedQuerySet.as_manager()`. Results are
+    keyed on the database alias, the compiled SQL and its parameters, and
+    the current version of every table the SQL reads; a query reading any
+    table of a model that has not opted in is never cached. Writes through
+    the ORM bump the table version: save() and delete() through signals,
+    and update(), delete(), bulk_create() and bulk_update() here. Writes made with raw
+    SQL are not seen. Queries run inside a transaction bypass the cache.
+    """
+
+    def _query_cache_key(self, kind):
+        if self._iterable_class is NamedValuesListIterable or self.query.select_for_update:
+            return None
+        if connections[self.db].in_atomic_block:
+            return None
+        try:
+            sql, params = self.query.get_compiler(using=self.db).as_sql()
+        except EmptyResultSet:
+            return None
+
+        every_table, cached_tables = _tables()
+        tables = set(_IDENTIFIER_RE.findall(sql)) & every_table
+        if not tables or not tables <= cached_tables:
+            return None
+        versions = sorted(get_table_versions(tables).items())
+        digest = hashlib.md5(f'{kind}:{self.db}:{sql}:{params!r}:{versions}'.encode()).hexdigest()
+        return QUERY_RESULT_KEY.format(digest)
+
+    def _cached(self, kind, compute):
+        key = self._query_cache_key(kind)
+        if key is None:
+            return compute()
+        result = cache.get(key)
+        _record(self.model, hit=result is not None)
+        if result is None:
+            result = compute()
+            cache.set(key, result, settings.QUERY_CACHE_TIMEOUT)
+        return result
+
+    def _fetch_all(self):
+        if self._result_cache is None:
+            self._result_cache = self._cached('rows', lambda: list(self._iterable_class(self)))
+        super()._fetch_all()
+
+    def count(self):
+        if self._result_cache is not None:
+            return len(self._result_cache)
+        return self._cached('count', super().count)
+
+    def exists(self):
+        if self._result_cache is not None:
+            return bool(self._result_cache)
+        return self._cached('exists', super().exists)
+
+    def update(self, **kwargs):
+        rows = super().update(**kwargs)
+        invalidate_model(self.model, self.db)
+        return rows
+
+    update.alters_data = True
+
+    def bulk_create(self, *args, **kwargs):
+        objs = super().bulk_create(*args, **kwargs)
+        invalidate_model(self.model, self.db)
+        return objs
+
+    def bulk_update(self, *args, **kwargs):
+        rows = super().bulk_update(*args, **kwargs)
+        invalidate_model(self.model, self.db)
+        return rows
+
+    bulk_update.alters_data = True
+
+    def delete(self):
+        deleted = super().delete()
+        invalidate_model(self.model, self.db)
+        return deleted
+
+    delete.alters_data = True
+    delete.queryset_only = True
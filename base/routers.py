@@ -0,0 +1,111 @@
+import os
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+
+
+# Alias of the read replica in settings.DATABASES
+REPLICA_ALIAS = 'replica'
+
+# Set by ReplicaMiddleware for the duration of a request that may read from the replica
+_reading_from_replica = ContextVar('reading_from_replica', default=False)
+
+# Set by ReplicaMiddleware to a dict that records whether the request wrote,
+# and whether a row it looked up was missing from the replica
+_request_record = ContextVar('request_record', default=None)
+
+
+def replica_marker_path():
+    """File whose modification time is the time of the last refresh_replica, or None"""
+    database = settings.DATABASES.get(REPLICA_ALIAS)
+    if not database or not isinstance(database.get('NAME'), (str, os.PathLike)):
+        return None
+    return f'{database["NAME"]}.refreshed'
+
+
+def mark_replica_refreshed():
+    path = replica_marker_path()
+    with open(path, 'w') as marker:
+        marker.write(f'{time.time()}\n')
+
+
+def replica_available():
+    """
+    Whether the replica is configured and was refreshed by refresh_replica
+    within DATABASE_REPLICA_MAX_AGE seconds; reads go to 'default' otherwise.
+    """
+    path = replica_marker_path()
+    if path is None:
+        return False
+    try:
+        refreshed_at = os.path.getmtime(path)
+    except OSError:
+        # Never refreshed, or an in-memory test database mirroring 'default'
+        return False
+    return time.time() - refreshed_at <= settings.DATABASE_REPLICA_MAX_AGE
+
+
+def read_from_replica():
+    """Route this context's reads of site content to the replica; returns a token for stop_reading_from_replica"""
+    return _reading_from_replica.set(True)
+
+
+def stop_reading_from_replica(token):
+    _reading_from_replica.reset(token)
+
+
+def track_request():
+    """Start recording writes and replica misses of this context; returns (record, token for stop_tracking_request)"""
+    record = {'wrote': False, 'missed': False}
+    return record, _request_record.set(record)
+
+
+def stop_tracking_request(token):
+    _request_record.reset(token)
+
+
+def note_replica_miss():
+    """
+    Record that a row this request looked up was not found. Read from the
+    replica, it may only be newer than the last refresh, so
+    ReplicaMiddleware runs the request again against 'default'.
+    """
+    record = _request_record.get()
+    if record is not None and _reading_from_replica.get():
+        record['missed'] = True
+
+
+def read_alias():
+    """Database alias that reads of site content go to in the current context"""
+    return REPLICA_ALIAS if _reading_from_replica.get() else 'default'
+
+
+class ReplicaRouter:
+    """
+    Send reads of the base app's models to the replica while
+    ReplicaMiddleware has enabled it for the current request; everything
+    else, and every write, goes to 'default'. Sessions, users and other
+    contrib tables are always read from 'default' so logins take effect
+    immediately.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label == 'base':
+            return read_alias()
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        # A dict shared with worker threads, so writes from async views count too
+        record = _request_record.get()
+        if record is not None:
+            record['wrote'] = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica is a copy of 'default', so objects from either may be related
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema with the data from refresh_replica
+        return db != REPLICA_ALIAS
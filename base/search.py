@@ -0,0 +1,197 @@
+import re
+
+from django.db import connection, connections, transaction
+from django.urls import reverse
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import News, Notice, Course, FacultyMember, Resource, Calendar
+from .routers import read_alias
+
+
+# SQLite FTS5 virtual table holding one row per searchable object
+SEARCH_TABLE = 'base_search_index'
+
+# Column weights for bm25(): title matches rank above body matches
+TITLE_WEIGHT = 10.0
+BODY_WEIGHT = 1.0
+
+# Markers placed around matched terms by snippet(), swapped for <mark> after escaping
+_MATCH_START = '\x02'
+_MATCH_END = '\x03'
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _news_document(obj):
+    if not obj.is_published:
+        return None
+    return obj.title, obj.content
+
+
+def _notice_document(obj):
+    if not obj.is_published:
+        return None
+    return obj.title, obj.content
+
+
+def _course_document(obj):
+    return f"{obj.name} ({obj.course_code})", f"{obj.get_level_display()} {obj.description}"
+
+
+def _faculty_document(obj):
+    return obj.full_name, f"{obj.designation} {obj.bio}"
+
+
+def _resource_document(obj):
+    return obj.title, obj.description
+
+
+def _calendar_document(obj):
+    return obj.title, f"Academic calendar {obj.academic_year}"
+
+
+# Indexed models: model -> (document builder, result URL builder)
+SEARCH_MODELS = {
+    News: (_news_document, lambda pk: reverse('base:news_detail', args=[pk])),
+    Notice: (_notice_document, lambda pk: reverse('base:notice_detail', args=[pk])),
+    Course: (_course_document, lambda pk: reverse('base:syllabus')),
+    FacultyMember: (_faculty_document, lambda pk: reverse('base:faculty_members')),
+    Resource: (_resource_document, lambda pk: reverse('base:resources')),
+    Calendar: (_calendar_document, lambda pk: reverse('base:resources')),
+}
+
+_MODELS_BY_KIND = {model._meta.model_name: model for model in SEARCH_MODELS}
+
+# Code of each indexed model, stored in the low bits of its documents'
+# rowids; existing codes must never change (add new models at the end)
+KIND_CODES = {News: 1, Notice: 2, Course: 3, FacultyMember: 4, Resource: 5, Calendar: 6}
+KIND_BITS = 3
+
+_INSERT_SQL = f"INSERT INTO {SEARCH_TABLE} (rowid, title, body, kind, object_id) VALUES (%s, %s, %s, %s, %s)"
+
+
+def document_rowid(model, pk):
+    """
+    Rowid of an object's document: its primary key with the model's code
+    appended, so one object always has the same row and updates and
+    deletes look it up by rowid instead of scanning the UNINDEXED columns.
+    """
+    return (pk << KIND_BITS) | KIND_CODES[model]
+
+
+def _document_row(model, obj):
+    """Parameters of _INSERT_SQL for an object of an indexed model, or None if it is not public"""
+    document = SEARCH_MODELS[model][0](obj)
+    if document is None:
+        return None
+    title, body = document
+    return document_rowid(model, obj.pk), title, body or '', model._meta.model_name, obj.pk
+
+
+def remove_document(obj):
+    """Drop an object from the search index"""
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [document_rowid(type(obj), obj.pk)])
+
+
+def index_document(obj):
+    """Insert or refresh an object in the search index (or drop it if it is no longer public)"""
+    row = _document_row(type(obj), obj)
+    remove_document(obj)
+    if row is None:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(_INSERT_SQL, row)
+
+
+def rebuild_index(batch_size=1000, using='default', apps=None):
+    """
+    Recreate the whole search index from the database, returning the number
+    of indexed rows. Migrations pass their app registry, so the rows are
+    read with the historical models.
+    """
+    indexed = 0
+    # Searches keep seeing the old index until the new one is complete
+    with transaction.atomic(using=using), connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+        for model in SEARCH_MODELS:
+            rows = []
+            source = apps.get_model(model._meta.label) if apps else model
+            for obj in source._base_manager.using(using).order_by('pk').iterator(chunk_size=batch_size):
+                row = _document_row(model, obj)
+                if row is None:
+                    continue
+                rows.append(row)
+                if len(rows) >= batch_size:
+                    cursor.executemany(_INSERT_SQL, rows)
+                    indexed += len(rows)
+                    rows = []
+            if rows:
+                cursor.executemany(_INSERT_SQL, rows)
+                indexed += len(rows)
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('optimize')")
+    return indexed
+
+
+def build_match_query(query):
+    """
+    Turn free text into a safe FTS5 MATCH expression.
+
+    Every word becomes a quoted term (so FTS5 operators typed by users are
+    treated as text) and the last word is a prefix match, so partial
+    input like "admis" still finds "admission".
+    """
+    tokens = _TOKEN_RE.findall(query)
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def _highlight(snippet):
+    return mark_safe(
+        escape(snippet).replace(_MATCH_START, '<mark>').replace(_MATCH_END, '</mark>')
+    )
+
+
+def search(query, limit=20, kinds=None):
+    """
+    Run a BM25-ranked full-text search.
+
+    Returns a list of dicts with kind, object_id, title, snippet (safe HTML
+    with matches wrapped in <mark>) and url, best match first.
+    """
+    match = build_match_query(query)
+    if match is None:
+        return []
+
+    sql = (
+        f"SELECT kind, object_id, title, "
+        f"snippet({SEARCH_TABLE}, 1, %s, %s, '…', 16), "
+        f"bm25({SEARCH_TABLE}, {TITLE_WEIGHT}, {BODY_WEIGHT}) AS rank "
+        f"FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s"
+    )
+    params = [_MATCH_START, _MATCH_END, match]
+    if kinds:
+        sql += f" AND kind IN ({', '.join(['%s'] * len(kinds))})"
+        params += list(kinds)
+    sql += " ORDER BY rank LIMIT %s"
+    params.append(limit)
+
+    with connections[read_alias()].cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+
+    results = []
+    for kind, object_id, title, snippet, rank in rows:
+        model = _MODELS_BY_KIND[kind]
+        results.append({
+            'kind': model._meta.verbose_name.title(),
+            'object_id': object_id,
+            'title': title,
+            'snippet': _highlight(snippet),
+            'url': SEARCH_MODELS[model][1](object_id),
+        })
+    return results
@@ -0,0 +1,135 @@
+import random
+from contextlib import contextmanager
+from datetime import date, timedelta
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageDraw
+
+
+# Storage folder for the placeholder files seeded rows point at
+PLACEHOLDER_DIR = 'seed'
+
+FIRST_NAMES = [
+    'Aarati', 'Aashish', 'Anil', 'Anjali', 'Bibek', 'Bikash', 'Binita', 'Bishnu', 'Deepa', 'Dipesh',
+    'Ganesh', 'Gita', 'Hari', 'Kabita', 'Kiran', 'Krishna', 'Laxmi', 'Manisha', 'Nabin', 'Nirmala',
+    'Pooja', 'Prakash', 'Pratik', 'Rabin', 'Rajesh', 'Ram', 'Rita', 'Roshan', 'Sabina', 'Sagar',
+    'Sandesh', 'Sarita', 'Saugat', 'Shanti', 'Sita', 'Suman', 'Sunita', 'Sushila', 'Umesh', 'Yamuna',
+]
+SURNAMES = [
+    'Adhikari', 'Acharya', 'Bhandari', 'Bhattarai', 'Dahal', 'Ghimire', 'Gurung', 'Karki', 'K.C.', 'Khadka',
+    'Koirala', 'Lamichhane', 'Magar', 'Neupane', 'Pandey', 'Paudel', 'Pokharel', 'Rai', 'Regmi', 'Sapkota',
+    'Sharma', 'Shrestha', 'Subedi', 'Tamang', 'Thapa', 'Tiwari', 'Upreti', 'Wagle',
+]
+PLACES = [
+    'Damauli, Tanahun', 'Bandipur, Tanahun', 'Byas-5, Tanahun', 'Pokhara, Kaski', 'Besisahar, Lamjung',
+    'Gorkha Bazar, Gorkha', 'Bharatpur, Chitwan', 'Waling, Syangja', 'Putalibazar, Syangja', 'Kathmandu',
+]
+INSTITUTIONS = [
+    'Shree Janata Secondary School', 'Bal Kalyan Secondary School', 'Adikavi Bhanubhakta Secondary School',
+    'Shree Saraswati Secondary School', 'Tanahun Model Secondary School', 'Vyas Secondary School',
+]
+PROGRAMS = [('SEE', 'English, Mathematics, Science'), ('+2 Management', 'Accountancy, Economics'),
+            ('+2 Education', 'Nepali, English, Education'), ('+2 Humanities', 'Sociology, Nepali')]
+DESIGNATIONS = ['Professor', 'Associate Professor', 'Lecturer', 'Assistant Lecturer', 'Teaching Assistant']
+DOCUMENT_NAMES = ['SEE Marksheet', 'SEE Character Certificate', '+2 Transcript', 'Migration Certificate', 'Citizenship']
+HEADLINES = [
+    'Admission open for {year} BS', 'Results of BBS first year published', 'Annual sports week concludes',
+    'Workshop on research methodology', 'Blood donation programme organised', 'Scholarship notice for {year} BS',
+    'Examination form submission schedule', 'Orientation for new students', 'Library hours extended',
+]
+WORDS = (
+    'campus students faculty programme examination result admission semester library research '
+    'community scholarship notice schedule department management education humanities tribhuvan university'
+).split()
+
+# Approximate A.D. date of 1 Baisakh: the B.S. year starts in mid April
+_BS_NEW_YEAR_OFFSET = (57, 4, 14)
+
+
+def nepali_name(rng):
+    return f'{rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)}'
+
+
+def bs_date(rng, first_year, last_year):
+    """A random B.S. date as (formatted 'YYYY/MM/DD', approximate A.D. date)"""
+    year, month, day = rng.randint(first_year, last_year), rng.randint(1, 12), rng.randint(1, 30)
+    years_behind, ad_month, ad_day = _BS_NEW_YEAR_OFFSET
+    ad = date(year - years_behind, ad_month, ad_day) + timedelta(days=round((month - 1) * 30.4) + day - 1)
+    return f'{year:04d}/{month:02d}/{day:02d}', ad
+
+
+def paragraph(rng, words=60):
+    text = ' '.join(rng.choice(WORDS) for _ in range(words))
+    return text[0].upper() + text[1:] + '.'
+
+
+def headline(rng, year):
+    return rng.choice(HEADLINES).format(year=year)
+
+
+def _placeholder_image(index):
+    rng = random.Random(index)
+    start, end = [tuple(rng.randint(40, 220) for _ in range(3)) for _ in range(2)]
+    width, height = 1600, 1067
+    # A horizontal gradient scaled up from one row keeps this fast at full size
+    row = Image.new('RGB', (256, 1))
+    row.putdata([tuple(a + (b - a) * x // 255 for a, b in zip(start, end)) for x in range(256)])
+    image = row.resize((width, height))
+    draw = ImageDraw.Draw(image)
+    for _ in range(12):
+        x, y, size = rng.randint(0, width), rng.randint(0, height), rng.randint(40, 300)
+        draw.ellipse((x, y, x + size, y + size), fill=tuple(rng.randint(0, 255) for _ in range(3)))
+    draw.text((40, 40), f'Placeholder {index}', fill=(255, 255, 255))
+    buffer = BytesIO()
+    image.save(buffer, format='JPEG', quality=85)
+    return buffer.getvalue()
+
+
+def _placeholder_pdf(index):
+    text = f'Placeholder document {index}'
+    stream = f'BT /F1 24 Tf 72 720 Td ({text}) Tj ET'.encode()
+    objects = [
+        b'<< /Type /Catalog /Pages 2 0 R >>',
+        b'<< /Type /Pages /Kids [3 0 R] /Count 1 >>',
+        b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents 4 0 R /Resources << /Font << /F1 5 0 R >> >> >>',
+        b'<< /Length %d >>\nstream\n%s\nendstream' % (len(stream), stream),
+        b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>',
+    ]
+    pdf = bytearray(b'%PDF-1.4\n')
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b'%d 0 obj\n%s\nendobj\n' % (number, body)
+    xref = len(pdf)
+    pdf += b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1)
+    pdf += b''.join(b'%010d 00000 n \n' % offset for offset in offsets)
+    pdf += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref)
+    return bytes(pdf)
+
+
+def make_placeholder(task):
+    """
+    Write one placeholder file and return its storage name. Runs in a worker
+    process: task is ('image' | 'pdf', index).
+    """
+    kind, index = task
+    if kind == 'image':
+        name, content = f'{PLACEHOLDER_DIR}/placeholder-{index:03d}.jpg', _placeholder_image(index)
+    else:
+        name, content = f'{PLACEHOLDER_DIR}/placeholder-{index:03d}.pdf', _placeholder_pdf(index)
+    if default_storage.exists(name):
+        default_storage.delete(name)
+    return default_storage.save(name, ContentFile(content))
+
+
+@contextmanager
+def explicit_timestamps(model, field_name):
+    """Let bulk_create keep the given value of an auto_now_add field"""
+    field = model._meta.get_field(field_name)
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
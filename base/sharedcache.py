@@ -0,0 +1,193 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+
+# Seconds between two updates of an entry's last access time; finer LRU
+# ordering would turn every cache read into a write
+LRU_RESOLUTION = 30
+
+# Writes made by one process between two checks of the entry count
+CULL_CHECK_INTERVAL = 64
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache_entry (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires REAL,
+    accessed REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cache_entry_accessed ON cache_entry (accessed);
+"""
+
+# Integers are stored as SQLite integers rather than pickles, so incr() can
+# update them in place with one atomic statement
+_INCR_SQL = """
+UPDATE cache_entry SET value = value + ?
+WHERE key = ? AND typeof(value) = 'integer' AND (expires IS NULL OR expires > ?)
+RETURNING value
+"""
+
+# Insert, or replace a row only if it has expired (add() semantics)
+_ADD_SQL = """
+INSERT INTO cache_entry (key, value, expires, accessed) VALUES (?, ?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires = excluded.expires, accessed = excluded.accessed
+WHERE cache_entry.expires IS NOT NULL AND cache_entry.expires <= excluded.accessed
+"""
+
+_SET_SQL = 'INSERT OR REPLACE INTO cache_entry (key, value, expires, accessed) VALUES (?, ?, ?, ?)'
+
+
+def _encode(value):
+    return value if type(value) is int else pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+
+
+def _decode(value):
+    return value if type(value) is int else pickle.loads(value)
+
+
+class SQLiteCache(BaseCache):
+    """
+    Cache shared by every worker process on one host, kept in a SQLite file.
+
+    LOCATION is the path of the cache file. Entries are bounded by
+    OPTIONS['MAX_ENTRIES']: once the count goes over, expired entries and
+    then the least recently read 1/CULL_FREQUENCY of the rest are removed.
+    incr() and add() are single statements, so version counters stay exact
+    with any number of workers, and a delete or incr in one worker is seen
+    by the next read in every other.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        self._local = threading.local()
+        self._writes = 0
+
+    def _connection(self):
+        # One connection per thread, opened again after a fork
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(self._path, timeout=10, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = NORMAL')
+            connection.execute('PRAGMA mmap_size = 67108864')
+            connection.executescript(_SCHEMA)
+            local.connection, local.pid = connection, os.getpid()
+        return local.connection
+
+    def _written(self):
+        self._writes += 1
+        if self._writes % CULL_CHECK_INTERVAL == 0:
+            self._cull()
+
+    def _cull(self):
+        connection = self._connection()
+        now = time.time()
+        (count,) = connection.execute('SELECT COUNT(*) FROM cache_entry').fetchone()
+        if count <= self._max_entries:
+            return
+        connection.execute('DELETE FROM cache_entry WHERE expires <= ?', (now,))
+        (count,) = connection.execute('SELECT COUNT(*) FROM cache_entry').fetchone()
+        if count > self._max_entries:
+            excess = count - self._max_entries + self._max_entries // self._cull_frequency
+            connection.execute(
+                'DELETE FROM cache_entry WHERE key IN '
+                '(SELECT key FROM cache_entry ORDER BY accessed LIMIT ?)', (excess,)
+            )
+
+    def _read(self, keys):
+        """{key: value} of the live entries among the given validated keys"""
+        now = time.time()
+        placeholders = ', '.join('?' * len(keys))
+        connection = self._connection()
+        rows = connection.execute(
+            f'SELECT key, value, expires, accessed FROM cache_entry WHERE key IN ({placeholders})', keys
+        ).fetchall()
+        found, stale = {}, []
+        for key, value, expires, accessed in rows:
+            if expires is not None and expires <= now:
+                continue
+            found[key] = _decode(value)
+            if now - accessed > LRU_RESOLUTION:
+                stale.append((now, key))
+        if stale:
+            connection.executemany('UPDATE cache_entry SET accessed = ? WHERE key = ?', stale)
+        return found
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._read([key]).get(key, default)
+
+    def get_many(self, keys, version=None):
+        if not keys:
+            return {}
+        key_map = {self.make_and_validate_key(key, version=version): key for key in keys}
+        return {key_map[key]: value for key, value in self._read(list(key_map)).items()}
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return key in self._read([key])
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self._connection().execute(_SET_SQL, (key, _encode(value), self.get_backend_timeout(timeout), time.time()))
+        self._written()
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        expires, now = self.get_backend_timeout(timeout), time.time()
+        rows = [(self.make_and_validate_key(key, version=version), _encode(value), expires, now)
+                for key, value in data.items()]
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.executemany(_SET_SQL, rows)
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        self._written()
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._connection().execute(_ADD_SQL, (key, _encode(value), self.get_backend_timeout(timeout), time.time()))
+        self._written()
+        return cursor.rowcount > 0
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._connection().execute(
+            'UPDATE cache_entry SET expires = ? WHERE key = ? AND (expires IS NULL OR expires > ?)',
+            (self.get_backend_timeout(timeout), key, time.time()),
+        )
+        return cursor.rowcount > 0
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(_INCR_SQL, (delta, key, time.time())).fetchone()
+        if row is None:
+            # Missing, expired, or not an integer: the same error locmem raises
+            raise ValueError(f"Key '{key}' not found")
+        return row[0]
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self._connection().execute('DELETE FROM cache_entry WHERE key = ?', (key,)).rowcount > 0
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        if keys:
+            placeholders = ', '.join('?' * len(keys))
+            self._connection().execute(f'DELETE FROM cache_entry WHERE key IN ({placeholders})', keys)
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache_entry')
+
+    def close(self, **kwargs):
+        # Connections live for the whole thread; Django calls close() after every request
+        pass
@@ -0,0 +1,147 @@
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .caching import bump_content_version
+from .querycache import is_cached_model, invalidate_model
+from .changelog import RESOURCE_BY_MODEL, record_change
+from .events import broadcaster
+from .search import SEARCH_MODELS, index_document, remove_document
+from .images import RESPONSIVE_IMAGE_FIELDS, generate_renditions, delete_renditions
+from .timing import time_queries
+from .models import (
+    News, Notice, SplashImage, StudentTestimonial,
+    Gallery, FacultyMember, Course, Alumni,
+    Syllabus, Resource, Calendar, Facility
+)
+
+# Models whose rows are rendered into cached homepage sections
+HOME_SECTION_MODELS = (
+    News, Notice, SplashImage, StudentTestimonial,
+    Gallery, FacultyMember, Course, Alumni,
+)
+
+# All models rendered on cached public pages
+CONTENT_MODELS = HOME_SECTION_MODELS + (Syllabus, Resource, Calendar, Facility)
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Apply settings.SQLITE_PRAGMAS to every new SQLite connection"""
+    if connection.vendor != 'sqlite':
+        return
+    for name, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(connection_created)
+def install_query_timer(sender, connection, **kwargs):
+    """Time the queries of every connection for ServerTimingMiddleware"""
+    # The wrapper list outlives the connection, which may reconnect
+    if time_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_queries)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_content_version(sender, **kwargs):
+    """Bump the content version of a public content model whenever one of its rows changes"""
+    if sender in CONTENT_MODELS:
+        bump_content_version(sender)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_query_cache(sender, using='default', **kwargs):
+    """Drop cached query results that read the table of a saved or deleted row"""
+    if is_cached_model(sender):
+        invalidate_model(sender, using)
+
+
+@receiver(pre_save)
+def note_publication(sender, instance, raw=False, **kwargs):
+    """Mark a notice or news item that this save publishes, as opposed to an edit of a published one"""
+    if sender in (Notice, News) and not raw:
+        was_published = instance.pk is not None and sender._base_manager.filter(
+            pk=instance.pk, is_published=True,
+        ).exists()
+        instance._publishing = instance.is_published and not was_published
+
+
+@receiver(post_save)
+def log_saved_change(sender, instance, created=False, raw=False, **kwargs):
+    """Record created and updated API rows in the change log"""
+    if sender in RESOURCE_BY_MODEL and not raw:
+        record_change(
+            sender, instance.pk, 'created' if created else 'updated',
+            published=getattr(instance, '_publishing', False),
+        )
+
+
+@receiver(post_save)
+def announce_published(sender, instance, raw=False, **kwargs):
+    """Push newly published notices and news to this process's event streams once saved"""
+    if sender in (Notice, News) and getattr(instance, '_publishing', False) and not raw:
+        transaction.on_commit(broadcaster.notify)
+
+
+@receiver(post_delete)
+def log_deleted_change(sender, instance, **kwargs):
+    """Leave a tombstone in the change log for deleted API rows"""
+    if sender in RESOURCE_BY_MODEL:
+        record_change(sender, instance.pk, 'deleted')
+
+
+@receiver(post_save)
+def update_search_index(sender, instance, raw=False, **kwargs):
+    """Keep the full-text search index in step with saved content"""
+    if sender in SEARCH_MODELS and not raw:
+        index_document(instance)
+
+
+@receiver(post_delete)
+def remove_from_search_index(sender, instance, **kwargs):
+    """Drop deleted content from the full-text search index"""
+    if sender in SEARCH_MODELS:
+        remove_document(instance)
+
+
+@receiver(pre_save)
+def note_replaced_images(sender, instance, raw=False, **kwargs):
+    """Remember the stored images a save replaces, so their renditions can be removed"""
+    if sender not in RESPONSIVE_IMAGE_FIELDS or raw or instance.pk is None:
+        return
+    field_names = RESPONSIVE_IMAGE_FIELDS[sender]
+    stored = sender._base_manager.filter(pk=instance.pk).values(*field_names).first() or {}
+    instance._replaced_images = [
+        stored[field_name] for field_name in field_names
+        if stored.get(field_name) and stored[field_name] != getattr(instance, field_name).name
+    ]
+
+
+@receiver(post_save)
+def create_image_renditions(sender, instance, raw=False, **kwargs):
+    """Generate responsive renditions for newly uploaded public images, dropping those of replaced ones"""
+    if sender in RESPONSIVE_IMAGE_FIELDS and not raw:
+        # Resizing runs after commit, so the SQLite write lock isn't held during it
+        for field_name in RESPONSIVE_IMAGE_FIELDS[sender]:
+            field_file = getattr(instance, field_name)
+            if field_file:
+                transaction.on_commit(partial(generate_renditions, field_file))
+        for source in getattr(instance, '_replaced_images', ()):
+            # Files are only deleted once the new name is committed
+            transaction.on_commit(partial(delete_renditions, source))
+
+
+@receiver(post_delete)
+def remove_image_renditions(sender, instance, **kwargs):
+    """Delete the renditions of images whose owning object is deleted"""
+    if sender in RESPONSIVE_IMAGE_FIELDS:
+        for field_name in RESPONSIVE_IMAGE_FIELDS[sender]:
+            field_file = getattr(instance, field_name)
+            if field_file:
+                delete_renditions(field_file.name)
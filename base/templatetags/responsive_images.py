@@ -0,0 +1,42 @@
+from django import template
+from django.utils.html import format_html, format_html_join
+
+from base.images import get_renditions
+
+register = template.Library()
+
+
+def _srcset(renditions):
+    return ', '.join(f"{url} {width}w" for url, width, height in renditions)
+
+
+@register.simple_tag
+def responsive_image(field_file, alt='', sizes='100vw', loading='lazy', **attrs):
+    """
+    Render an uploaded image as a <picture> with WebP and JPEG srcsets.
+
+    Usage: {% responsive_image gallery.image alt=gallery.title sizes="(min-width: 1024px) 25vw, 100vw" class="w-full h-64 object-cover" %}
+    Falls back to a plain <img> of the original when no renditions exist yet.
+    """
+    if not field_file:
+        return ''
+
+    extra = format_html_join('', ' {}="{}"', attrs.items())
+    renditions = get_renditions(field_file.name)
+    if not renditions['jpeg']:
+        return format_html(
+            '<img src="{}" alt="{}" loading="{}" decoding="async"{}>',
+            field_file.url, alt, loading, extra,
+        )
+
+    src, width, height = renditions['jpeg'][-1]
+    webp_source = ''
+    if renditions['webp']:
+        webp_source = format_html(
+            '<source type="image/webp" srcset="{}" sizes="{}">',
+            _srcset(renditions['webp']), sizes,
+        )
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" width="{}" height="{}" alt="{}" loading="{}" decoding="async"{}></picture>',
+        webp_source, src, _srcset(renditions['jpeg']), sizes, width, height, alt, loading, extra,
+    )
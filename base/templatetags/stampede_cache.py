@@ -0,0 +1,51 @@
+from django import template
+from django.core.cache.utils import make_template_fragment_key
+
+from base.caching import note_stale_fragment, single_flight
+
+register = template.Library()
+
+
+class StampedeCacheNode(template.Node):
+    def __init__(self, nodelist, timeout, fragment_name, vary_on, version):
+        self.nodelist = nodelist
+        self.timeout = timeout
+        self.fragment_name = fragment_name
+        self.vary_on = vary_on
+        self.version = version
+
+    def render(self, context):
+        timeout = self.timeout.resolve(context)
+        key = make_template_fragment_key(self.fragment_name, [var.resolve(context) for var in self.vary_on])
+        version = self.version.resolve(context) if self.version else None
+        value, rendered_version = single_flight(key, lambda: self.nodelist.render(context), version=version, timeout=int(timeout))
+        if rendered_version != version:
+            note_stale_fragment(getattr(context, 'request', None))
+        return value
+
+
+@register.tag
+def stampede_cache(parser, token):
+    """
+    Cache a template fragment through base.caching.single_flight.
+
+    Usage: {% stampede_cache timeout fragment_name [vary_on ...] version=section_versions.news %}
+    Unlike {% cache %}, the version is not part of the key: when it changes,
+    one request re-renders the fragment while the others keep rendering the
+    previous copy, and conditional_page does not cache pages rendered with it.
+    """
+    nodelist = parser.parse(('endstampede_cache',))
+    parser.delete_first_token()
+    bits = token.split_contents()
+    version = None
+    if bits[-1].startswith('version='):
+        version = parser.compile_filter(bits.pop().removeprefix('version='))
+    if len(bits) < 3:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' tag requires a timeout and a fragment name.")
+    return StampedeCacheNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        bits[2],
+        [parser.compile_filter(bit) for bit in bits[3:]],
+        version,
+    )
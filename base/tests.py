@@ -1,3 +1,1395 @@
-from django.test import TestCase
+import csv
+import json
+import os
+import re
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import unittest
+import zipfile
+from datetime import timedelta
+from io import BytesIO
+from unittest import mock
+from xml.etree import ElementTree
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from PIL import Image
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.contrib.messages import get_messages
+from django.core import mail
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, connections, router
+from django.http import Http404, HttpResponse, HttpResponseNotFound
+from django.test import (
+    AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import async_views, views
+from .views import get_published_or_404
+from .caching import REGENERATE_LOCK_KEY, asingle_flight, single_flight
+from .api import API_PAGE_SIZE, API_RESOURCES, json_response
+from .changelog import changes_since, compact, decode_cursor, encode_cursor
+from .events import broadcaster, published_events
+from .management.commands.refresh_replica import Command as RefreshReplicaCommand
+from .exports import csv_stream, documents_zip_stream, export_headings, xlsx_stream
+from .images import generate_renditions
+from .mail import claim_batch, queue_email, send_batch
+from .middleware import REPLICA_PIN_COOKIE, ReplicaMiddleware
+from .pagination import KeysetPaginator
+from .querycache import query_cache_stats
+from .search import SEARCH_TABLE, rebuild_index, search
+from .routers import REPLICA_ALIAS, mark_replica_refreshed, replica_available
+from .sharedcache import CULL_CHECK_INTERVAL, SQLiteCache
+from .models import (
+    Course, Syllabus, FacultyMember, News, Notice, AdmissionApplication, AdmissionDocument, AcademicQualification,
+    Facility, Calendar, Resource, Gallery, Alumni, SplashImage, StudentTestimonial, Contact,
+    ImageRendition, OutboundEmail, ChangeLogEntry,
+)
+
+try:
+    from aiosmtpd.controller import Controller
+except ImportError:  # requirements-dev.txt
+    Controller = None
+
+
+class AdminChangelistQueryTests(TestCase):
+    """Changelist pages must run the same number of queries however many rows they show"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin_user = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+
+    def setUp(self):
+        self.client.force_login(self.admin_user)
+
+    def changelist_queries(self, model):
+        url = reverse(f'admin:base_{model._meta.model_name}_changelist')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def assertConstantQueries(self, model, add_rows):
+        add_rows(0, 3)
+        small_page = self.changelist_queries(model)
+        add_rows(3, 20)
+        self.assertEqual(self.changelist_queries(model), small_page)
+
+    def test_course_changelist(self):
+        def add_rows(start, stop):
+            for i in range(start, stop):
+                course = Course.objects.create(name=f'Course {i}', course_code=f'C{i}')
+                if i % 2:
+                    Syllabus.objects.create(course=course, file=f'syllabuses/course-{i}.pdf')
+        self.assertConstantQueries(Course, add_rows)
+
+    def test_syllabus_changelist(self):
+        def add_rows(start, stop):
+            for i in range(start, stop):
+                course = Course.objects.create(name=f'Course {i}', course_code=f'C{i}')
+                Syllabus.objects.create(course=course, file=f'syllabuses/course-{i}.pdf')
+        self.assertConstantQueries(Syllabus, add_rows)
+
+    def test_news_changelist(self):
+        def add_rows(start, stop):
+            for i in range(start, stop):
+                author = User.objects.create_user(f'author{i}')
+                News.objects.create(title=f'News {i}', content='Content', author=author)
+        self.assertConstantQueries(News, add_rows)
+
+    def test_admission_application_changelist(self):
+        def add_rows(start, stop):
+            for i in range(start, stop):
+                application = AdmissionApplication.objects.create(full_name=f'STUDENT {i}')
+                AdmissionDocument.objects.bulk_create([
+                    AdmissionDocument(application=application, document_name=f'Document {n}',
+                                      document_file=f'admission_documents/doc{i}_{n}.pdf')
+                    for n in range(i % 3)
+                ])
+        self.assertConstantQueries(AdmissionApplication, add_rows)
+
+    def test_admission_application_document_counts(self):
+        application = AdmissionApplication.objects.create(full_name='STUDENT')
+        AdmissionDocument.objects.create(application=application, document_name='Transcript',
+                                         document_file='admission_documents/transcript.pdf')
+        response = self.client.get(reverse('admin:base_admissionapplication_changelist'))
+        self.assertContains(response, '1 files')
+
+    def test_every_changelist_renders(self):
+        from django.contrib import admin
+        for model in admin.site._registry:
+            if model._meta.app_label == 'base':
+                with self.subTest(model=model.__name__):
+                    self.changelist_queries(model)
+
+
+# A table read without any index ("SCAN base_news"), as opposed to
+# "SCAN ... USING INDEX" or "SEARCH ..."
+_FULL_SCAN = re.compile(r'^SCAN (\w+)$')
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+class QueryPlanTests(TestCase):
+    """
+    Every query a public page runs must be served by an index: no full table
+    scan to filter or sort, and no temporary B-tree to sort the result.
+    Queries reading a whole table without WHERE or ORDER BY are allowed.
+    """
+    urls = [
+        ('base:home', ()),
+        ('base:about', ()),
+        ('base:gallery', ()),
+        ('base:faculty_members', ()),
+        ('base:news', ()),
+        ('base:news_detail', ('news',)),
+        ('base:notice', ()),
+        ('base:notice_detail', ('notice',)),
+        ('base:blog', ()),
+        ('base:syllabus', ()),
+        ('base:resources', ()),
+        ('base:api_news', ()),
+        ('base:api_notices', ()),
+        ('base:api_gallery', ()),
+        ('base:api_faculty', ()),
+        ('base:api_courses', ()),
+        ('base:api_changes', ()),
+        ('base:admission', ()),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(3):
+            course = Course.objects.create(name=f'Course {i}', course_code=f'C{i}', level='BM'[i % 2])
+            Syllabus.objects.create(course=course, file=f'syllabuses/course-{i}.pdf')
+            FacultyMember.objects.create(full_name=f'Teacher {i}', designation='Lecturer')
+            cls.news = News.objects.create(title=f'News {i}', content='Content', is_published=True)
+            cls.notice = Notice.objects.create(title=f'Notice {i}', content='Content', is_published=True)
+            Facility.objects.create(name=f'Facility {i}', description='Description')
+            Calendar.objects.create(title=f'Calendar {i}', academic_year='2081', file='calendars/calendar.pdf')
+            Resource.objects.create(title=f'Resource {i}', file='resources/resource.pdf')
+            Gallery.objects.create(title=f'Gallery {i}', image=f'gallery_images/gallery-{i}.jpg')
+            Alumni.objects.create(full_name=f'Alumnus {i}', batch_year=f'20{10 + i}', present_post='Officer')
+            SplashImage.objects.create(title=f'Splash {i}', image=f'splash_images/splash-{i}.jpg', order=i)
+            StudentTestimonial.objects.create(student_name=f'Student {i}', designation='BBS', message='Message', is_published=True)
+
+    def setUp(self):
+        # Cached pages and fragments would hide the queries behind them
+        cache.clear()
+
+    def plan_problems(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            plan = [row[-1] for row in cursor.fetchall()]
+        filters_or_sorts = re.search(r'\b(WHERE|ORDER BY)\b', sql)
+        return [
+            detail for detail in plan
+            if 'USE TEMP B-TREE' in detail or (filters_or_sorts and _FULL_SCAN.match(detail))
+        ]
+
+    def test_public_pages_use_indexes(self):
+        for url_name, attributes in self.urls:
+            url = reverse(url_name, args=[getattr(self, attribute).pk for attribute in attributes])
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                for query in queries:
+                    if not query['sql'].startswith('SELECT'):
+                        continue
+                    problems = self.plan_problems(query['sql'])
+                    self.assertFalse(problems, f"{query['sql']}\n{problems}")
+
+
+class HomepageCacheTests(TestCase):
+    """The homepage carries no per-visitor state, so one cached copy serves everyone"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_homepage_served_from_cache_without_cookies(self):
+        self.client.get(reverse('base:home'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('base:home'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 0)
+        self.assertFalse(response.cookies)
+        self.assertNotIn('Cookie', response.get('Vary', ''))
+        self.assertNotRegex(response.content.decode(), r'name="csrfmiddlewaretoken" value="[^"]')
+
+    def test_contact_page_is_the_no_script_fallback(self):
+        response = self.client.get(reverse('base:home'))
+        self.assertContains(response, f'action="{reverse("base:contact")}"')
+        self.assertRegex(response.content.decode(), r'<noscript>[^<]*<p[^>]*>[^<]*<a href="%s"' % reverse('base:contact'))
+        # The contact page is not cached, so it renders its own token
+        response = self.client.get(reverse('base:contact'))
+        self.assertRegex(response.content.decode(), r'name="csrfmiddlewaretoken" value="[^"]')
+
+    def test_saved_row_rerenders_only_its_section(self):
+        News.objects.create(title='Convocation', content='Content', is_published=True)
+        Course.objects.create(name='BBS', course_code='BBS', description='Bachelor of Business Studies')
+        self.client.get(reverse('base:home'))
+
+        Alumni.objects.create(full_name='Sita Sharma', batch_year='2018-2022', present_post='Engineer')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('base:home'))
+        self.assertContains(response, 'Sita Sharma')
+        self.assertContains(response, 'Convocation')
+        # The other sections come from their cached fragments
+        self.assertEqual(len(queries), 1)
+        self.assertIn('"base_alumni"', queries[0]['sql'])
+
+    def test_page_with_stale_fragment_not_cached(self):
+        self.client.get(reverse('base:home'))
+        Alumni.objects.create(full_name='Sita Sharma', batch_year='2018-2022', present_post='Engineer')
+        # Another request, e.g. for /?utm=x, is regenerating the alumni fragment
+        lock_key = REGENERATE_LOCK_KEY.format(make_template_fragment_key('home_alumni'))
+        cache.add(lock_key, 1)
+
+        response = self.client.get(reverse('base:home'))
+        self.assertNotContains(response, 'Sita Sharma')
+        self.assertFalse(response.has_header('ETag'))
+
+        cache.delete(lock_key)
+        response = self.client.get(reverse('base:home'))
+        self.assertContains(response, 'Sita Sharma')
+        self.assertTrue(response.has_header('ETag'))
+
+    def test_contact_form_posts_with_fetched_token(self):
+        client = self.client_class(enforce_csrf_checks=True)
+        token = client.get(reverse('base:csrf_token')).json()['csrfToken']
+        response = client.post(reverse('base:contact'), {
+            'csrfmiddlewaretoken': token, 'name': 'Sita Sharma', 'email': 'sita@example.com',
+            'subject': 'Admission enquiry', 'message': 'When does admission open?',
+        })
+        self.assertRedirects(response, reverse('base:contact'))
+        self.assertEqual(Contact.objects.count(), 1)
+
+
+class ReplicaTests(TestCase):
+    """Public pages read the replica while it is fresh; clients that wrote read their writes"""
+
+    def setUp(self):
+        self.workdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.workdir)
+        marker = os.path.join(self.workdir, 'replica.refreshed')
+        patcher = mock.patch('base.routers.replica_marker_path', return_value=marker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_stale_replica_is_not_read(self):
+        self.assertFalse(replica_available())
+        mark_replica_refreshed()
+        self.assertTrue(replica_available())
+        with self.settings(DATABASE_REPLICA_MAX_AGE=60):
+            refreshed = time.time() - 61
+            os.utime(os.path.join(self.workdir, 'replica.refreshed'), (refreshed, refreshed))
+            self.assertFalse(replica_available())
+
+    def test_refresh_bumps_only_changed_versions(self):
+        bump = RefreshReplicaCommand.bump
+        before = {'news': 5, 'notice': 7, 'gallery': 3}
+        self.assertEqual(bump(before, {'news': 5}, 'news', lambda: self.fail('unchanged')), 0)
+        self.assertEqual(bump(before, {'notice': 6}, 'notice', lambda: 8), 1)
+        # A write bumped gallery during the copy: bump again next time
+        self.assertEqual(bump(before, {}, 'gallery', lambda: 5), 1)
+        self.assertEqual(before, {'news': 5, 'notice': 8, 'gallery': None})
+
+    def test_client_pinned_only_after_write(self):
+        form = {'name': 'Sita Sharma', 'email': 'sita@example.com', 'subject': 'Admission enquiry', 'message': ''}
+        response = self.client.post(reverse('base:contact'), form)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(REPLICA_PIN_COOKIE, response.cookies)
+
+        response = self.client.post(reverse('base:contact'), dict(form, message='When does admission open?'))
+        self.assertRedirects(response, reverse('base:contact'))
+        self.assertEqual(response.cookies[REPLICA_PIN_COOKIE]['max-age'], settings.DATABASE_REPLICA_PIN_SECONDS)
+
+    def test_missing_row_retried_on_default(self):
+        calls = []
+
+        def view(request):
+            calls.append(router.db_for_read(Notice))
+            # A notice published after the last refresh is only on 'default'
+            if calls[-1] == REPLICA_ALIAS:
+                with mock.patch('base.views.get_object_or_404', side_effect=Http404):
+                    with self.assertRaises(Http404):
+                        get_published_or_404(Notice, 1)
+                return HttpResponseNotFound()
+            return HttpResponse('Exam schedule')
+
+        mark_replica_refreshed()
+        response = ReplicaMiddleware(view)(RequestFactory().get('/notice/1/'))
+        self.assertEqual(response.content, b'Exam schedule')
+        self.assertEqual(calls, [REPLICA_ALIAS, 'default'])
+        self.assertNotIn(REPLICA_PIN_COOKIE, response.cookies)
+
+    def test_other_not_found_not_retried(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request.path)
+            return HttpResponseNotFound()
+
+        mark_replica_refreshed()
+        response = ReplicaMiddleware(handler)(RequestFactory().get('/wp-login.php'))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(calls, ['/wp-login.php'])
+
+
+class SearchIndexTests(TestCase):
+    """Every public object has exactly one row in the full-text index, found by its rowid"""
+
+    def indexed(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT kind, object_id, title FROM {SEARCH_TABLE} ORDER BY rowid")
+            return cursor.fetchall()
+
+    def test_saves_and_deletes_update_one_row(self):
+        news = News.objects.create(title='Convocation ceremony', content='Held in the main hall', is_published=True)
+        notice = Notice.objects.create(title='Convocation schedule', content='Gowns from the office', is_published=True)
+        news.title = 'Convocation ceremony postponed'
+        news.save()
+        self.assertEqual(self.indexed(), [
+            ('news', news.pk, 'Convocation ceremony postponed'), ('notice', notice.pk, 'Convocation schedule'),
+        ])
+        self.assertEqual([result['title'] for result in search('postponed')], ['Convocation ceremony postponed'])
+
+        notice.is_published = False
+        notice.save()
+        news.delete()
+        self.assertEqual(self.indexed(), [])
+
+    def test_rebuild_matches_incremental_index(self):
+        Course.objects.create(name='Business Studies', course_code='BBS', level='B')
+        News.objects.create(title='Draft', content='Content', is_published=False)
+        FacultyMember.objects.create(full_name='Sita Sharma', designation='Lecturer')
+        incremental = self.indexed()
+        self.assertEqual(rebuild_index(), 2)
+        self.assertEqual(self.indexed(), incremental)
+
+
+class ImageRenditionTests(TestCase):
+    """Renditions are made once per uploaded image and removed with it"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = self.settings(MEDIA_ROOT=media_root, IMAGE_RENDITION_WIDTHS=(32, 64))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        cache.clear()
+
+    def upload(self, name):
+        buffer = BytesIO()
+        Image.new('RGB', (100, 50), 'teal').save(buffer, format='PNG')
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+    def renditions(self, source):
+        return sorted(ImageRendition.objects.filter(source=source).values_list('format', 'width', 'height'))
+
+    def test_renditions_generated_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            gallery = Gallery.objects.create(title='Sports day', image=self.upload('sports.png'))
+            # Not generated while the saving transaction holds the write lock
+            self.assertEqual(self.renditions(gallery.image.name), [])
+        self.assertEqual(self.renditions(gallery.image.name), [
+            ('jpeg', 32, 16), ('jpeg', 64, 32), ('webp', 32, 16), ('webp', 64, 32),
+        ])
+        # Only the header is read when every rendition exists
+        with mock.patch('base.images.ImageOps.exif_transpose') as exif_transpose:
+            self.assertEqual(generate_renditions(gallery.image), 0)
+        exif_transpose.assert_not_called()
+
+    def test_replaced_image_renditions_deleted(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            gallery = Gallery.objects.create(title='Sports day', image=self.upload('sports.png'))
+        old_source = gallery.image.name
+        old_files = [rendition.file.path for rendition in ImageRendition.objects.filter(source=old_source)]
+
+        gallery.image = self.upload('sports-final.png')
+        with self.captureOnCommitCallbacks(execute=True):
+            gallery.save()
+        self.assertEqual(self.renditions(old_source), [])
+        self.assertFalse(any(os.path.exists(path) for path in old_files))
+        self.assertEqual(len(self.renditions(gallery.image.name)), 4)
+
+        # Saving without a new image keeps the renditions
+        with self.captureOnCommitCallbacks(execute=True):
+            gallery.save()
+        self.assertEqual(len(self.renditions(gallery.image.name)), 4)
+
+
+class ExportTests(TestCase):
+    """Admission exports have one row per applicant and never carry formulas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.attacker = AdmissionApplication.objects.create(
+            full_name='=HYPERLINK("http://example.com","Click")', contact_number='+9779800000000',
+            permanent_address='@SUM(A1)', temporary_address='-1', guardian_name='\tRam',
+        )
+        cls.applicant = AdmissionApplication.objects.create(full_name='सीता शर्मा', guardian_name='Ram Sharma')
+        for year in ('2078', '2080'):
+            AcademicQualification.objects.create(
+                application=cls.applicant, institution_name='Campus', program='+2 Science', symbol_number='123',
+                passed_year=year, percentage_cgpa='3.6', major_subjects='Physics',
+            )
+        cls.applications = AdmissionApplication.objects.order_by('pk')
+
+    def assertExported(self, rows):
+        self.assertEqual(rows[0], export_headings(2))
+        self.assertEqual([row[0] for row in rows[1:]], [str(self.attacker.pk), str(self.applicant.pk)])
+        self.assertTrue(all(len(row) == len(rows[0]) for row in rows))
+        attacker = dict(zip(rows[0], rows[1]))
+        self.assertEqual(attacker['Full Name (Block Letters)'], '\'=HYPERLINK("http://example.com","Click")')
+        self.assertEqual(attacker['Contact Number'], "'+9779800000000")
+        self.assertEqual(attacker['Permanent Address'], "'@SUM(A1)")
+        self.assertEqual(attacker['Temporary Address'], "'-1")
+        self.assertEqual(attacker['Name of Guardian'], "'\tRam")
+        applicant = dict(zip(rows[0], rows[2]))
+        self.assertEqual(applicant['Full Name (Block Letters)'], 'सीता शर्मा')
+        self.assertEqual(applicant['Qualification 2 Passed Year'], '2080')
+        self.assertEqual(applicant['Qualification 1 Program/Course'], "'+2 Science")
+
+    def test_csv(self):
+        content = b''.join(csv_stream(self.applications)).decode('utf-8')
+        self.assertTrue(content.startswith('\ufeff'))
+        self.assertExported(list(csv.reader(content[1:].splitlines())))
+
+    def test_xlsx(self):
+        with zipfile.ZipFile(BytesIO(b''.join(xlsx_stream(self.applications)))) as workbook:
+            self.assertIsNone(workbook.testzip())
+            self.assertIn('xl/workbook.xml', workbook.namelist())
+            sheet = ElementTree.fromstring(workbook.read('xl/worksheets/sheet1.xml'))
+        namespace = {'s': 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'}
+        rows = [
+            [cell.findtext('s:is/s:t', namespaces=namespace) for cell in row.findall('s:c', namespace)]
+            for row in sheet.iterfind('s:sheetData/s:row', namespace)
+        ]
+        self.assertExported(rows)
+
+
+class DocumentBundleTests(TestCase):
+    """The documents ZIP has one folder per applicant and lists the files missing from storage"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = self.settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_folders_and_missing_files(self):
+        sita = AdmissionApplication.objects.create(
+            full_name='सीता शर्मा', profile_photo=SimpleUploadedFile('sita.jpg', b'photo'),
+        )
+        for content in (b'first page', b'second page'):
+            AdmissionDocument.objects.create(
+                application=sita, document_name='Transcript', document_file=SimpleUploadedFile('scan.pdf', content),
+            )
+        ram = AdmissionApplication.objects.create(full_name='Ram/Bahadur')
+        AdmissionDocument.objects.create(
+            application=ram, document_name='Citizenship', document_file='admission_documents/lost.pdf',
+        )
+
+        stream = documents_zip_stream(AdmissionApplication.objects.order_by('pk'))
+        with zipfile.ZipFile(BytesIO(b''.join(stream))) as archive:
+            self.assertIsNone(archive.testzip())
+            contents = {name: archive.read(name) for name in archive.namelist()}
+        sita_folder, ram_folder = f'{sita.pk:05d}-सीता-शर्मा', f'{ram.pk:05d}-RamBahadur'
+        self.assertEqual(contents, {
+            f'{sita_folder}/profile-photo.jpg': b'photo',
+            f'{sita_folder}/Transcript.pdf': b'first page',
+            f'{sita_folder}/Transcript-2.pdf': b'second page',
+            f'{ram_folder}/missing-files.txt': b'admission_documents/lost.pdf\n',
+        })
+
+
+class SMTPRecorder:
+    """aiosmtpd handler that records delivered messages and refuses some recipients"""
+
+    def __init__(self):
+        self.refused = set()
+        self.delivered = []
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.refused:
+            return '550 5.1.1 Mailbox unavailable'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        # session.peer is the client's (host, port): one per SMTP connection
+        self.delivered.append((session.peer, envelope.rcpt_tos))
+        return '250 Message accepted for delivery'
+
+
+@unittest.skipIf(Controller is None, 'aiosmtpd is not installed (requirements-dev.txt)')
+class OutboxTests(TestCase):
+    """Queued email is delivered once, retried with backoff and given up on after EMAIL_OUTBOX_MAX_ATTEMPTS"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        cls.smtp = SMTPRecorder()
+        cls.controller = Controller(cls.smtp, hostname='127.0.0.1', port=port)
+        cls.controller.start()
+        cls.addClassCleanup(cls.controller.stop)
+        cls.enterClassContext(override_settings(
+            EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend',
+            EMAIL_HOST='127.0.0.1', EMAIL_PORT=port, EMAIL_USE_TLS=False,
+            EMAIL_HOST_USER='', EMAIL_HOST_PASSWORD='',
+        ))
+
+    def setUp(self):
+        self.smtp.refused.clear()
+        self.smtp.delivered.clear()
+        self.email = queue_email('Admission enquiry', 'When does admission open?', ['office@example.com'])
+
+    def make_due(self):
+        OutboundEmail.objects.update(next_attempt_at=timezone.now())
+
+    def test_sent_once(self):
+        self.assertEqual(send_batch(), (1, 0))
+        self.assertEqual(send_batch(), (0, 0))
+        self.assertEqual([rcpt_tos for peer, rcpt_tos in self.smtp.delivered], [['office@example.com']])
+        self.email.refresh_from_db()
+        self.assertEqual((self.email.status, self.email.attempts), ('sent', 1))
+
+    def test_batch_sent_over_one_connection(self):
+        for i in range(3):
+            queue_email(f'Notice {i}', 'Body', [f'student{i}@example.com'])
+        self.assertEqual(send_batch(), (4, 0))
+        self.assertEqual(len(self.smtp.delivered), 4)
+        self.assertEqual(len({peer for peer, rcpt_tos in self.smtp.delivered}), 1)
+
+    def test_claimed_message_not_sent_twice(self):
+        self.assertEqual(claim_batch(10), [self.email])
+        # Another worker finds nothing to claim or send
+        self.assertEqual(claim_batch(10), [])
+        self.assertEqual(send_batch(), (0, 0))
+        self.assertEqual(self.smtp.delivered, [])
+
+        # Until the claim is old enough to belong to a crashed worker
+        stale = timezone.now() - timedelta(seconds=settings.EMAIL_OUTBOX_LOCK_TIMEOUT + 1)
+        OutboundEmail.objects.update(locked_at=stale)
+        self.assertEqual(send_batch(), (1, 0))
+        self.assertEqual(len(self.smtp.delivered), 1)
+
+    def test_refused_recipient_backs_off_then_dead_letters(self):
+        self.smtp.refused.add('office@example.com')
+        other = queue_email('Results', 'Published', ['student@example.com'])
+        delays = []
+        for attempt in range(1, settings.EMAIL_OUTBOX_MAX_ATTEMPTS + 1):
+            self.make_due()
+            before = timezone.now()
+            # The refusal doesn't stop the rest of the batch
+            self.assertEqual(send_batch(), (1 if attempt == 1 else 0, 1))
+            self.email.refresh_from_db()
+            self.assertEqual(self.email.attempts, attempt)
+            self.assertIn('SMTPRecipientsRefused', self.email.last_error)
+            if attempt < settings.EMAIL_OUTBOX_MAX_ATTEMPTS:
+                self.assertEqual(self.email.status, 'pending')
+                delays.append(round((self.email.next_attempt_at - before).total_seconds()))
+                # Not retried before its backoff has passed
+                self.assertEqual(send_batch(), (0, 0))
+
+        self.assertEqual(delays, [settings.EMAIL_OUTBOX_RETRY_DELAY * 2 ** n for n in range(len(delays))])
+        self.assertEqual(self.email.status, 'dead')
+        self.make_due()
+        self.assertEqual(send_batch(), (0, 0))
+        other.refresh_from_db()
+        self.assertEqual((other.status, other.attempts), ('sent', 1))
+        self.assertEqual([rcpt_tos for peer, rcpt_tos in self.smtp.delivered], [['student@example.com']])
+
+
+class AdmissionUploadTests(TestCase):
+    """Admission uploads are streamed to storage, held to their quotas and removed when not kept"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = self.settings(MEDIA_ROOT=self.media_root, ADMISSION_UPLOAD_MAX_FILE_SIZE=2 ** 20)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def stored_files(self):
+        return sorted(
+            os.path.relpath(os.path.join(directory, name), self.media_root)
+            for directory, _, names in os.walk(self.media_root) for name in names
+        )
+
+    def submit(self, photo, document):
+        data = {
+            'full_name': 'SITA SHARMA', 'date_of_birth_ad': '2001-05-29', 'date_of_birth_bs': '2058/02/15',
+            'nationality': 'nepali', 'gender': 'female', 'result_status': 'passed',
+            'permanent_address': 'Lamjung', 'temporary_address': 'Lamjung', 'contact_number': '9800000000',
+            'email': 'sita@example.com', 'guardian_name': 'Ram Sharma', 'guardian_contact': '9800000001',
+            'academic-TOTAL_FORMS': '0', 'academic-INITIAL_FORMS': '0',
+            'document-TOTAL_FORMS': '1', 'document-INITIAL_FORMS': '0',
+            'document-0-document_name': 'Transcript', 'profile_photo': photo, 'document-0-document_file': document,
+        }
+        return self.client.post(reverse('base:admission'), data)
+
+    def photo(self):
+        content = BytesIO()
+        Image.new('RGB', (20, 20), 'navy').save(content, format='PNG')
+        return SimpleUploadedFile('photo.png', content.getvalue(), content_type='image/png')
+
+    def test_accepted_upload_is_kept(self):
+        response = self.submit(self.photo(), SimpleUploadedFile('transcript.pdf', b'%PDF-1.4 transcript'))
+        self.assertRedirects(response, reverse('base:admission'))
+        document = AdmissionDocument.objects.get()
+        self.assertEqual(document.file_size, len(b'%PDF-1.4 transcript'))
+        self.assertEqual(self.stored_files(), sorted([
+            document.application.profile_photo.name, document.document_file.name,
+        ]))
+
+    def test_oversize_upload_rejected_and_removed(self):
+        response = self.submit(self.photo(), SimpleUploadedFile('transcript.pdf', b'x' * (2 * 2 ** 20)))
+        self.assertRedirects(response, reverse('base:admission'), fetch_redirect_response=False)
+        errors = [str(message) for message in get_messages(response.wsgi_request)]
+        self.assertEqual(errors, ['"transcript.pdf" is larger than the 1 MB limit per file.'])
+        self.assertFalse(AdmissionApplication.objects.exists())
+        self.assertEqual(self.stored_files(), [])
+
+    def test_disallowed_type_rejected_and_removed(self):
+        response = self.submit(
+            SimpleUploadedFile('photo.png', b'<?php echo "not an image"; ?>', content_type='image/png'),
+            SimpleUploadedFile('transcript.pdf', b'%PDF-1.4 transcript'),
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('profile_photo', response.context['form'].errors)
+        self.assertFalse(AdmissionApplication.objects.exists())
+        # The document streamed next to the rejected photo is removed too
+        self.assertEqual(self.stored_files(), [])
+
+
+class QueryCacheTests(TransactionTestCase):
+    """
+    Results of opted-in models are served from the cache until their table
+    is written. A TransactionTestCase, since queries inside a transaction
+    bypass the cache.
+    """
+
+    def setUp(self):
+        cache.clear()
+        for i in range(3):
+            Course.objects.create(name=f'Course {i}', course_code=f'C{i}', level='BM'[i % 2])
+
+    def names(self):
+        return [course.name for course in Course.objects.filter(level='B').order_by('name')]
+
+    def assertCachedAfterOneQuery(self, expected):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.names(), expected)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names(), expected)
+
+    def test_second_evaluation_is_a_hit(self):
+        self.assertCachedAfterOneQuery(['Course 0', 'Course 2'])
+        hits = query_cache_stats()['base.Course']['hits']
+        with self.assertNumQueries(1):
+            self.assertEqual(Course.objects.filter(level='B').count(), 2)
+        with self.assertNumQueries(0):
+            self.assertEqual(Course.objects.filter(level='B').count(), 2)
+        self.assertEqual(query_cache_stats()['base.Course']['hits'], hits + 1)
+
+    def test_writes_invalidate(self):
+        self.assertCachedAfterOneQuery(['Course 0', 'Course 2'])
+
+        course = Course.objects.get(course_code='C0')
+        course.name = 'Course 0 (revised)'
+        course.save()
+        self.assertCachedAfterOneQuery(['Course 0 (revised)', 'Course 2'])
+
+        Course.objects.filter(course_code='C2').update(name='Course 2 (revised)')
+        self.assertCachedAfterOneQuery(['Course 0 (revised)', 'Course 2 (revised)'])
+
+        Course.objects.bulk_create([Course(name='Course 3', course_code='C3', level='B')])
+        self.assertCachedAfterOneQuery(['Course 0 (revised)', 'Course 2 (revised)', 'Course 3'])
+
+        Course.objects.filter(course_code='C3').delete()
+        self.assertCachedAfterOneQuery(['Course 0 (revised)', 'Course 2 (revised)'])
+
+        course.delete()
+        self.assertCachedAfterOneQuery(['Course 2 (revised)'])
+
+    def test_query_reading_uncached_table_bypasses_cache(self):
+        # Contact has not opted in, so nothing would invalidate this result
+        Contact.objects.create(name='Sita Sharma', email='sita@example.com', subject='Enquiry', message='Hello')
+        courses = lambda: Course.objects.filter(name__in=Contact.objects.values('subject'))
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                self.assertEqual(list(courses()), [])
+
+
+class AsyncViewTests(TestCase):
+    """The async variants of the public pages render what their sync views render"""
+    pages = ['home', 'gallery', 'news', 'news_detail', 'notice', 'notice_detail', 'syllabus', 'resources']
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(12):
+            cls.news = News.objects.create(title=f'News {i}', content='Content', is_published=True)
+            cls.notice = Notice.objects.create(title=f'Notice {i}', content='Content', is_published=True)
+            Gallery.objects.create(title=f'Gallery {i}', image=f'gallery_images/gallery-{i}.jpg')
+        for i in range(3):
+            course = Course.objects.create(name=f'Course {i}', course_code=f'C{i}', level='BM'[i % 2])
+            Syllabus.objects.create(course=course, file=f'syllabuses/course-{i}.pdf')
+            Resource.objects.create(title=f'Resource {i}', file='resources/resource.pdf')
+            Calendar.objects.create(title=f'Calendar {i}', academic_year='2081', file='calendars/calendar.pdf')
+
+    def render_both(self, name, path, **kwargs):
+        cache.clear()
+        sync_response = getattr(views, name)(RequestFactory().get(path), **kwargs)
+        cache.clear()
+        async_response = async_to_sync(getattr(async_views, name))(AsyncRequestFactory().get(path), **kwargs)
+        return sync_response, async_response
+
+    def test_async_pages_match_sync_pages(self):
+        for name in self.pages:
+            kwargs = {'pk': self.news.pk if name == 'news_detail' else self.notice.pk} if name.endswith('_detail') else {}
+            path = reverse(f'base:{name}', kwargs=kwargs)
+            with self.subTest(page=name):
+                sync_response, async_response = self.render_both(name, path, **kwargs)
+                self.assertEqual(async_response.status_code, 200)
+                self.assertEqual(async_response.content, sync_response.content)
+
+    def test_async_pages_share_cache_and_conditional_get(self):
+        path = reverse('base:news')
+        sync_response = views.news(RequestFactory().get(path))
+        with CaptureQueriesContext(connection) as queries:
+            cached = async_to_sync(async_views.news)(AsyncRequestFactory().get(path))
+        self.assertEqual(cached.content, sync_response.content)
+        # Only the freshness aggregates run; the page comes from the cache
+        self.assertEqual(len(queries), 2)
+
+        request = AsyncRequestFactory().get(path, headers={'If-None-Match': sync_response['ETag']})
+        self.assertEqual(async_to_sync(async_views.news)(request).status_code, 304)
+
+    def test_async_detail_page_not_found(self):
+        request = AsyncRequestFactory().get('/news/0/')
+        with self.assertRaises(Http404):
+            async_to_sync(async_views.news_detail)(request, pk=0)
+
+
+class KeysetPaginationTests(TestCase):
+    """KeysetPaginator walks pages by cursor in both directions"""
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        # Three rows share a published_date, so the id decides their order
+        dates = [now, now - timedelta(hours=1), now - timedelta(hours=1), now - timedelta(hours=1),
+                 now - timedelta(hours=2), now - timedelta(hours=3), now - timedelta(hours=4)]
+        for i, published_date in enumerate(dates):
+            News.objects.create(title=f'News {i}', content='Content', published_date=published_date)
+        cls.expected = list(News.objects.order_by('-published_date', '-id').values_list('pk', flat=True))
+
+    def paginator(self):
+        return KeysetPaginator(News.objects.all(), 3, ('-published_date', '-id'))
+
+    @staticmethod
+    def pks(page):
+        return [news.pk for news in page]
+
+    def test_forward_and_back(self):
+        paginator = self.paginator()
+        first = paginator.get_page()
+        self.assertEqual(self.pks(first), self.expected[:3])
+        self.assertTrue(first.has_next)
+        self.assertFalse(first.has_previous)
+
+        second = paginator.get_page(first.next_cursor)
+        self.assertEqual(self.pks(second), self.expected[3:6])
+        self.assertTrue(second.has_next)
+        self.assertTrue(second.has_previous)
+
+        last = paginator.get_page(second.next_cursor)
+        self.assertEqual(self.pks(last), self.expected[6:])
+        self.assertFalse(last.has_next)
+        self.assertTrue(last.has_previous)
+        self.assertIsNone(last.next_cursor)
+
+        back = paginator.get_page(last.previous_cursor)
+        self.assertEqual(self.pks(back), self.expected[3:6])
+        back = paginator.get_page(back.previous_cursor)
+        self.assertEqual(self.pks(back), self.expected[:3])
+        self.assertFalse(back.has_previous)
+        self.assertIsNone(back.previous_cursor)
+
+    def test_ties_broken_by_id(self):
+        paginator = self.paginator()
+        first = paginator.get_page()
+        # The page boundary falls inside the run of equal published_dates
+        tied = News.objects.filter(published_date=first.object_list[-1].published_date)
+        self.assertEqual(tied.count(), 3)
+        seen = self.pks(first) + self.pks(paginator.get_page(first.next_cursor))
+        self.assertEqual(seen, self.expected[:6])
+        self.assertEqual(len(set(seen)), 6)
+
+    def test_invalid_cursor_gives_first_page(self):
+        paginator = self.paginator()
+        first = self.pks(paginator.get_page())
+        wrong_types = paginator.encode_cursor({'published_date': 'not a date', 'id': 'x'}, forward=True)
+        wrong_length = paginator.encode_cursor({'published_date': timezone.now(), 'id': 1}, forward=True)[:-4]
+        for cursor in ['garbage', '!!', 'e30', wrong_types, wrong_length]:
+            with self.subTest(cursor=cursor):
+                page = paginator.get_page(cursor)
+                self.assertEqual(self.pks(page), first)
+                self.assertFalse(page.has_previous)
+
+    def test_single_page(self):
+        page = KeysetPaginator(News.objects.all(), 10, ('-published_date', '-id')).get_page()
+        self.assertEqual(self.pks(page), self.expected)
+        self.assertFalse(page.has_next)
+        self.assertFalse(page.has_previous)
+        self.assertFalse(page.has_other_pages)
+
+    def test_aget_page(self):
+        paginator = self.paginator()
+        first = async_to_sync(paginator.aget_page)()
+        self.assertEqual(self.pks(first), self.expected[:3])
+        second = async_to_sync(paginator.aget_page)(first.next_cursor)
+        self.assertEqual(self.pks(second), self.expected[3:6])
+        self.assertEqual(self.pks(async_to_sync(paginator.aget_page)('garbage')), self.expected[:3])
+
+
+class ContentApiTests(TestCase):
+    """The JSON API pages published rows with keyset cursors, selected fields and ETags"""
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        cls.news = [
+            News.objects.create(title=f'News {i}', content='Content', is_published=True,
+                                published_date=now - timedelta(hours=i))
+            for i in range(25)
+        ]
+        News.objects.create(title='Draft', content='Content', is_published=False)
+
+    def setUp(self):
+        cache.clear()
+
+    def get(self, etag=None, **params):
+        return self.client.get(reverse('base:api_news'), params, headers={'If-None-Match': etag} if etag else {})
+
+    def test_fields_selected_with_fields_parameter(self):
+        rows = self.get(fields='title, id,title').json()['news']
+        self.assertEqual(rows[0], {'title': 'News 0', 'id': self.news[0].pk})
+        self.assertEqual(set(self.get().json()['news'][0]), {'id', 'title', 'published_date', 'image'})
+
+        response = self.get(fields='id,password')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['fields'], list(API_RESOURCES['news'].fields))
+
+    def test_limit_clamped(self):
+        for limit, expected in [('0', 1), ('-5', 1), ('7', 7), ('1000', 25), ('ten', API_PAGE_SIZE)]:
+            with self.subTest(limit=limit):
+                self.assertEqual(len(self.get(limit=limit, fields='id').json()['news']), expected)
+        cache.clear()
+        with mock.patch('base.views.API_MAX_PAGE_SIZE', 10):
+            self.assertEqual(len(self.get(limit='1000', fields='id').json()['news']), 10)
+
+    def test_cursor_round_trip(self):
+        ids = lambda page: [row['id'] for row in page['news']]
+        first = self.get(limit=10, fields='id').json()
+        second = self.get(limit=10, fields='id', cursor=first['next']).json()
+        third = self.get(limit=10, fields='id', cursor=second['next']).json()
+        self.assertEqual(ids(first) + ids(second) + ids(third), [news.pk for news in self.news])
+        self.assertIsNone(first['previous'])
+        self.assertIsNone(third['next'])
+
+        back = self.get(limit=10, fields='id', cursor=third['previous']).json()
+        self.assertEqual(ids(back), ids(second))
+        self.assertEqual(ids(self.get(limit=10, fields='id', cursor=back['previous']).json()), ids(first))
+
+    def test_etag_until_news_saved(self):
+        response = self.get(fields='id,title')
+        self.assertEqual(self.get(fields='id,title', etag=response['ETag']).status_code, 304)
+        # Each set of parameters is its own page
+        self.assertEqual(self.get(fields='id', etag=response['ETag']).status_code, 200)
+
+        self.news[0].title = 'News 0 (revised)'
+        self.news[0].save()
+        changed = self.get(fields='id,title', etag=response['ETag'])
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], response['ETag'])
+        self.assertEqual(changed.json()['news'][0]['title'], 'News 0 (revised)')
+
+    def test_json_fallback_without_orjson(self):
+        data = {'title': 'सीता शर्मा', 'ids': [1, 2], 'image': None}
+        with mock.patch('base.api.orjson', None):
+            response = json_response(data, status=400)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.content, '{"title":"सीता शर्मा","ids":[1,2],"image":null}'.encode())
+
+
+class ChangeFeedTests(TestCase):
+    """The change feed sends each changed row once, at its latest change, and tombstones for removed rows"""
+
+    def changes(self, since, **params):
+        return self.client.get(reverse('base:api_changes'), dict(params, since=since))
+
+    def start(self):
+        return self.client.get(reverse('base:api_changes')).json()['next']
+
+    def test_changes_since_cursor(self):
+        kept = News.objects.create(title='Convocation', content='Content', is_published=True)
+        cursor = self.start()
+        kept.title = 'Convocation postponed'
+        kept.save()
+        kept.save()
+        added = Notice.objects.create(title='Exam schedule', content='Content', is_published=True)
+        deleted = News.objects.create(title='Sports day', content='Content', is_published=True)
+        deleted_pk = deleted.pk
+        deleted.delete()
+        unpublished = Notice.objects.create(title='Holiday', content='Content', is_published=True)
+        unpublished.is_published = False
+        unpublished.save()
+
+        page = self.changes(cursor).json()
+        self.assertFalse(page['more'])
+        changes = {(change['resource'], change['id']): change for change in page['changes']}
+        self.assertEqual(len(changes), len(page['changes']))
+        self.assertEqual(changes[('news', kept.pk)]['action'], 'updated')
+        self.assertEqual(changes[('news', kept.pk)]['data']['title'], 'Convocation postponed')
+        self.assertEqual(changes[('notices', added.pk)]['action'], 'created')
+        self.assertEqual(changes[('notices', added.pk)]['data']['title'], 'Exam schedule')
+        self.assertNotIn('data', changes[('news', deleted_pk)])
+        self.assertEqual(changes[('news', deleted_pk)]['action'], 'deleted')
+        self.assertEqual(changes[('notices', unpublished.pk)]['action'], 'deleted')
+        self.assertEqual(self.changes(page['next']).json()['changes'], [])
+
+    def test_more_pages_with_small_limit(self):
+        sequence, issued_at = decode_cursor(self.start())
+        for i in range(5):
+            Notice.objects.create(title=f'Notice {i}', content='Content', is_published=True)
+        seen, pages = [], 0
+        more = True
+        while more:
+            changes, cursor, more = changes_since(sequence, issued_at, limit=2)
+            seen += [change['data']['title'] for change in changes]
+            sequence, next_issued_at = decode_cursor(cursor)
+            # Paging through a backlog keeps the time of the original cursor
+            if more:
+                self.assertEqual(next_issued_at, issued_at)
+            pages += 1
+        self.assertEqual(seen, [f'Notice {i}' for i in range(5)])
+        self.assertEqual(pages, 3)
+
+    def test_invalid_and_expired_cursors(self):
+        self.assertEqual(self.changes('not-a-cursor').status_code, 400)
+        old = time.time() - (settings.CHANGE_LOG_RETENTION_DAYS + 1) * 86400
+        response = self.changes(encode_cursor(0, old))
+        self.assertEqual(response.status_code, 410)
+        self.assertTrue(response.json()['reset'])
+
+    def test_compact(self):
+        news = News.objects.create(title='Convocation', content='Content', is_published=True)
+        news.save()
+        gone = News.objects.create(title='Sports day', content='Content', is_published=True)
+        gone.delete()
+        old = Notice.objects.create(title='Old notice', content='Content', is_published=True)
+        old.delete()
+        horizon = timezone.now() - timedelta(days=settings.CHANGE_LOG_RETENTION_DAYS + 1)
+        ChangeLogEntry.objects.filter(resource='notices').update(changed_at=horizon)
+
+        self.assertEqual(compact(), 4)
+        self.assertEqual(
+            sorted(ChangeLogEntry.objects.values_list('resource', 'action')),
+            [('news', 'deleted'), ('news', 'updated')],
+        )
+
+
+class NoticeEventTests(TestCase):
+    """Open pages are told about notices when they are published, not each time one is edited"""
+
+    def save(self, instance):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            instance.save()
+        return broadcaster.notify in callbacks
+
+    def test_publishing_sends_one_event(self):
+        notice = Notice(title='Exam schedule', content='Content', is_published=True)
+        self.assertTrue(self.save(notice))
+        events, sequence, _ = published_events(0)
+        self.assertEqual([event for _, event, _ in events], ['notice'])
+        self.assertIn('"title":"Exam schedule"', events[0][2])
+
+        notice.title = 'Exam schedule (revised)'
+        self.assertFalse(self.save(notice))
+        self.assertEqual(published_events(sequence)[0], [])
+
+    def test_draft_announced_when_published(self):
+        news = News(title='Convocation', content='Content', is_published=False)
+        self.assertFalse(self.save(news))
+        self.assertEqual(published_events(0)[0], [])
+
+        news.is_published = True
+        self.assertTrue(self.save(news))
+        self.assertEqual([event for _, event, _ in published_events(0)[0]], ['news'])
+
+
+class ServerTimingTests(TestCase):
+    """Every response breaks its time down into database, template and view phases"""
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(3):
+            News.objects.create(title=f'News {i}', content='Content', is_published=True)
+            Notice.objects.create(title=f'Notice {i}', content='Content', is_published=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(User.objects.create_user('office', is_staff=True))
+
+    def phases(self, response):
+        return {
+            name: dict(param.split('=', 1) for param in params)
+            for name, *params in (entry.split(';') for entry in response['Server-Timing'].split(', '))
+        }
+
+    def test_server_timing_header_and_log(self):
+        with self.assertLogs('base.timing', 'INFO') as logs:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(reverse('base:news'))
+        phases = self.phases(response)
+        self.assertEqual(set(phases), {'db', 'tpl', 'view', 'total'})
+        self.assertEqual(phases['db']['desc'], f'"{len(queries)} queries"')
+        self.assertGreater(float(phases['tpl']['dur']), 0)
+        self.assertLessEqual(float(phases['view']['dur']), float(phases['total']['dur']))
+        self.assertIn('path=/news/ status=200', logs.output[0])
+        self.assertEqual(logs.records[0].timings['queries'], len(queries))
+
+    def test_header_only_for_staff_or_debug(self):
+        self.client.logout()
+        with self.assertLogs('base.timing', 'INFO') as logs:
+            response = self.client.get(reverse('base:news'))
+        self.assertNotIn('Server-Timing', response)
+        self.assertIn('path=/news/ status=200', logs.output[0])
+        with self.settings(DEBUG=True), self.assertLogs('base.timing', 'INFO'):
+            self.assertIn('Server-Timing', self.client.get(reverse('base:news')))
+
+    def test_cached_page_renders_no_template(self):
+        self.client.get(reverse('base:news'))
+        with self.assertLogs('base.timing', 'INFO'):
+            response = self.client.get(reverse('base:news'))
+        self.assertEqual(self.phases(response)['tpl']['dur'], '0.0')
+
+
+class PerformanceBudgetTests(TestCase):
+    """
+    Render every public route against production-sized content and hold it
+    to a query count and wall-clock budget.
+
+    Pages are rendered with an empty cache, so the budgets cover the worst
+    case. The measurements of every route are written to a JSON report
+    (PERFORMANCE_REPORT, default performance-report.json in the project
+    root) so runs can be compared between commits.
+    """
+    # url name -> (URL args, query budget, milliseconds budget)
+    budgets = {
+        'base:home': ((), 25, 500),
+        'base:about': ((), 2, 250),
+        'base:contact': ((), 2, 250),
+        'base:admission': ((), 4, 250),
+        'base:admission_submit': ((), 0, 100),
+        'base:admission_requirements': ((), 2, 250),
+        'base:admission_process': ((), 0, 250),
+        'base:fee_structure': ((), 2, 250),
+        'base:gallery': ((), 20, 500),
+        'base:faculty_members': ((), 20, 500),
+        'base:news': ((), 8, 500),
+        'base:news_detail': (('news',), 8, 250),
+        'base:notice': ((), 6, 500),
+        'base:notice_detail': (('notice',), 8, 250),
+        'base:notice_stream': ((), 0, 100),
+        'base:blog': ((), 4, 500),
+        'base:blog_detail': (('news',), 4, 250),
+        'base:events': ((), 0, 100),
+        'base:event_detail': (('news',), 2, 100),
+        'base:syllabus': ((), 6, 250),
+        'base:resources': ((), 8, 500),
+        'base:search': ((), 2, 250),
+        'base:api_news': ((), 2, 250),
+        'base:api_notices': ((), 2, 250),
+        'base:api_gallery': ((), 2, 250),
+        'base:api_faculty': ((), 2, 250),
+        'base:api_courses': ((), 2, 250),
+        'base:api_changes': ((), 1, 100),
+        'base:csrf_token': ((), 0, 100),
+        'base:health_check': ((), 1, 100),
+    }
+    query_strings = {
+        'base:search': '?q=campus',
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        News.objects.bulk_create([
+            News(title=f'Campus news {i}', content='Content ' * 200, is_published=i % 10 != 0,
+                 published_date=now - timedelta(hours=i), image=f'news_images/news-{i}.jpg')
+            for i in range(3000)
+        ])
+        Notice.objects.bulk_create([
+            Notice(title=f'Campus notice {i}', content='Content ' * 100, is_published=i % 10 != 0,
+                   published_date=now - timedelta(hours=i))
+            for i in range(3000)
+        ])
+        Gallery.objects.bulk_create([
+            Gallery(title=f'Gallery {i}', image=f'gallery_images/gallery-{i}.jpg') for i in range(2000)
+        ])
+        FacultyMember.objects.bulk_create([
+            FacultyMember(full_name=f'Teacher {i}', designation=f'Lecturer {i % 5}', image=f'faculty_images/teacher-{i}.jpg')
+            for i in range(300)
+        ])
+        Alumni.objects.bulk_create([
+            Alumni(full_name=f'Alumnus {i}', batch_year=f'{2000 + i % 25}', present_post='Officer')
+            for i in range(300)
+        ])
+        courses = Course.objects.bulk_create([
+            Course(name=f'Course {i}', course_code=f'C{i}', level='BM'[i % 2]) for i in range(30)
+        ])
+        Syllabus.objects.bulk_create([
+            Syllabus(course=course, file=f'syllabuses/{course.course_code}.pdf') for course in courses
+        ])
+        Facility.objects.bulk_create([
+            Facility(name=f'Facility {i}', description='Description') for i in range(10)
+        ])
+        Resource.objects.bulk_create([
+            Resource(title=f'Resource {i}', file=f'resources/resource-{i}.pdf') for i in range(300)
+        ])
+        Calendar.objects.bulk_create([
+            Calendar(title=f'Calendar {i}', academic_year=f'{2070 + i}', file=f'calendars/calendar-{i}.pdf')
+            for i in range(15)
+        ])
+        SplashImage.objects.bulk_create([
+            SplashImage(title=f'Splash {i}', image=f'splash_images/splash-{i}.jpg', order=i) for i in range(3)
+        ])
+        StudentTestimonial.objects.bulk_create([
+            StudentTestimonial(student_name=f'Student {i}', designation='BBS', message='Message', is_published=True)
+            for i in range(100)
+        ])
+        cls.news = News.objects.filter(is_published=True).first()
+        cls.notice = Notice.objects.filter(is_published=True).first()
+
+    def setUp(self):
+        # Report a failing view as a 500 for its route instead of aborting the run
+        self.client.raise_request_exception = False
+
+    def measure(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = self.client.get(url)
+            elapsed = (time.perf_counter() - started) * 1000
+        return response, len(queries), elapsed
+
+    def test_routes_within_budget(self):
+        report = {}
+        for url_name, (attributes, query_budget, time_budget) in self.budgets.items():
+            url = reverse(url_name, args=[getattr(self, attribute).pk for attribute in attributes])
+            url += self.query_strings.get(url_name, '')
+            # The first render warms imports and compiled templates
+            self.measure(url)
+            response, query_count, elapsed = self.measure(url)
+            report[url_name] = {
+                'url': url,
+                'status': response.status_code,
+                'queries': query_count,
+                'milliseconds': round(elapsed, 1),
+                'query_budget': query_budget,
+                'milliseconds_budget': time_budget,
+            }
+            with self.subTest(url=url):
+                self.assertLess(response.status_code, 400)
+                self.assertLessEqual(query_count, query_budget, f'{url} ran {query_count} queries')
+                self.assertLessEqual(elapsed, time_budget, f'{url} took {elapsed:.0f} ms')
+
+        path = os.environ.get('PERFORMANCE_REPORT', settings.BASE_DIR / 'performance-report.json')
+        with open(path, 'w') as report_file:
+            json.dump(report, report_file, indent=2, sort_keys=True)
+            report_file.write('\n')
+
+
+class SingleFlightTests(SimpleTestCase):
+    """One request regenerates a cache entry while the others are served the previous copy"""
+
+    def setUp(self):
+        cache.clear()
+        self.calls = []
+
+    def compute(self, value):
+        def compute():
+            self.calls.append(value)
+            return value
+        return compute
+
+    def acompute(self, value):
+        async def compute():
+            self.calls.append(value)
+            return value
+        return compute
+
+    def test_lock_holder_regenerates_while_others_get_stale_copy(self):
+        single_flight('page', self.compute('v1'), version=1)
+        rendering, release = threading.Event(), threading.Event()
+
+        def slow_compute():
+            rendering.set()
+            release.wait(5)
+            return 'v2'
+
+        holder = threading.Thread(target=lambda: self.calls.append(single_flight('page', slow_compute, version=2)))
+        holder.start()
+        rendering.wait(5)
+        self.assertEqual(single_flight('page', self.compute('unused'), version=2), ('v1', 1))
+        release.set()
+        holder.join()
+        self.assertEqual(self.calls, ['v1', ('v2', 2)])
+        self.assertEqual(single_flight('page', self.compute('unused'), version=2), ('v2', 2))
+
+    def test_entry_refreshed_early_near_expiry(self):
+        # Current, but a second from expiry after taking half a second to compute
+        cache.set('page', {'value': 'v1', 'version': 1, 'expires': time.time() + 1, 'delta': 0.5})
+        with mock.patch('base.caching.random.random', return_value=0.0):
+            self.assertEqual(single_flight('page', self.compute('unused'), version=1), ('v1', 1))
+        # A high draw brings the expiry forward: -0.5 * log(1 - 0.9) > 1 second
+        with mock.patch('base.caching.random.random', return_value=0.9):
+            self.assertEqual(single_flight('page', self.compute('v2'), version=1), ('v2', 1))
+        self.assertEqual(self.calls, ['v2'])
+
+    @override_settings(STAMPEDE_LOCK_TIMEOUT=0.2)
+    def test_waiter_computes_itself_after_lock_timeout(self):
+        # Another request holds the lock for a missing entry and never finishes
+        cache.add(REGENERATE_LOCK_KEY.format('page'), 1)
+        started = time.monotonic()
+        self.assertEqual(single_flight('page', self.compute('v1'), version=1), ('v1', 1))
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+        self.assertEqual(async_to_sync(asingle_flight)('page', self.acompute('v1'), version=1), ('v1', 1))
+        self.assertEqual(self.calls, ['v1', 'v1'])
+
+    def test_async_stale_copy_served_while_locked(self):
+        async_to_sync(asingle_flight)('page', self.acompute('v1'), version=1)
+        cache.add(REGENERATE_LOCK_KEY.format('page'), 1)
+        self.assertEqual(async_to_sync(asingle_flight)('page', self.acompute('unused'), version=2), ('v1', 1))
+        cache.delete(REGENERATE_LOCK_KEY.format('page'))
+        self.assertEqual(async_to_sync(asingle_flight)('page', self.acompute('v2'), version=2), ('v2', 2))
+        self.assertEqual(self.calls, ['v1', 'v2'])
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'SQLite pragmas')
+class SQLitePragmaTests(SimpleTestCase):
+    """settings.SQLITE_PRAGMAS are in force on every new connection"""
+
+    def test_new_connection_reads_back_pragmas(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        # The test database is in memory, where WAL is not available
+        settings_dict = {**connection.settings_dict, 'NAME': os.path.join(directory, 'db.sqlite3')}
+        fresh = type(connections['default'])(settings_dict, alias='pragma-check')
+        self.addCleanup(fresh.close)
+        with fresh.cursor() as cursor:
+            values = {
+                name: cursor.execute(f'PRAGMA {name}').fetchone()[0]
+                for name in ('journal_mode', 'busy_timeout', 'synchronous')
+            }
+        # synchronous reads back as a number: 1 is NORMAL
+        self.assertEqual(values, {'journal_mode': 'wal', 'busy_timeout': 5000, 'synchronous': 1})
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    """The shared cache backend, on a cache file of its own"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.cache = self.make_cache()
+
+    def make_cache(self, **options):
+        return SQLiteCache(os.path.join(self.directory, 'cache.sqlite3'), {'OPTIONS': options})
+
+    def in_threads(self, target, count=8):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(target())) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_add_only_stores_missing_or_expired_keys(self):
+        self.assertTrue(self.cache.add('lock', 1))
+        self.assertFalse(self.cache.add('lock', 2))
+        self.assertEqual(self.cache.get('lock'), 1)
+        self.cache.set('expired', 'old', timeout=0)
+        self.assertTrue(self.cache.add('expired', 'new'))
+        self.assertEqual(self.cache.get('expired'), 'new')
+
+    def test_add_is_atomic_across_connections(self):
+        # Each thread has its own connection, as separate worker processes do
+        results = self.in_threads(lambda: self.cache.add('contended', 1))
+        self.assertEqual(results.count(True), 1)
+
+    def test_incr_updates_integers_in_place(self):
+        self.cache.set('version', 1)
+        self.assertEqual(self.cache.incr('version'), 2)
+        self.assertEqual(self.cache.incr('version', 5), 7)
+        self.assertIs(type(self.cache.get('version')), int)
+        self.cache.set('text', 'one')
+        for key in ('text', 'missing'):
+            with self.subTest(key=key), self.assertRaises(ValueError):
+                self.cache.incr(key)
+
+    def test_concurrent_incr_loses_no_increments(self):
+        self.cache.set('counter', 0)
+        self.in_threads(lambda: [self.cache.incr('counter') for _ in range(100)])
+        self.assertEqual(self.cache.get('counter'), 800)
+
+    def test_expired_entries_are_not_returned(self):
+        self.cache.set('short', 'value', timeout=0.2)
+        self.cache.set('forever', 'value', timeout=None)
+        self.assertEqual(self.cache.get('short'), 'value')
+        time.sleep(0.3)
+        self.assertIsNone(self.cache.get('short'))
+        self.assertFalse(self.cache.has_key('short'))
+        self.assertEqual(self.cache.get_many(['short', 'forever']), {'forever': 'value'})
+        self.cache.set('counter', 1, timeout=0)
+        with self.assertRaises(ValueError):
+            self.cache.incr('counter')
+
+    def test_cull_removes_least_recently_read_entries(self):
+        cache = self.make_cache(MAX_ENTRIES=100, CULL_FREQUENCY=4)
+        for n in range(CULL_CHECK_INTERVAL):
+            cache.set(f'key-{n}', n)
+        # Mark the first ten as read since, as reads do once LRU_RESOLUTION has passed
+        cache._connection().execute(
+            "UPDATE cache_entry SET accessed = ? WHERE key IN (%s)" % ', '.join('?' * 10),
+            [time.time() + 60] + [cache.make_key(f'key-{n}') for n in range(10)],
+        )
+        for n in range(CULL_CHECK_INTERVAL, 2 * CULL_CHECK_INTERVAL - 1):
+            cache.set(f'key-{n}', n)
+        count = lambda: cache._connection().execute('SELECT COUNT(*) FROM cache_entry').fetchone()[0]
+        # Counts are only checked every CULL_CHECK_INTERVAL writes
+        self.assertEqual(count(), 2 * CULL_CHECK_INTERVAL - 1)
+
+        cache.set('last', 0)
+        # Down to MAX_ENTRIES less a quarter of it
+        self.assertEqual(count(), 75)
+        self.assertEqual(len(cache.get_many([f'key-{n}' for n in range(10)])), 10)
+        self.assertIsNone(cache.get('key-10'))
@@ -0,0 +1,90 @@
+import time
+from contextvars import ContextVar
+
+from django.template.backends.django import DjangoTemplates, Template
+
+
+# Timings of the request being handled in the current context, set by ServerTimingMiddleware
+_current = ContextVar('request_timings', default=None)
+
+
+class RequestTimings:
+    """Time spent per phase of one request, in seconds"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.view_started = None
+        self.view = 0.0
+        self.db = 0.0
+        self.queries = 0
+        self.template = 0.0
+
+    def phases(self):
+        """(name, milliseconds, description) of each phase, for Server-Timing and the log"""
+        total = time.perf_counter() - self.started
+        return [
+            ('db', self.db * 1000, f'{self.queries} queries'),
+            ('tpl', self.template * 1000, 'template render'),
+            ('view', self.view * 1000, 'view'),
+            ('total', total * 1000, 'middleware and view'),
+        ]
+
+
+def start_request():
+    """Start timing the current request; returns (timings, token for stop_request)"""
+    timings = RequestTimings()
+    return timings, _current.set(timings)
+
+
+def stop_request(token):
+    _current.reset(token)
+
+
+def current_timings():
+    return _current.get()
+
+
+def time_queries(execute, sql, params, many, context):
+    """
+    Execute wrapper adding each query's duration to the current request's
+    timings. Installed on every connection as it opens, so it also sees
+    queries that async views run in worker threads; outside a timed
+    request it only costs a context variable lookup.
+    """
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db += time.perf_counter() - started
+        timings.queries += 1
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        timings = _current.get()
+        if timings is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timings.template += time.perf_counter() - started
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """
+    Django template backend that adds render time to the current request's
+    timings. Only top-level renders are timed: extended and included
+    templates render inside them, and so do queries and cache reads made
+    while rendering, which also count towards db.
+    """
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        template = super().get_template(template_name)
+        return TimedTemplate(template.template, self)
@@ -0,0 +1,181 @@
+import hashlib
+import os
+import re
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler, StopFutureHandlers, StopUpload
+
+from .models import AdmissionApplication, AdmissionDocument
+
+
+# Upload fields of the admission form handled by AdmissionUploadHandler
+_PHOTO_FIELD = AdmissionApplication._meta.get_field('profile_photo')
+_DOCUMENT_FIELD = AdmissionDocument._meta.get_field('document_file')
+_DOCUMENT_FIELD_RE = re.compile(r'^document-\d+-document_file$')
+
+
+def _model_field_for(field_name):
+    if field_name == 'profile_photo':
+        return _PHOTO_FIELD
+    if _DOCUMENT_FIELD_RE.match(field_name):
+        return _DOCUMENT_FIELD
+    return None
+
+
+def request_exceeds_quota(request):
+    """Whether the declared request size is already over the admission upload quota"""
+    try:
+        content_length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        return False
+    # Allow the regular form fields on top of the file quota
+    return content_length > settings.ADMISSION_UPLOAD_MAX_TOTAL_SIZE + settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+
+
+class StoredUploadedFile(UploadedFile):
+    """An upload already written to its final storage location, with its SHA-256"""
+
+    def __init__(self, stored_name, path, name, content_type, size, charset, sha256, content_type_extra=None):
+        super().__init__(open(path, 'rb'), name, content_type, size, charset, content_type_extra)
+        self.stored_name = stored_name
+        self.sha256 = sha256
+        self._path = path
+
+    def temporary_file_path(self):
+        # Lets ImageField validation open the stored file directly
+        return self._path
+
+    def close(self):
+        try:
+            return self.file.close()
+        except FileNotFoundError:
+            pass
+
+
+class AdmissionUploadHandler(FileUploadHandler):
+    """
+    Stream admission uploads straight to their final storage location.
+
+    Each chunk is hashed and written as it arrives, so a file is written to
+    disk once instead of being spooled to a temp file and copied. Per-file
+    and per-application byte quotas are enforced chunk by chunk: the upload
+    is stopped as soon as either is exceeded. Stored files are removed by
+    cleanup() unless the view calls commit() after saving the application.
+    Fields other than the profile photo and documents fall through to the
+    default handlers.
+    """
+    chunk_size = 64 * 2 ** 10
+
+    def __init__(self, request=None):
+        super().__init__(request)
+        self.errors = []
+        self.stored = []
+        self.total_size = 0
+        self.committed = False
+        self._active = False
+
+    def new_file(self, field_name, file_name, content_type, content_length, charset=None, content_type_extra=None):
+        model_field = _model_field_for(field_name)
+        self._active = model_field is not None and self._storage_has_paths()
+        if not self._active:
+            return
+        super().new_file(field_name, file_name, content_type, content_length, charset, content_type_extra)
+
+        if content_length is not None and content_length > settings.ADMISSION_UPLOAD_MAX_FILE_SIZE:
+            self._active = False
+            self._reject(f'"{file_name}" is larger than the {self._megabytes(settings.ADMISSION_UPLOAD_MAX_FILE_SIZE)} limit per file.')
+
+        self._name = self._open_destination(model_field, file_name)
+        self._size = 0
+        self._sha256 = hashlib.sha256()
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self._active:
+            return raw_data
+
+        self._size += len(raw_data)
+        self.total_size += len(raw_data)
+        if self._size > settings.ADMISSION_UPLOAD_MAX_FILE_SIZE:
+            self._abort_current()
+            self._reject(f'"{self.file_name}" is larger than the {self._megabytes(settings.ADMISSION_UPLOAD_MAX_FILE_SIZE)} limit per file.')
+        if self.total_size > settings.ADMISSION_UPLOAD_MAX_TOTAL_SIZE:
+            self._abort_current()
+            self._reject(f'Your uploads exceed the {self._megabytes(settings.ADMISSION_UPLOAD_MAX_TOTAL_SIZE)} limit per application.')
+
+        self._sha256.update(raw_data)
+        self._destination.write(raw_data)
+        return None
+
+    def file_complete(self, file_size):
+        if not self._active:
+            return None
+        self._destination.close()
+        self.stored.append(self._name)
+        self._active = False
+        return StoredUploadedFile(
+            stored_name=self._name,
+            path=default_storage.path(self._name),
+            name=self.file_name,
+            content_type=self.content_type,
+            size=self._size,
+            charset=self.charset,
+            sha256=self._sha256.hexdigest(),
+            content_type_extra=self.content_type_extra,
+        )
+
+    def upload_interrupted(self):
+        if self._active:
+            self._abort_current()
+
+    def commit(self):
+        """Keep the stored files: they now belong to a saved application"""
+        self.committed = True
+
+    def cleanup(self):
+        """Delete every file stored for this request unless commit() was called"""
+        if self.committed:
+            return
+        for name in self.stored:
+            default_storage.delete(name)
+        self.stored = []
+
+    def _open_destination(self, model_field, file_name):
+        name = default_storage.generate_filename(os.path.join(model_field.upload_to, file_name))
+        while True:
+            name = default_storage.get_available_name(name, max_length=model_field.max_length)
+            path = default_storage.path(name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                self._destination = open(path, 'xb')
+            except FileExistsError:
+                # Another request claimed the same name first
+                continue
+            return name
+
+    def _abort_current(self):
+        self._destination.close()
+        default_storage.delete(self._name)
+        self._active = False
+
+    def _reject(self, message):
+        self.errors.append(message)
+        # Read and discard the rest of the body rather than resetting the
+        # connection, so the browser gets the error page instead of a
+        # network error; admission() has already refused bodies declared
+        # larger than the quota, so at most that much is drained
+        raise StopUpload(connection_reset=False)
+
+    @staticmethod
+    def _storage_has_paths():
+        try:
+            default_storage.path('')
+        except NotImplementedError:
+            return False
+        return True
+
+    @staticmethod
+    def _megabytes(size):
+        return f'{size / 2 ** 20:g} MB'
@@ -1,11 +1,15 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
 
 app_name = 'base'
 
+# Read-only public pages, served by their async variants under ASGI
+pages = async_views if settings.ASYNC_PUBLIC_VIEWS else views
+
 urlpatterns = [
     # Home and basic pages
-    path('', views.home, name='home'),
+    path('', pages.home, name='home'),
     path('about/', views.about, name='about'),
     path('contact/', views.contact, name='contact'),
     path('admission/', views.admission, name='admission'),
@@ -13,16 +17,17 @@ urlpatterns = [
     path('admission/requirements/', views.admission_requirements, name='admission_requirements'),
     path('admission/process/', views.admission_process, name='admission_process'),
     path('admission/fees/', views.fee_structure, name='fee_structure'),
-    path('gallery/', views.gallery, name='gallery'),
+    path('gallery/', pages.gallery, name='gallery'),
     path('faculty/', views.faculty_members, name='faculty_members'),
     
     # News URLs
-    path('news/', views.news, name='news'),
-    path('news/<int:pk>/', views.news_detail, name='news_detail'),
+    path('news/', pages.news, name='news'),
+    path('news/<int:pk>/', pages.news_detail, name='news_detail'),
     
     # Notice URLs
-    path('notice/', views.notice, name='notice'),
-    path('notice/<int:pk>/', views.notice_detail, name='notice_detail'),
+    path('notice/', pages.notice, name='notice'),
+    path('notice/<int:pk>/', pages.notice_detail, name='notice_detail'),
+    path('notice/stream/', views.notice_stream_view, name='notice_stream'),
     
     # Blog URLs (using News model)
     path('blog/', views.blog, name='blog'),
@@ -33,11 +38,17 @@ urlpatterns = [
     path('events/<int:id>/', views.event_detail_view, name='event_detail'),
     
     # Academic Pages
-    path('syllabus/', views.syllabus, name='syllabus'),
-    path('resources/', views.resources, name='resources'),
+    path('syllabus/', pages.syllabus, name='syllabus'),
+    path('resources/', pages.resources, name='resources'),
     
     # Utility URLs
     path('search/', views.search_view, name='search'),
-    path('api/news/', views.api_news_view, name='api_news'),
+    path('api/news/', views.api_content_view, {'resource': 'news'}, name='api_news'),
+    path('api/notices/', views.api_content_view, {'resource': 'notices'}, name='api_notices'),
+    path('api/gallery/', views.api_content_view, {'resource': 'gallery'}, name='api_gallery'),
+    path('api/faculty/', views.api_content_view, {'resource': 'faculty'}, name='api_faculty'),
+    path('api/courses/', views.api_content_view, {'resource': 'courses'}, name='api_courses'),
+    path('api/changes/', views.api_changes_view, name='api_changes'),
+    path('csrf/', views.csrf_token_view, name='csrf_token'),
     path('health/', views.health_check_view, name='health_check'),
 ]
@@ -1,89 +1,90 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib import messages
 from django.utils import timezone
-from django.core.paginator import Paginator
-from django.http import Http404, JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
 from django.views.decorators.http import require_http_methods
-from django.core.mail import send_mail
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from django.views.decorators.cache import never_cache
+from django.middleware.csrf import get_token
 from django.conf import settings
 from .models import (
     News, Notice, Gallery, Alumni, 
     SplashImage, StudentTestimonial, FacultyMember,
-    Course, Facility, College, AdmissionApplication,
+    Course, Facility, College, AdmissionApplication, AcademicQualification, AdmissionDocument,
     Syllabus, Resource, Calendar, Contact
 )
 from .forms import AdmissionApplicationForm, AcademicQualificationFormSet, AdmissionDocumentFormSet, ContactForm
+from .caching import get_content_versions, content_freshness, content_version_freshness, conditional_page, cached_count
+from .pagination import KeysetPaginator
+from .search import search
+from .api import API_RESOURCES, API_PAGE_SIZE, API_MAX_PAGE_SIZE, resource_freshness, json_response
+from .changelog import changes_since, current_cursor, cursor_expired, decode_cursor
+from .events import event_stream
+from .querycache import query_cache_stats
+from .mail import queue_email
+from .admissions import save_admission_submission
+from .uploads import AdmissionUploadHandler, request_exceeds_quota
+from .routers import note_replica_miss
+from .signals import HOME_SECTION_MODELS
 
-def home(request):
-    # Handle contact form submission if it's a POST request
-    if request.method == 'POST':
-        contact_form = ContactForm(request.POST)
-        
-        if contact_form.is_valid():
-            # Get form data
-            name = contact_form.cleaned_data['name']
-            email = contact_form.cleaned_data['email']
-            phone = contact_form.cleaned_data.get('phone', 'Not provided')
-            subject = contact_form.cleaned_data['subject']
-            message = contact_form.cleaned_data['message']
-            
-            # Save to database
-            contact_message = Contact.objects.create(
-                name=name,
-                email=email,
-                phone=phone,
-                subject=subject,
-                message=message
-            )
-            
-            # Prepare email content
-            email_subject = f"New Contact Form Submission: {subject}"
-            email_message = f"""
+# Freshness sources for the conditional-GET page cache: (queryset, date field)
+published_news = (News.objects.filter(is_published=True), 'published_date')
+published_notices = (Notice.objects.filter(is_published=True), 'published_date')
+
+# Freshness of the cached public pages, shared with their async variants in async_views
+home_freshness = content_version_freshness(*HOME_SECTION_MODELS)
+gallery_freshness = content_freshness((Gallery.objects.filter(image__isnull=False), 'uploaded_at'))
+notice_freshness = content_freshness(published_notices)
+news_freshness = content_freshness(published_news, published_notices)
+notice_detail_freshness = content_freshness(published_notices, published_news)
+syllabus_freshness = content_freshness((Syllabus.objects.all(), None), (Course.objects.all(), None))
+resources_freshness = content_freshness((Resource.objects.all(), 'uploaded_at'), (Calendar.objects.all(), 'uploaded_at'))
+
+def get_published_or_404(model, pk):
+    """A published row, or 404; a miss may only be replica lag, so ReplicaMiddleware retries it on 'default'"""
+    try:
+        return get_object_or_404(model, pk=pk, is_published=True)
+    except Http404:
+        note_replica_miss()
+        raise
+
+def queue_contact_notification(contact_message):
+    """Queue the notification email for a contact form submission"""
+    email_subject = f"New Contact Form Submission: {contact_message.subject}"
+    email_message = f"""
 New contact form submission from Bhanubhakta Campus website:
 
-Name: {name}
-Email: {email}
-Phone: {phone}
-Subject: {subject}
+Name: {contact_message.name}
+Email: {contact_message.email}
+Phone: {contact_message.phone}
+Subject: {contact_message.subject}
 
 Message:
-{message}
+{contact_message.message}
 
 ---
 This message was sent from the Bhanubhakta Campus website contact form.
-Submitted at: {timezone.now().strftime('%B %d, %Y at %I:%M %p')}
+Submitted at: {timezone.localtime(contact_message.submitted_at).strftime('%B %d, %Y at %I:%M %p')}
 """
-            
-            try:
-                # Send email to campus
-                send_mail(
-                    subject=email_subject,
-                    message=email_message,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[settings.CONTACT_EMAIL],
-                    fail_silently=False,
-                )
-                
-                messages.success(
-                    request, 
-                    'Thank you for your message! We have received your inquiry and will get back to you soon.'
-                )
-                
-            except Exception as e:
-                # If email fails, still save to database but show different message
-                messages.warning(
-                    request,
-                    'Your message has been saved, but there was an issue sending the email notification. We will still review your message.'
-                )
-                print(f"Email sending failed: {e}")  # For debugging
-            
-            return redirect('base:home')
-        else:
-            messages.error(request, 'Please correct the errors in the contact form.')
-    else:
-        contact_form = ContactForm()
-    
-    # Get latest news and notices for homepage
+    queue_email(email_subject, email_message, [settings.CONTACT_EMAIL])
+
+@require_http_methods(['GET', 'HEAD'])
+@conditional_page(home_freshness)
+def home(request):
+    """
+    Homepage. It carries no per-visitor state: the contact form posts to
+    the contact view and fetches its CSRF token from csrf_token_view on
+    submit, so the whole page is served from the page cache.
+    """
+    return render(request, 'home.html', home_context())
+
+def home_context():
+    """Homepage context, shared with async_views.home"""
+    contact_form = ContactForm()
+
+    # Querysets below are lazy: a section is only queried when its cached
+    # fragment in home.html is missing for the current content version
     latest_news = News.objects.filter(is_published=True).order_by('-published_date')[:3]
     latest_notices = Notice.objects.filter(is_published=True).order_by('-published_date')[:3]
     splash_images = SplashImage.objects.filter(is_published=True).order_by('order')
@@ -103,7 +104,7 @@ Submitted at: {timezone.now().strftime('%B %d, %Y at %I:%M %p')}
     
     # Get statistics (you can make these dynamic later)
     total_students = 2500  # Can be calculated from AdmissionForm or Student model later
-    total_teachers = faculty_members.count()
+    total_teachers = faculty_members.count  # evaluated by the template only if used
     years_of_excellence = 30
     
     context = {
@@ -118,9 +119,11 @@ Submitted at: {timezone.now().strftime('%B %d, %Y at %I:%M %p')}
         'total_students': total_students,
         'total_teachers': total_teachers,
         'years_of_excellence': years_of_excellence,
-        'contact_form': contact_form,  # Add contact form to context
+        'contact_form': contact_form,
+        'section_versions': get_content_versions(HOME_SECTION_MODELS),
+        'section_cache_timeout': settings.HOME_SECTION_CACHE_TIMEOUT,
     }
-    return render(request, 'home.html', context)
+    return context
 
 def about(request):
     faculty_members = FacultyMember.objects.all()
@@ -132,19 +135,18 @@ def about(request):
     }
     return render(request, 'about.html', context)
 
+@conditional_page(gallery_freshness)
 def gallery(request):
     # Get all galleries that have images
     galleries = Gallery.objects.filter(image__isnull=False).order_by('-uploaded_at')
     
-    # Pagination
-    from django.core.paginator import Paginator
-    paginator = Paginator(galleries, 12)  # 12 images per page
-    page_number = request.GET.get('page')
-    galleries_page = paginator.get_page(page_number)
+    # Keyset pagination - 12 images per page
+    paginator = KeysetPaginator(galleries, 12, ('-uploaded_at', '-id'))
+    galleries_page = paginator.get_page(request.GET.get('cursor'))
     
     context = {
         'galleries': galleries_page,
-        'total_images': galleries.count(),
+        'total_images': cached_count(galleries),
     }
     return render(request, 'gallery.html', context)
 
@@ -169,46 +171,13 @@ def contact(request):
                 message=message
             )
             
-            # Prepare email content
-            email_subject = f"New Contact Form Submission: {subject}"
-            email_message = f"""
-New contact form submission from Bhanubhakta Campus website:
-
-Name: {name}
-Email: {email}
-Phone: {phone}
-Subject: {subject}
-
-Message:
-{message}
-
----
-This message was sent from the Bhanubhakta Campus website contact form.
-Submitted at: {timezone.now().strftime('%B %d, %Y at %I:%M %p')}
-"""
+            # Notification email is delivered by the outbox worker
+            queue_contact_notification(contact_message)
             
-            try:
-                # Send email to campus
-                send_mail(
-                    subject=email_subject,
-                    message=email_message,
-                    from_email=settings.DEFAULT_FROM_EMAIL,
-                    recipient_list=[settings.CONTACT_EMAIL],
-                    fail_silently=False,
-                )
-                
-                messages.success(
-                    request, 
-                    'Thank you for your message! We have received your inquiry and will get back to you soon.'
-                )
-                
-            except Exception as e:
-                # If email fails, still save to database but show different message
-                messages.warning(
-                    request,
-                    'Your message has been saved, but there was an issue sending the email notification. We will still review your message.'
-                )
-                print(f"Email sending failed: {e}")  # For debugging
+            messages.success(
+                request, 
+                'Thank you for your message! We have received your inquiry and will get back to you soon.'
+            )
             
             return redirect('base:contact')
         else:
@@ -225,40 +194,54 @@ def faculty_members(request):
     """Display all faculty members with their details"""
     faculty_list = FacultyMember.objects.all().order_by('designation', 'full_name')
     
-    # Pagination - 12 faculty members per page
-    paginator = Paginator(faculty_list, 12)
-    page_number = request.GET.get('page')
-    faculty = paginator.get_page(page_number)
+    # Keyset pagination - 12 faculty members per page
+    paginator = KeysetPaginator(faculty_list, 12, ('designation', 'full_name', 'id'))
+    faculty = paginator.get_page(request.GET.get('cursor'))
     
     context = {
         'faculty': faculty,
-        'total_faculty': faculty_list.count(),
+        'total_faculty': cached_count(faculty_list),
     }
     return render(request, 'faculty_member.html', context)
 
+@csrf_exempt
 def admission(request):
+    # Uploads are streamed to storage by AdmissionUploadHandler, which has to
+    # be installed before anything reads request.POST - including the CSRF
+    # middleware - so the CSRF check happens in _admission instead.
+    upload_handler = None
     if request.method == 'POST':
+        if request_exceeds_quota(request):
+            messages.error(request, 'Your uploads are too large. Please upload smaller scans of your documents.')
+            return redirect('base:admission')
+        upload_handler = AdmissionUploadHandler(request)
+        request.upload_handlers = [upload_handler] + request.upload_handlers
+    
+    try:
+        return _admission(request, upload_handler)
+    finally:
+        if upload_handler:
+            upload_handler.cleanup()
+
+@csrf_protect
+def _admission(request, upload_handler):
+    if request.method == 'POST':
+        # Parse the body (normally already done by the CSRF check) so quota
+        # errors raised while streaming the files are known here
+        request.FILES
+        if upload_handler.errors:
+            for error in upload_handler.errors:
+                messages.error(request, error)
+            return redirect('base:admission')
+        
         form = AdmissionApplicationForm(request.POST, request.FILES)
-        academic_formset = AcademicQualificationFormSet(request.POST, prefix='academic')
-        document_formset = AdmissionDocumentFormSet(request.POST, request.FILES, prefix='document')
+        academic_formset = AcademicQualificationFormSet(request.POST, prefix='academic', queryset=AcademicQualification.objects.none())
+        document_formset = AdmissionDocumentFormSet(request.POST, request.FILES, prefix='document', queryset=AdmissionDocument.objects.none())
         
         if form.is_valid() and academic_formset.is_valid() and document_formset.is_valid():
-            # Save the main admission application
-            admission_application = form.save()
-            
-            # Save academic qualifications
-            for academic_form in academic_formset:
-                if academic_form.cleaned_data and not academic_form.cleaned_data.get('DELETE', False):
-                    academic_qualification = academic_form.save(commit=False)
-                    academic_qualification.application = admission_application
-                    academic_qualification.save()
-            
-            # Save documents
-            for document_form in document_formset:
-                if document_form.cleaned_data and not document_form.cleaned_data.get('DELETE', False):
-                    document = document_form.save(commit=False)
-                    document.application = admission_application
-                    document.save()
+            # Save the application, qualifications and documents in one transaction
+            admission_application = save_admission_submission(form, academic_formset, document_formset)
+            upload_handler.commit()
             
             messages.success(
                 request, 
@@ -270,8 +253,9 @@ def admission(request):
             messages.error(request, 'Please correct the errors below and try again.')
     else:
         form = AdmissionApplicationForm()
-        academic_formset = AcademicQualificationFormSet(prefix='academic', queryset=None)
-        document_formset = AdmissionDocumentFormSet(prefix='document', queryset=None)
+        # Blank forms only: without an explicit queryset a model formset loads every stored row
+        academic_formset = AcademicQualificationFormSet(prefix='academic', queryset=AcademicQualification.objects.none())
+        document_formset = AdmissionDocumentFormSet(prefix='document', queryset=AdmissionDocument.objects.none())
     
     # Get all courses for display (if needed)
     courses = Course.objects.all()
@@ -294,29 +278,29 @@ def admission(request):
     }
     return render(request, 'admission.html', context)
 
+@conditional_page(notice_freshness)
 def notice(request):
     # Get all published notices with pagination
     notice_list = Notice.objects.filter(is_published=True).order_by('-published_date')
     
-    # Pagination - 10 notices per page
-    paginator = Paginator(notice_list, 10)
-    page_number = request.GET.get('page')
-    notices = paginator.get_page(page_number)
+    # Keyset pagination - 10 notices per page
+    paginator = KeysetPaginator(notice_list, 10, ('-published_date', '-id'))
+    notices = paginator.get_page(request.GET.get('cursor'))
     
     context = {
         'notices': notices,
-        'total_notices': notice_list.count(),
+        'total_notices': cached_count(notice_list),
     }
     return render(request, 'notice.html', context)
 
+@conditional_page(news_freshness)
 def news(request):
     # Get all published news with pagination
     news_list = News.objects.filter(is_published=True).order_by('-published_date')
     
-    # Pagination - 6 news articles per page
-    paginator = Paginator(news_list, 6)
-    page_number = request.GET.get('page')
-    news = paginator.get_page(page_number)
+    # Keyset pagination - 6 news articles per page
+    paginator = KeysetPaginator(news_list, 6, ('-published_date', '-id'))
+    news = paginator.get_page(request.GET.get('cursor'))
     
     # Get latest notices for sidebar
     latest_notices = Notice.objects.filter(is_published=True)[:5]
@@ -324,13 +308,14 @@ def news(request):
     context = {
         'news': news,
         'latest_notices': latest_notices,
-        'total_news': news_list.count(),
+        'total_news': cached_count(news_list),
     }
     return render(request, 'news.html', context)
 
+@conditional_page(news_freshness)
 def news_detail(request, pk):
     # Get specific news item
-    news_item = get_object_or_404(News, pk=pk, is_published=True)
+    news_item = get_published_or_404(News, pk)
     
     # Get related/recent news (excluding current one)
     recent_news = News.objects.filter(is_published=True).exclude(pk=pk).order_by('-published_date')[:4]
@@ -345,9 +330,10 @@ def news_detail(request, pk):
     }
     return render(request, 'news_detail.html', context)
 
+@conditional_page(notice_detail_freshness)
 def notice_detail(request, pk):
     # Get specific notice
-    notice_item = get_object_or_404(Notice, pk=pk, is_published=True)
+    notice_item = get_published_or_404(Notice, pk)
     
     # Get recent notices (excluding current one)
     recent_notices = Notice.objects.filter(is_published=True).exclude(pk=pk).order_by('-published_date')[:5]
@@ -367,10 +353,9 @@ def blog(request):
     # Using News model as blog posts
     blog_list = News.objects.filter(is_published=True).order_by('-published_date')
     
-    # Pagination
-    paginator = Paginator(blog_list, 5)
-    page_number = request.GET.get('page')
-    blogs = paginator.get_page(page_number)
+    # Keyset pagination - 5 posts per page
+    paginator = KeysetPaginator(blog_list, 5, ('-published_date', '-id'))
+    blogs = paginator.get_page(request.GET.get('cursor'))
     
     context = {
         'blogs': blogs,
@@ -379,7 +364,7 @@ def blog(request):
 
 def blog_detail(request, pk):
     # Using News model as blog posts
-    blog_post = get_object_or_404(News, pk=pk, is_published=True)
+    blog_post = get_published_or_404(News, pk)
     recent_posts = News.objects.filter(is_published=True).exclude(pk=pk).order_by('-published_date')[:3]
     
     context = {
@@ -448,53 +433,107 @@ def fee_structure(request):
     return render(request, 'fee_structure.html', context)
 
 def search_view(request):
-    """Simple search functionality"""
+    """Full-text search across news, notices, courses, faculty, resources and calendars"""
     query = request.GET.get('q', '').strip()
     
     if not query:
         return redirect('base:home')
     
-    # Search in news and notices
-    news_results = News.objects.filter(
-        title__icontains=query, 
-        is_published=True
-    )[:5]
-    
-    notice_results = Notice.objects.filter(
-        title__icontains=query
-    )[:5]
+    results = search(query, limit=30)
     
     context = {
         'query': query,
-        'news_results': news_results,
-        'notice_results': notice_results,
-        'total_results': news_results.count() + notice_results.count()
+        'results': results,
+        'total_results': len(results),
     }
-    
-    # For now, redirect to news page with search context
-    return render(request, 'news.html', context)
+    return render(request, 'search_results.html', context)
 
-def api_news_view(request):
-    """API endpoint for news (for AJAX requests)"""
-    news_list = News.objects.filter(is_published=True).order_by('-created_at')[:10]
-    
-    news_data = []
-    for news in news_list:
-        news_data.append({
-            'id': news.id,
-            'title': news.title,
-            'summary': news.summary,
-            'created_at': news.created_at.strftime('%Y-%m-%d'),
-            'image_url': news.featured_image.url if news.featured_image else None
-        })
-    
-    return JsonResponse({'news': news_data})
+@conditional_page(resource_freshness)
+def api_content_view(request, resource):
+    """
+    Read-only JSON API for published content, e.g. /api/news/?fields=id,title&limit=50
+
+    Pages are keyset cursors: pass a response's "next" or "previous" as
+    ?cursor=. Responses carry an ETag and are served from the page cache
+    until the resource changes.
+    """
+    api_resource = API_RESOURCES[resource]
+    fields = api_resource.select_fields(request.GET.get('fields'))
+    if fields is None:
+        return json_response({
+            'error': 'Unknown field in "fields".',
+            'fields': list(api_resource.fields),
+        }, status=400)
+    try:
+        limit = min(max(int(request.GET.get('limit', API_PAGE_SIZE)), 1), API_MAX_PAGE_SIZE)
+    except ValueError:
+        limit = API_PAGE_SIZE
+
+    results, next_cursor, previous_cursor = api_resource.page(fields, request.GET.get('cursor'), limit)
+    return json_response({resource: results, 'next': next_cursor, 'previous': previous_cursor})
+
+@require_http_methods(['GET', 'HEAD'])
+def api_changes_view(request):
+    """
+    Incremental change feed for the JSON API resources.
+
+    Without ?since= it returns no changes and the current cursor: take it,
+    download the resources, then poll with ?since=<next>. Each call returns
+    the rows changed since the cursor (tombstones for deleted rows) and a
+    new cursor; "more" means another page is waiting. A cursor older than
+    the tombstone retention gets 410, and the client must download again.
+    """
+    since = request.GET.get('since')
+    if not since:
+        return json_response({'changes': [], 'next': current_cursor(), 'more': False})
+
+    position = decode_cursor(since)
+    if position is None:
+        return json_response({'error': 'Invalid "since" cursor.'}, status=400)
+    sequence, issued_at = position
+    if cursor_expired(issued_at):
+        return json_response({'error': 'Cursor expired; download everything again.', 'reset': True}, status=410)
+
+    changes, next_cursor, more = changes_since(sequence, issued_at)
+    return json_response({'changes': changes, 'next': next_cursor, 'more': more})
+
+@require_http_methods(['GET'])
+async def notice_stream_view(request):
+    """
+    Server-sent events announcing notices and news as they are published,
+    so the notice page can show them without being reloaded.
+
+    Streams only under ASGI (school/asgi.py). Under WSGI every open stream
+    would hold a worker, so the response is 204, which tells EventSource
+    not to reconnect.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID', ''))
+    except ValueError:
+        last_event_id = None
+    response = StreamingHttpResponse(event_stream(last_event_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
 
 @require_http_methods(["GET"])
+@never_cache
+def csrf_token_view(request):
+    """CSRF token for forms on cached pages; also sets the CSRF cookie"""
+    return JsonResponse({'csrfToken': get_token(request)})
+
 def health_check_view(request):
     """Health check endpoint"""
-    return JsonResponse({'status': 'healthy', 'timestamp': timezone.now().isoformat()})
+    return JsonResponse({
+        'status': 'healthy',
+        'timestamp': timezone.now().isoformat(),
+        'query_cache': query_cache_stats(),
+    })
 
+@conditional_page(syllabus_freshness)
 def syllabus(request):
     """View for syllabus page"""
     # Get all syllabuses organized by course level
@@ -507,6 +546,7 @@ def syllabus(request):
     }
     return render(request, 'syllabus.html', context)
 
+@conditional_page(resources_freshness)
 def resources(request):
     """View for resources page with calendar section"""
     # Get all resources
@@ -0,0 +1,182 @@
+"""
+Admission submission write benchmark.
+
+Submits admission applications from N concurrent threads against a scratch
+SQLite file and reports, per save strategy, the end-to-end save latency and
+how long each submission held the SQLite write lock:
+
+    python benchmarks/admission_writes.py --threads 8 --submissions 50
+
+'legacy' is the row-by-row, autocommit save the admission view used to do;
+'atomic' is base.admissions.save_admission_submission.
+"""
+import argparse
+import statistics
+import threading
+import time
+
+from common import percentile, setup_django
+
+
+def build_submission(n):
+    """POST data and files for one application with two qualifications and two documents"""
+    from django.core.files.uploadedfile import SimpleUploadedFile
+
+    data = {
+        'full_name': f'APPLICANT {n}',
+        'date_of_birth_ad': '2005-04-14',
+        'date_of_birth_bs': '2062/01/01',
+        'nationality': 'nepali',
+        'gender': 'female',
+        'permanent_address': 'Damauli, Tanahun',
+        'temporary_address': 'Damauli, Tanahun',
+        'contact_number': '9800000000',
+        'email': f'applicant{n}@example.com',
+        'result_status': 'passed',
+        'guardian_name': 'GUARDIAN',
+        'guardian_contact': '9800000001',
+        'academic-TOTAL_FORMS': '2', 'academic-INITIAL_FORMS': '0',
+        'document-TOTAL_FORMS': '2', 'document-INITIAL_FORMS': '0',
+    }
+    for i in range(2):
+        data.update({
+            f'academic-{i}-institution_name': 'Shree Secondary School',
+            f'academic-{i}-program': 'SEE' if i == 0 else '+2 Management',
+            f'academic-{i}-symbol_number': f'{n:06d}{i}',
+            f'academic-{i}-passed_year': '2078',
+            f'academic-{i}-percentage_cgpa': '3.2',
+            f'academic-{i}-major_subjects': 'Accountancy, Economics',
+        })
+        data[f'document-{i}-document_name'] = f'Transcript {i}'
+    files = {
+        f'document-{i}-document_file': SimpleUploadedFile(f'doc{n}_{i}.pdf', b'%PDF-1.4\n' + b'0' * 200_000)
+        for i in range(2)
+    }
+    return data, files
+
+
+def bound_forms(data, files):
+    from base.forms import AdmissionApplicationForm, AcademicQualificationFormSet, AdmissionDocumentFormSet
+    from base.models import AcademicQualification, AdmissionDocument
+
+    form = AdmissionApplicationForm(data, files)
+    academic = AcademicQualificationFormSet(data, prefix='academic', queryset=AcademicQualification.objects.none())
+    documents = AdmissionDocumentFormSet(data, files, prefix='document', queryset=AdmissionDocument.objects.none())
+    assert form.is_valid() and academic.is_valid() and documents.is_valid(), (form.errors, academic.errors, documents.errors)
+    return form, academic, documents
+
+
+def legacy_save(form, academic_formset, document_formset):
+    # The admission view's previous save path, kept here for comparison
+    application = form.save()
+    for academic_form in academic_formset:
+        if academic_form.cleaned_data and not academic_form.cleaned_data.get('DELETE', False):
+            qualification = academic_form.save(commit=False)
+            qualification.application = application
+            qualification.save()
+    for document_form in document_formset:
+        if document_form.cleaned_data and not document_form.cleaned_data.get('DELETE', False):
+            document = document_form.save(commit=False)
+            document.application = application
+            document.save()
+    return application
+
+
+class LockTimer:
+    """
+    Measures how long a thread holds the SQLite write lock.
+
+    Outside a transaction each write statement holds the lock for its own
+    duration; inside one, the lock is held from the first write until commit.
+    Time spent waiting on a busy database is included, since the submission
+    is blocked either way.
+    """
+
+    def __init__(self):
+        self.held = 0.0
+        self._first_write = None
+
+    def __call__(self, execute, sql, params, many, context):
+        from django.db import transaction
+
+        is_write = sql.lstrip()[:6].upper() in ('INSERT', 'UPDATE', 'DELETE')
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if is_write:
+                if context['connection'].in_atomic_block:
+                    if self._first_write is None:
+                        self._first_write = start
+                        transaction.on_commit(self._committed)
+                else:
+                    self.held += time.perf_counter() - start
+
+    def _committed(self):
+        self.held += time.perf_counter() - self._first_write
+        self._first_write = None
+
+
+def run(strategy, threads, submissions):
+    from django.db import connection
+
+    latencies, lock_times, errors = [], [], []
+    lock = threading.Lock()
+    counter = iter(range(threads * submissions))
+
+    def worker():
+        for _ in range(submissions):
+            with lock:
+                n = next(counter)
+            form, academic, documents = bound_forms(*build_submission(n))
+            timer = LockTimer()
+            start = time.perf_counter()
+            try:
+                with connection.execute_wrapper(timer):
+                    strategy(form, academic, documents)
+            except Exception as e:
+                with lock:
+                    errors.append(f'{type(e).__name__}: {e}')
+                continue
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+                lock_times.append(timer.held)
+        connection.close()
+
+    started = time.perf_counter()
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    wall = time.perf_counter() - started
+    return latencies, lock_times, errors, wall
+
+
+def report(name, latencies, lock_times, errors, wall):
+    ms = lambda seconds: f'{seconds * 1000:8.2f}'
+    print(f'{name:>8}: {len(latencies)} saved, {len(errors)} failed in {wall:.2f}s '
+          f'({len(latencies) / wall:.1f}/s)')
+    if latencies:
+        print(f'          latency  ms  p50 {ms(statistics.median(latencies))}  p95 {ms(percentile(latencies, 95))}  max {ms(max(latencies))}')
+        print(f'          lock     ms  p50 {ms(statistics.median(lock_times))}  p95 {ms(percentile(lock_times, 95))}  max {ms(max(lock_times))}')
+    for error in sorted(set(errors))[:3]:
+        print(f'          error: {error}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--submissions', type=int, default=25, help='Submissions per thread')
+    args = parser.parse_args()
+
+    setup_django()
+    from base.admissions import save_admission_submission
+
+    for name, strategy in (('legacy', legacy_save), ('atomic', save_admission_submission)):
+        report(name, *run(strategy, args.threads, args.submissions))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+"""
+ASGI vs WSGI throughput benchmark.
+
+Seeds a scratch database, then serves it with each server in turn and
+drives the read-only public pages at several concurrency levels over
+keep-alive connections, reporting requests per second and p50/p99 latency:
+
+    python benchmarks/asgi_vs_wsgi.py --concurrency 1 8 32 128 --seconds 10
+
+Servers (each needs its packages, from pip install -r requirements-dev.txt;
+missing ones are skipped):
+
+    wsgi        school.wsgi:application on gunicorn gthread workers, sync views
+    asgi        school.asgi:application on uvicorn workers, async views (base.async_views)
+    asgi-sync   the same with ASYNC_PUBLIC_VIEWS=0, sync views run in a thread
+
+Both run --workers processes under gunicorn, so only the worker type
+differs. (uvicorn's own --workers supervisor is not used: its workers
+accept connections without TCP_NODELAY, which adds ~40 ms delayed-ACK
+stalls to every response and would swamp the comparison.)
+
+By default pages are served from the page cache, as most production
+traffic is; --cold adds a unique query string to every request so each
+one renders its page. The load generator runs in this process on one
+event loop; if it saturates a core before the server does, the numbers
+measure the client, so keep --workers below the number of free cores.
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from common import ROOT, percentile
+
+PAGES = ['/', '/news/', '/news/{news}/', '/notice/', '/notice/{notice}/', '/gallery/', '/syllabus/', '/resources/']
+
+SETTINGS = '''\
+from school.settings import *
+
+DEBUG = False
+ALLOWED_HOSTS = ['127.0.0.1']
+DATABASES['default']['NAME'] = {workdir!r} + '/bench.sqlite3'
+DATABASES['replica']['NAME'] = {workdir!r} + '/bench.replica.sqlite3'
+CACHES['default']['LOCATION'] = {workdir!r} + '/cache.sqlite3'
+MEDIA_ROOT = {workdir!r} + '/media'
+'''
+
+
+def server_commands(workers, threads, port):
+    """{name: (modules it needs, extra environment, command)}"""
+    gunicorn = [
+        sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}', '--workers', str(workers),
+        '--log-level', 'warning',
+    ]
+    wsgi = gunicorn + ['--worker-class', 'gthread', '--threads', str(threads), 'school.wsgi:application']
+    asgi = gunicorn + ['--worker-class', 'uvicorn.workers.UvicornWorker', 'school.asgi:application']
+    return {
+        'wsgi': (['gunicorn'], {}, wsgi),
+        'asgi': (['gunicorn', 'uvicorn'], {'ASYNC_PUBLIC_VIEWS': '1'}, asgi),
+        'asgi-sync': (['gunicorn', 'uvicorn'], {'ASYNC_PUBLIC_VIEWS': '0'}, asgi),
+    }
+
+
+def prepare(workdir, rows):
+    """Write the settings module for the servers, then migrate and seed the scratch database"""
+    (workdir / 'bench_settings.py').write_text(SETTINGS.format(workdir=str(workdir)))
+    env = dict(
+        os.environ, DJANGO_SETTINGS_MODULE='bench_settings', PYTHONPATH=f'{workdir}{os.pathsep}{ROOT}',
+        SERVER_TIMING_LOG_LEVEL='WARNING',
+    )
+    manage = [sys.executable, str(ROOT / 'manage.py')]
+    subprocess.run(manage + ['migrate', '--verbosity', '0'], env=env, cwd=ROOT, check=True)
+    subprocess.run(manage + [
+        'seed_scale', '--news', str(rows), '--notices', str(rows), '--gallery', str(rows // 2),
+        '--faculty', '50', '--alumni', '100', '--applications', '0', '--contacts', '0',
+        '--images', '8', '--pdfs', '4', '--seed', '1',
+    ], env=env, cwd=ROOT, check=True, stdout=subprocess.DEVNULL)
+    ids = subprocess.run(manage + ['shell', '-c', (
+        'from base.models import News, Notice; '
+        'print(News.objects.filter(is_published=True).latest("published_date").pk, '
+        'Notice.objects.filter(is_published=True).latest("published_date").pk)'
+    )], env=env, cwd=ROOT, check=True, capture_output=True, text=True).stdout.splitlines()[-1].split()
+    return env, {'news': ids[0], 'notice': ids[1]}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'server exited with status {process.returncode}')
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'server did not listen on port {port} within {timeout} s')
+
+
+async def read_response(reader):
+    """Status code of one HTTP/1.1 response, reading its body off the connection"""
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split()[1])
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    if headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if not size:
+                break
+    else:
+        await reader.readexactly(int(headers.get('content-length', 0)))
+    return status, headers.get('connection') == 'close'
+
+
+async def drive(port, paths, concurrency, seconds, warmup, cold=False):
+    """Keep `concurrency` connections busy; (latencies, errors) of the requests after the warmup"""
+    latencies, errors = [], []
+    counter = itertools.count()
+    started = time.perf_counter()
+    measure_from = started + warmup
+    deadline = measure_from + seconds
+
+    async def client():
+        reader = writer = None
+        while time.perf_counter() < deadline:
+            n = next(counter)
+            path = paths[n % len(paths)]
+            if cold:
+                path += f'?run={n}'
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+                    # As browsers and load generators do; otherwise Nagle's algorithm
+                    # and delayed ACKs add ~40 ms to some responses
+                    writer.get_extra_info('socket').setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                sent = time.perf_counter()
+                writer.write(f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\n\r\n'.encode())
+                status, closed = await read_response(reader)
+                finished = time.perf_counter()
+                if closed:
+                    writer.close()
+                    writer = None
+            except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+                if writer is not None:
+                    writer.close()
+                    writer = None
+                if time.perf_counter() >= measure_from:
+                    errors.append(f'{type(e).__name__}: {e}')
+                continue
+            if sent >= measure_from and finished <= deadline:
+                if status >= 400:
+                    errors.append(f'HTTP {status} {path}')
+                else:
+                    latencies.append(finished - sent)
+        if writer is not None:
+            writer.close()
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, errors
+
+
+def run_server(name, command, extra_env, env, port, paths, args):
+    process = subprocess.Popen(command, env=dict(env, **extra_env), cwd=ROOT)
+    try:
+        wait_for_port(port, process)
+        for concurrency in args.concurrency:
+            latencies, errors = asyncio.run(drive(port, paths, concurrency, args.seconds, args.warmup, args.cold))
+            ms = lambda value: f'{value * 1000:8.1f}'
+            print(f'{name:>9}  c={concurrency:<4} {len(latencies) / args.seconds:9.1f} req/s  '
+                  f'p50 {ms(percentile(latencies, 50))} ms  p99 {ms(percentile(latencies, 99))} ms  '
+                  f'{len(errors)} errors', flush=True)
+            for error in sorted(set(errors))[:3]:
+                print(f'           error: {error}')
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--servers', nargs='+', default=['wsgi', 'asgi', 'asgi-sync'], choices=['wsgi', 'asgi', 'asgi-sync'])
+    parser.add_argument('--concurrency', nargs='+', type=int, default=[1, 8, 32, 128])
+    parser.add_argument('--seconds', type=float, default=10, help='Measured seconds per concurrency level')
+    parser.add_argument('--warmup', type=float, default=2, help='Unmeasured seconds before each level')
+    parser.add_argument('--workers', type=int, default=2, help='Server worker processes')
+    parser.add_argument('--threads', type=int, default=8, help='Threads per gunicorn worker')
+    parser.add_argument('--rows', type=int, default=2000, help='News and notices to seed')
+    parser.add_argument('--cold', action='store_true', help='Bypass the page cache with a unique query string per request')
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix='bench-'))
+    try:
+        env, ids = prepare(workdir, args.rows)
+        paths = [page.format(**ids) for page in PAGES]
+
+        port = free_port()
+        commands = server_commands(args.workers, args.threads, port)
+        for name in args.servers:
+            modules, extra_env, command = commands[name]
+            missing = [module for module in modules if not _importable(module)]
+            if missing:
+                print(f'{name:>9}  skipped: {", ".join(missing)} not installed')
+                continue
+            run_server(name, command, extra_env, env, port, paths, args)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def _importable(module):
+    return subprocess.run([sys.executable, '-c', f'import {module}'], capture_output=True).returncode == 0
+
+
+if __name__ == '__main__':
+    main()
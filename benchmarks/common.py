@@ -0,0 +1,47 @@
+"""
+Shared bootstrap for the benchmark scripts.
+
+Benchmarks never touch db.sqlite3, cache.sqlite3 or base/media: each run
+gets a fresh, migrated SQLite file, cache file and media directory in a
+temporary folder.
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def setup_django(workdir=None, database_options=None):
+    """Configure Django against a scratch database and media root, then migrate"""
+    sys.path.insert(0, str(ROOT))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'school.settings')
+    # One Server-Timing log line per request would drown the results
+    os.environ.setdefault('SERVER_TIMING_LOG_LEVEL', 'WARNING')
+
+    from django.conf import settings
+
+    workdir = Path(workdir or tempfile.mkdtemp(prefix='bench-'))
+    settings.DATABASES['default']['NAME'] = str(workdir / 'bench.sqlite3')
+    if database_options:
+        settings.DATABASES['default'].setdefault('OPTIONS', {}).update(database_options)
+    settings.MEDIA_ROOT = str(workdir / 'media')
+    # Keep off the site's live cache.sqlite3
+    settings.CACHES['default']['LOCATION'] = str(workdir / 'cache.sqlite3')
+
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+    return workdir
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
@@ -0,0 +1,96 @@
+"""
+Cache backend benchmark.
+
+Times get, get_many, set and incr on the per-process locmem cache and on
+the shared SQLite cache (base.sharedcache), then hammers one version key
+with incr() from several processes at once and checks that no increment
+was lost:
+
+    python benchmarks/shared_cache.py --operations 20000 --processes 4
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+from common import ROOT
+
+PAGE = {'html': '<article>' + 'Campus news ' * 400 + '</article>', 'etag': 'abc123'}
+
+
+def configure():
+    sys.path.insert(0, str(ROOT))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'school.settings')
+    import django
+    django.setup()
+
+
+def backends(path):
+    from django.core.cache.backends.locmem import LocMemCache
+    from base.sharedcache import SQLiteCache
+
+    params = {'OPTIONS': {'MAX_ENTRIES': 100000}}
+    return {'locmem': LocMemCache('bench', params), 'sqlite': SQLiteCache(path, params)}
+
+
+def timed(operation, count):
+    started = time.perf_counter()
+    for n in range(count):
+        operation(n)
+    return (time.perf_counter() - started) / count * 1_000_000
+
+
+def measure(cache, count):
+    cache.clear()
+    cache.set('page', PAGE)
+    cache.set_many({f'version:{n}': n for n in range(8)})
+    cache.set('counter', 0)
+    version_keys = [f'version:{n}' for n in range(8)]
+    return {
+        'get': timed(lambda n: cache.get('page'), count),
+        'get_many': timed(lambda n: cache.get_many(version_keys), count),
+        'set': timed(lambda n: cache.set(f'page:{n % 500}', PAGE), count // 4),
+        'incr': timed(lambda n: cache.incr('counter'), count // 4),
+    }
+
+
+def hammer(args):
+    path, count = args
+    configure()
+    cache = backends(path)['sqlite']
+    for _ in range(count):
+        cache.incr('shared-counter')
+        cache.get('page')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--operations', type=int, default=20000)
+    parser.add_argument('--processes', type=int, default=4)
+    args = parser.parse_args()
+
+    configure()
+    path = os.path.join(tempfile.mkdtemp(prefix='bench-'), 'cache.sqlite3')
+    caches = backends(path)
+    results = {name: measure(cache, args.operations) for name, cache in caches.items()}
+    for operation in results['locmem']:
+        locmem, sqlite = results['locmem'][operation], results['sqlite'][operation]
+        print(f'{operation:>9}: locmem {locmem:7.1f} us  sqlite {sqlite:7.1f} us  ({sqlite / locmem:.1f}x)')
+
+    shared = caches['sqlite']
+    shared.set('shared-counter', 0)
+    per_process = args.operations // args.processes
+    started = time.perf_counter()
+    with multiprocessing.get_context('spawn').Pool(args.processes) as pool:
+        pool.map(hammer, [(path, per_process)] * args.processes)
+    elapsed = time.perf_counter() - started
+    expected = per_process * args.processes
+    counted = shared.get('shared-counter')
+    print(f'{args.processes} processes: {expected / elapsed:,.0f} incr+get pairs/s, '
+          f'counter {counted} of {expected} ({"ok" if counted == expected else "LOST INCREMENTS"})')
+
+
+if __name__ == '__main__':
+    main()
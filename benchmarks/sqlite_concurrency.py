@@ -0,0 +1,149 @@
+"""
+SQLite read/write concurrency benchmark.
+
+Runs N writer threads (each transaction reads, then inserts a contact
+message, like the contact and admission forms) next to M reader threads
+(the published news list with its count) for a fixed time, and reports
+throughput, write latency and "database is locked" failures:
+
+    python benchmarks/sqlite_concurrency.py --writers 8 --readers 8 --seconds 10
+
+'default' is SQLite as Django configures it out of the box; 'tuned' applies
+SQLITE_PRAGMAS and BEGIN IMMEDIATE from school/settings.py. Each mode runs in
+its own process against its own scratch database, since journal_mode=WAL
+is a property of the database file.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+from common import ROOT, percentile, setup_django
+
+
+def configure(mode):
+    sys.path.insert(0, str(ROOT))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'school.settings')
+    from django.conf import settings
+
+    if mode == 'default':
+        settings.SQLITE_PRAGMAS = {}
+        settings.DATABASES['default'].get('OPTIONS', {}).pop('transaction_mode', None)
+    setup_django()
+
+
+def seed():
+    from django.utils import timezone
+    from base.models import News
+
+    News.objects.bulk_create([
+        News(title=f'News {i}', content='Content ' * 100, is_published=True, published_date=timezone.now())
+        for i in range(2000)
+    ])
+
+
+def write_once(n):
+    from django.db import transaction
+    from base.models import Contact
+
+    with transaction.atomic():
+        # Read first: with a deferred transaction this is where the lock upgrade can fail
+        Contact.objects.filter(email=f'writer{n % 50}@example.com').exists()
+        Contact.objects.create(
+            name=f'Writer {n}', email=f'writer{n % 50}@example.com',
+            subject='Admission enquiry', message='Message ' * 50,
+        )
+
+
+def read_once():
+    from base.models import News
+
+    list(News.objects.filter(is_published=True).order_by('-published_date', '-id')[:10])
+    News.objects.filter(is_published=True).count()
+
+
+def run(writers, readers, seconds):
+    from django.db import connection
+
+    results = {'writes': 0, 'reads': 0, 'write_latencies': [], 'errors': []}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def writer(index):
+        n = index * 1_000_000
+        while time.perf_counter() < deadline:
+            n += 1
+            start = time.perf_counter()
+            try:
+                write_once(n)
+            except Exception as e:
+                with lock:
+                    results['errors'].append(f'{type(e).__name__}: {e}')
+                continue
+            with lock:
+                results['writes'] += 1
+                results['write_latencies'].append(time.perf_counter() - start)
+        connection.close()
+
+    def reader():
+        while time.perf_counter() < deadline:
+            try:
+                read_once()
+            except Exception as e:
+                with lock:
+                    results['errors'].append(f'{type(e).__name__}: {e}')
+                continue
+            with lock:
+                results['reads'] += 1
+        connection.close()
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def report(mode, results, seconds):
+    latencies = results['write_latencies']
+    ms = lambda value: f'{value * 1000:8.2f}'
+    print(f'{mode:>8}: {results["writes"] / seconds:8.1f} writes/s  {results["reads"] / seconds:8.1f} reads/s  '
+          f'{len(results["errors"])} failed')
+    if latencies:
+        print(f'          write ms  p50 {ms(statistics.median(latencies))}  p95 {ms(percentile(latencies, 95))}  max {ms(max(latencies))}')
+    for error in sorted(set(results['errors']))[:3]:
+        print(f'          error: {error}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--mode', choices=['default', 'tuned'], help='Run a single mode (used for the child processes)')
+    args = parser.parse_args()
+
+    if args.mode:
+        configure(args.mode)
+        seed()
+        results = run(args.writers, args.readers, args.seconds)
+        print(json.dumps(results))
+        return
+
+    for mode in ('default', 'tuned'):
+        child = subprocess.run(
+            [sys.executable, __file__, '--mode', mode, '--writers', str(args.writers),
+             '--readers', str(args.readers), '--seconds', str(args.seconds)],
+            check=True, capture_output=True, text=True,
+        )
+        report(mode, json.loads(child.stdout.splitlines()[-1]), args.seconds)
+
+
+if __name__ == '__main__':
+    main()
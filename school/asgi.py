@@ -2,6 +2,12 @@
 ASGI config for school project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Run it with an ASGI server (e.g. ``uvicorn school.asgi:application``) to
+serve the notice event stream at /notice/stream/, which holds one open
+connection per reader; under WSGI that endpoint answers 204. The read-only
+public pages are served by their async variants in base/async_views.py
+(settings.ASYNC_PUBLIC_VIEWS); start the server with ASYNC_PUBLIC_VIEWS=0
+to use the sync views instead.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -12,5 +18,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'school.settings')
+os.environ.setdefault('ASYNC_PUBLIC_VIEWS', '1')
 
 application = get_asgi_application()
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,7 +44,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'base.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'base.middleware.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -55,7 +59,8 @@ ROOT_URLCONF = 'school.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates, timing renders for ServerTimingMiddleware
+        'BACKEND': 'base.timing.TimedDjangoTemplates',
         'DIRS': [],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -78,7 +83,47 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
-    }
+        'OPTIONS': {
+            # Take the write lock when a transaction starts, so a transaction
+            # that reads before writing waits on busy_timeout instead of
+            # failing with "database is locked" when it tries to upgrade.
+            # This applies to every atomic() block on 'default', read-only
+            # ones included (their queries also bypass base.querycache), so
+            # keep atomic() to write paths; public pages read the replica.
+            'transaction_mode': 'IMMEDIATE',
+        },
+    },
+    # Copy of 'default' that public pages read from; refreshed by running
+    # manage.py refresh_replica --loop next to send_queued_email --loop, and
+    # unused until the first refresh
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.replica.sqlite3',
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    },
+}
+
+DATABASE_ROUTERS = ['base.routers.ReplicaRouter']
+
+# Seconds a client that wrote keeps reading from 'default'; keep it above
+# the interval refresh_replica runs at
+DATABASE_REPLICA_PIN_SECONDS = 5 * 60
+
+# Seconds after its last refresh that the replica is still read from; once
+# refresh_replica has stopped for longer, every request reads 'default'.
+# Keep it a few refresh intervals long so one slow refresh does not flip it
+DATABASE_REPLICA_MAX_AGE = 3 * 60
+
+# Pragmas applied to every new SQLite connection (base.signals.apply_sqlite_pragmas)
+SQLITE_PRAGMAS = {
+    'busy_timeout': 5000,  # milliseconds to wait for a lock; first, so it covers the pragmas below
+    'journal_mode': 'WAL',  # readers and the writer no longer block each other
+    'synchronous': 'NORMAL',  # safe with WAL; fsync at checkpoints instead of every commit
+    'cache_size': -20000,  # page cache per connection, in KiB when negative
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'MEMORY',
 }
 
 
@@ -140,6 +185,114 @@ EMAIL_HOST_USER = 'your-email@gmail.com'  # Replace with your email
 EMAIL_HOST_PASSWORD = 'your-app-password'  # Replace with your app password
 DEFAULT_FROM_EMAIL = 'Bhanubhakta Campus <your-email@gmail.com>'
 
+# Cache shared by all worker processes on this host (base.sharedcache).
+# Version keys are bumped with atomic incr(), so an invalidation made by one
+# worker, or by a management command, is seen by every other worker
+CACHES = {
+    'default': {
+        'BACKEND': 'base.sharedcache.SQLiteCache',
+        'LOCATION': str(BASE_DIR / 'cache.sqlite3'),
+        'TIMEOUT': 300,
+        'OPTIONS': {
+            'MAX_ENTRIES': 20000,
+            'CULL_FREQUENCY': 4,  # remove a quarter of the entries when full
+        },
+    }
+}
+
+# The test runner gets a private in-process cache: cache.sqlite3 is the live
+# cache of the running site, which tests must neither clear nor fill with
+# pages rendered from the test database
+if sys.argv[1:2] == ['test']:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': 100000},
+        }
+    }
+
+# Homepage fragment cache
+# Sections are invalidated by content version on save/delete, so the timeout
+# only bounds how long an unused fragment stays in the cache
+HOME_SECTION_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Full-page cache for public list and detail pages
+# Entries carry the freshness token they were rendered for. Once the token
+# moves on or this timeout passes, one request renders the page again while
+# the others are served the previous copy (see STAMPEDE_STALE_TIMEOUT below)
+PAGE_CACHE_TIMEOUT = 60 * 60
+
+# Stampede protection for cached pages and fragments (base.caching.single_flight)
+# Only one request regenerates an entry; the others are served the previous
+# copy for up to STAMPEDE_STALE_TIMEOUT past its expiry, or wait up to
+# STAMPEDE_LOCK_TIMEOUT for a missing entry. A higher beta regenerates
+# entries earlier before they expire.
+STAMPEDE_STALE_TIMEOUT = 60 * 60
+STAMPEDE_LOCK_TIMEOUT = 30
+STAMPEDE_EARLY_EXPIRY_BETA = 1.0
+
+# Change feed (/api/changes/): tombstones older than this are compacted away,
+# and clients whose cursor is older must download everything again
+CHANGE_LOG_RETENTION_DAYS = 30
+
+# Server-sent events of new notices (base.events), served under ASGI.
+# Idle streams get a heartbeat comment; a client whose queue of unread
+# events fills up is asked to reconnect and catch up from the change log
+SSE_HEARTBEAT_INTERVAL = 15  # seconds
+SSE_POLL_INTERVAL = 2  # seconds between change log reads for writes from other processes
+SSE_QUEUE_SIZE = 16  # unread events per client
+SSE_MAX_CLIENTS = 5000  # streams per worker process
+SSE_RETRY_MS = 5000  # browser reconnect delay
+
+# Route the read-only public pages to their async variants (base.async_views).
+# school/asgi.py turns this on; under WSGI every call of an async view would
+# start an event loop, so the sync views are used
+ASYNC_PUBLIC_VIEWS = os.environ.get('ASYNC_PUBLIC_VIEWS') == '1'
+
+# One line per request from ServerTimingMiddleware with its db, template and
+# view time, e.g. "method=GET path=/ status=200 db_ms=3.1 tpl_ms=8.4 ...";
+# records also carry the numbers in a `timings` attribute for JSON formatters.
+# The lines are logged at INFO, so SERVER_TIMING_LOG_LEVEL=WARNING silences
+# them; tests and benchmarks do, to keep their output readable
+SERVER_TIMING_LOG_LEVEL = os.environ.get(
+    'SERVER_TIMING_LOG_LEVEL', 'WARNING' if sys.argv[1:2] == ['test'] else 'INFO'
+)
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'base.timing': {'handlers': ['console'], 'level': SERVER_TIMING_LOG_LEVEL, 'propagate': False},
+    },
+}
+
+# ORM query result cache for read-mostly models (base.querycache)
+# Results are keyed on table versions bumped on every write, so the timeout
+# only bounds how long results of superseded versions linger
+QUERY_CACHE_TIMEOUT = 60 * 60
+
+# Request body and upload limits
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2621440  # 2.5 MB; larger uploads go to a temp file
+DATA_UPLOAD_MAX_MEMORY_SIZE = 2621440  # 2.5 MB of non-file form data
+DATA_UPLOAD_MAX_NUMBER_FIELDS = 1000
+DATA_UPLOAD_MAX_NUMBER_FILES = 20
+
+# Admission uploads are streamed to storage and rejected mid-upload once over quota
+ADMISSION_UPLOAD_MAX_FILE_SIZE = 5 * 1024 * 1024
+ADMISSION_UPLOAD_MAX_TOTAL_SIZE = 20 * 1024 * 1024
+
+# Responsive image renditions generated on upload
+IMAGE_RENDITION_WIDTHS = (320, 640, 960, 1280, 1920)
+IMAGE_RENDITION_QUALITY = 80
+
+# Outbox worker (manage.py send_queued_email)
+EMAIL_OUTBOX_BATCH_SIZE = 50
+EMAIL_OUTBOX_MAX_ATTEMPTS = 5
+EMAIL_OUTBOX_RETRY_DELAY = 60  # seconds, doubled after every failed attempt
+EMAIL_OUTBOX_LOCK_TIMEOUT = 600  # seconds before a claimed message is retried
+
 # Contact form settings
 CONTACT_EMAIL = 'bhanubhaktacampus240@gmail.com'  # Bhanubhakta campus email
 